@@ -0,0 +1,303 @@
+# aggregators.py
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Fields alternative data points can be grouped by
+GROUP_FIELDS = ("data_type", "source")
+
+# Percentiles reported alongside the median
+DEFAULT_PERCENTILES = (1, 5, 25, 75, 95, 99)
+
+# Streams of at most this many values keep them for exact quantiles
+EXACT_QUANTILE_VALUES = 1024
+
+# Magnitudes below this count as zero in the quantile sketch
+_MIN_MAGNITUDE = 1e-12
+
+# Origin of the time buckets, shared with the bar grid
+_EPOCH64 = np.datetime64("1970-01-01T00:00:00", "us")
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with bounded relative error (DDSketch)
+
+    Values are counted in logarithmic buckets of ratio gamma, so any quantile
+    is returned within relative_accuracy of a value that actually holds that
+    rank; between two ranks it is interpolated linearly, as np.quantile does.
+    Memory grows with the logarithm of the value range, not with the
+    number of values, and merging two sketches adds their bucket counts, so
+    the result is identical to sketching the combined values.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+
+    def update(self, values: np.ndarray) -> None:
+        """Add a chunk of values; NaN is ignored"""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        positive = values[values > _MIN_MAGNITUDE]
+        negative = -values[values < -_MIN_MAGNITUDE]
+        self._add(self.positive, positive)
+        self._add(self.negative, negative)
+        self.zero += len(values) - len(positive) - len(negative)
+        self.count += len(values)
+
+    def merge(self, other: "QuantileSketch") -> None:
+        """Add the counts of another sketch with the same accuracy"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for buckets, other_buckets in ((self.positive, other.positive), (self.negative, other.negative)):
+            for index, count in other_buckets.items():
+                buckets[index] = buckets.get(index, 0) + count
+        self.zero += other.zero
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the q-quantile (0 <= q <= 1), or None if the sketch is empty"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        lower = math.floor(rank)
+        value = self._ranked_value(lower)
+        if rank > lower:
+            value += (rank - lower) * (self._ranked_value(lower + 1) - value)
+        return value
+
+    def _ranked_value(self, rank: int) -> float:
+        """Estimate of the value at (0-based) rank in sorted order"""
+        seen = 0
+        # Most negative values sit in the highest negative buckets
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index]
+            if seen > rank:
+                return -self._bucket_value(index)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.positive):
+            seen += self.positive[index]
+            if seen > rank:
+                return self._bucket_value(index)
+        return self._bucket_value(max(self.positive))
+
+    def _add(self, buckets: Dict[int, int], magnitudes: np.ndarray) -> None:
+        if len(magnitudes) == 0:
+            return
+        indices = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+        keys, counts = np.unique(indices, return_counts=True)
+        for index, count in zip(keys.tolist(), counts.tolist()):
+            buckets[index] = buckets.get(index, 0) + count
+
+    def _bucket_value(self, index: int) -> float:
+        # Midpoint (in relative terms) of the bucket (gamma^(i-1), gamma^i]
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+class RunningStats:
+    """
+    One-pass count, mean, variance, min, max and quantiles of a value stream
+
+    Each chunk is reduced with NumPy and folded in with the parallel form of
+    Welford's update (Chan et al.), which is also how two partial results merge.
+    Quantiles are exact while the stream holds at most EXACT_QUANTILE_VALUES
+    values and come from the sketch beyond that; which one applies depends
+    only on the total count, not on how the values were chunked or merged.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sketch = QuantileSketch(relative_accuracy)
+        # The values themselves while there are at most EXACT_QUANTILE_VALUES, else None
+        self._exact: Optional[List[np.ndarray]] = []
+
+    def update(self, values: np.ndarray) -> None:
+        """Add a chunk of values; NaN is ignored"""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        mean = float(values.mean())
+        m2 = float(np.square(values - mean).sum())
+        self._combine(len(values), mean, m2, float(values.min()), float(values.max()))
+        self.sketch.update(values)
+        self._keep_exact([values])
+
+    def merge(self, other: "RunningStats") -> None:
+        """Fold in the statistics of another stream"""
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        self.sketch.merge(other.sketch)
+        self._keep_exact(other._exact)
+
+    @property
+    def variance(self) -> float:
+        """Population variance, as np.var computes it"""
+        return self.m2 / self.count if self.count else math.nan
+
+    def summary(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Any]:
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "median": self.quantile(0.5),
+            "std_dev": math.sqrt(self.variance),
+            "min": self.min,
+            "max": self.max,
+            "percentiles": {f"p{p:g}": self.quantile(p / 100) for p in percentiles}
+        }
+
+    def quantile(self, q: float) -> Optional[float]:
+        """The q-quantile: exact for small streams, else the sketch estimate kept within the exact min and max"""
+        if self.count == 0:
+            return None
+        if self._exact is not None:
+            if len(self._exact) > 1:
+                self._exact = [np.concatenate(self._exact)]
+            return float(np.quantile(self._exact[0], q))
+        return min(max(self.sketch.quantile(q), self.min), self.max)
+
+    def _keep_exact(self, values: Optional[List[np.ndarray]]) -> None:
+        if self._exact is None:
+            return
+        if values is None or self.count > EXACT_QUANTILE_VALUES:
+            self._exact = None
+        else:
+            self._exact.extend(values)
+
+    def _combine(self, count: int, mean: float, m2: float, low: float, high: float) -> None:
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+
+class StreamingAggregator:
+    """
+    RunningStats per group of (data_type, source, time bucket), fed in chunks
+
+    group_by selects which of GROUP_FIELDS split the groups and bucket, when
+    given, splits them further into epoch-aligned time buckets. Aggregators
+    built with the same configuration merge exactly, so chunks can be
+    aggregated by parallel workers and combined afterwards.
+    """
+
+    def __init__(
+        self,
+        group_by: Sequence[str] = (),
+        bucket: Optional[timedelta] = None,
+        relative_accuracy: float = 0.01
+    ):
+        unknown = [field for field in group_by if field not in GROUP_FIELDS]
+        if unknown:
+            raise ValueError(f"Cannot group by: {', '.join(unknown)}")
+        if bucket is not None and bucket <= timedelta(0):
+            raise ValueError("Time bucket must be positive")
+        self.group_by = tuple(group_by)
+        self.bucket = bucket
+        self.relative_accuracy = relative_accuracy
+        self._groups: Dict[Tuple, RunningStats] = {}
+
+    def update(
+        self,
+        value: np.ndarray,
+        data_type: Optional[np.ndarray] = None,
+        source: Optional[np.ndarray] = None,
+        timestamp: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        Add a chunk of values with their group columns
+
+        Columns are parallel arrays; timestamp is datetime64 in UTC and is only
+        required when bucketing.
+        """
+        columns = {"data_type": data_type, "source": source}
+        keys = []
+        for field in self.group_by:
+            if columns[field] is None:
+                raise ValueError(f"Grouping by {field} requires a {field} column")
+            keys.append(np.asarray(columns[field]))
+        if self.bucket is not None:
+            if timestamp is None:
+                raise ValueError("Time buckets require a timestamp column")
+            bucket_us = self.bucket // timedelta(microseconds=1)
+            offsets = (np.asarray(timestamp, dtype="datetime64[us]") - _EPOCH64).astype(np.int64)
+            keys.append(offsets // bucket_us)
+
+        value = np.asarray(value, dtype=float)
+        if not keys:
+            self._group(()).update(value)
+            return
+
+        # Encode each key column as integer codes, then split the chunk by group
+        uniques, codes = zip(*(np.unique(key, return_inverse=True) for key in keys))
+        combined = np.zeros(len(value), dtype=np.int64)
+        for unique, code in zip(uniques, codes):
+            combined = combined * len(unique) + code.ravel()
+        group_codes, inverse = np.unique(combined, return_inverse=True)
+        order = np.argsort(inverse.ravel(), kind="stable")
+        bounds = np.cumsum(np.bincount(inverse.ravel(), minlength=len(group_codes)))[:-1]
+        for group_code, indices in zip(group_codes.tolist(), np.split(order, bounds)):
+            key = []
+            for unique in reversed(uniques):
+                group_code, code = divmod(group_code, len(unique))
+                key.append(unique[code].item())
+            self._group(tuple(reversed(key))).update(value[indices])
+
+    def merge(self, other: "StreamingAggregator") -> None:
+        """Fold in the groups of an aggregator with the same configuration"""
+        if (other.group_by, other.bucket, other.relative_accuracy) != (self.group_by, self.bucket, self.relative_accuracy):
+            raise ValueError("Cannot merge aggregators with different configurations")
+        for key, stats in other._groups.items():
+            self._group(key).merge(stats)
+
+    def total(self) -> RunningStats:
+        """Statistics over every group combined"""
+        total = RunningStats(self.relative_accuracy)
+        for stats in self._groups.values():
+            total.merge(stats)
+        return total
+
+    def results(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> List[Dict[str, Any]]:
+        """One summary per group, ordered by group key"""
+        results = []
+        for key in sorted(self._groups):
+            result = dict(zip(self.group_by, key))
+            if self.bucket is not None:
+                result["bucket"] = (datetime(1970, 1, 1) + key[-1] * self.bucket).isoformat()
+            result.update(self._groups[key].summary(percentiles))
+            results.append(result)
+        return results
+
+    def _group(self, key: Tuple) -> RunningStats:
+        stats = self._groups.get(key)
+        if stats is None:
+            stats = self._groups[key] = RunningStats(self.relative_accuracy)
+        return stats
+
+def merge_aggregators(aggregators: Iterable[StreamingAggregator]) -> Optional[StreamingAggregator]:
+    """Combine partial aggregators into the first one, or None if there are none"""
+    merged = None
+    for aggregator in aggregators:
+        if merged is None:
+            merged = aggregator
+        else:
+            merged.merge(aggregator)
+    return merged
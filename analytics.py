@@ -0,0 +1,373 @@
+# analytics.py
+import asyncio
+import logging
+import secrets
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.stats import norm
+
+from models import TimeFrame
+from metrics import CACHE_LOOKUPS, timed_stage
+from data_processor import (
+    fetch_market_series, fetch_crypto_series, normalize_time_range,
+    get_timedelta_from_timeframe, data_cache, run_cpu_bound
+)
+from serializers import timestamp_strings
+
+logger = logging.getLogger("bavest-api")
+
+class AlignedReturns(NamedTuple):
+    """Log returns of several symbols on their shared timestamps"""
+    timestamps: np.ndarray  # (T,) datetime64[us], the close of each return's second bar
+    symbols: List[str]
+    returns: np.ndarray  # (T, N), one column per symbol
+
+def align_returns(series_by_symbol: Dict[str, Dict[str, np.ndarray]], symbols: List[str]) -> AlignedReturns:
+    """
+    Stack the close-to-close log returns of every symbol into a (time x symbols) matrix
+
+    Only timestamps every symbol has a bar for are kept, so each row compares
+    the same intervals. Series on the common bar grid are stacked directly.
+    """
+    stamps = [series_by_symbol[symbol]["timestamp"].astype("datetime64[us]") for symbol in symbols]
+    if all(len(values) == len(stamps[0]) for values in stamps) and all(
+        np.array_equal(values, stamps[0]) for values in stamps[1:]
+    ):
+        shared = stamps[0]
+        prices = np.column_stack([series_by_symbol[symbol]["close"] for symbol in symbols])
+    else:
+        values, counts = np.unique(np.concatenate(stamps), return_counts=True)
+        shared = values[counts == len(symbols)]
+        prices = np.empty((len(shared), len(symbols)))
+        for column, symbol in enumerate(symbols):
+            positions = np.searchsorted(stamps[column], shared)
+            prices[:, column] = series_by_symbol[symbol]["close"][positions]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(np.log(prices), axis=0)
+    returns.flags.writeable = False
+    return AlignedReturns(shared[1:], list(symbols), returns)
+
+def covariance_matrices(returns: np.ndarray, window: int, step: int = 1) -> np.ndarray:
+    """
+    Sample covariance matrices of consecutive windows of returns
+
+    Windows of `window` rows start every `step` rows; the result has shape
+    (windows, symbols, symbols). All windows are demeaned and multiplied in one
+    batched matmul.
+    """
+    windows = sliding_window_view(returns, window, axis=0)[::step]  # (K, N, window)
+    centered = windows - windows.mean(axis=2, keepdims=True)
+    return np.matmul(centered, centered.transpose(0, 2, 1)) / (window - 1)
+
+def correlation_from_covariance(covariance: np.ndarray) -> np.ndarray:
+    """Correlation matrices of a stack of covariance matrices; NaN where a symbol has no variance"""
+    deviations = np.sqrt(np.diagonal(covariance, axis1=-2, axis2=-1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = covariance / (deviations[..., :, None] * deviations[..., None, :])
+    # Rounding leaves the diagonal and perfectly (anti-)correlated pairs slightly off +-1;
+    # np.fill_diagonal only handles one matrix, so the stack's diagonals are indexed
+    diagonal = np.arange(correlation.shape[-1])
+    correlation[..., diagonal, diagonal] = np.where(deviations > 0, 1.0, np.nan)
+    return np.clip(correlation, -1.0, 1.0, out=correlation)
+
+async def fetch_aligned_returns(
+    kind: str,
+    symbols: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    timeframe: TimeFrame
+) -> AlignedReturns:
+    """
+    Aligned return matrix of the bars in [start_date, end_date]
+
+    Matrices are cached under the normalized range, with the TTL of the underlying series.
+    """
+    start_date, end_date, cache_ttl = normalize_time_range(start_date, end_date, timeframe)
+    cache_key = ("returns", kind, tuple(symbols), start_date.isoformat(), end_date.isoformat(), timeframe.value)
+    with timed_stage("cache"):
+        cached = data_cache.get(cache_key)
+    if cached is not None:
+        CACHE_LOOKUPS.labels("returns", "hit").inc()
+        return cached
+    CACHE_LOOKUPS.labels("returns", "miss").inc()
+
+    fetch_series = fetch_market_series if kind == "market" else fetch_crypto_series
+    series_by_symbol = await fetch_series(symbols, start_date, end_date, timeframe, limit=None)
+    with timed_stage("align"):
+        aligned = align_returns(series_by_symbol, symbols)
+    data_cache.set(cache_key, aligned, ttl=cache_ttl)
+    return aligned
+
+async def fetch_correlation(
+    symbols: List[str],
+    window: int,
+    timeframe: TimeFrame = TimeFrame.ONE_DAY,
+    kind: str = "market",
+    rolling: bool = False,
+    periods: int = 1,
+    step: int = 1,
+    end_date: Optional[datetime] = None,
+    max_values: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Correlation and covariance of log returns across symbols
+
+    Each matrix covers `window` returns of completed bars. Without rolling there
+    is one matrix for the latest window; with rolling there are `periods`
+    matrices whose windows end `step` bars apart, oldest first. Returns the
+    symbols, the end timestamp of each window and (windows, N, N) arrays.
+    max_values bounds the number of values in the matrices.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if len(symbols) < 2:
+        raise ValueError("At least two symbols are needed")
+    if window < 2:
+        raise ValueError("The window must span at least two returns")
+    periods = periods if rolling else 1
+    if max_values is not None and periods * len(symbols) ** 2 > max_values:
+        raise ValueError(
+            f"{periods} matrices of {len(symbols)} symbols exceed {max_values} values; "
+            "request fewer symbols or periods"
+        )
+
+    # The forming bar would add a partial return, so the range ends at the last completed bar;
+    # aligning it first keeps the range start on a boundary so all returns_needed + 1 bars fit
+    time_delta = get_timedelta_from_timeframe(timeframe)
+    end_date = end_date or datetime.utcnow()
+    end_date = normalize_time_range(end_date, end_date, timeframe)[1] - time_delta
+    returns_needed = window + (periods - 1) * step
+    aligned = await fetch_aligned_returns(
+        kind, symbols, end_date - returns_needed * time_delta, end_date, timeframe
+    )
+    available = len(aligned.timestamps)
+    if available < window:
+        raise ValueError(f"Only {available} aligned returns are available, the window needs {window}")
+
+    with timed_stage("correlation"):
+        # Keep the most recent windows that fit into the available returns
+        periods = min(periods, (available - window) // step + 1)
+        used = window + (periods - 1) * step
+        covariance = covariance_matrices(aligned.returns[available - used:], window, step)
+        correlation = correlation_from_covariance(covariance)
+    return {
+        "symbols": aligned.symbols,
+        "timestamps": aligned.timestamps[available - used + window - 1::step],
+        "correlation": correlation,
+        "covariance": covariance
+    }
+
+def sampling_factor(returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean and a factor F of the sample covariance of returns (F.T @ F == covariance)
+
+    With no more observations than symbols the demeaned returns themselves are
+    the factor, which is cheaper to sample through than an N x N one. Otherwise
+    it is the Cholesky factor, or an eigendecomposition for singular covariances.
+    """
+    mean = returns.mean(axis=0)
+    centered = (returns - mean) / np.sqrt(len(returns) - 1)
+    if len(returns) <= returns.shape[1]:
+        return mean, centered
+    covariance = centered.T @ centered
+    try:
+        return mean, np.linalg.cholesky(covariance).T
+    except np.linalg.LinAlgError:
+        values, vectors = np.linalg.eigh(covariance)
+        return mean, (vectors * np.sqrt(np.clip(values, 0.0, None))).T
+
+def simulation_chunks(paths: int, seed: int, chunk_paths: int) -> List[Tuple[np.random.SeedSequence, int]]:
+    """The stream and path count of every chunk of a simulation, each stream spawned from seed"""
+    chunk_paths = max(chunk_paths, 1)
+    streams = np.random.SeedSequence(seed).spawn(-(-paths // chunk_paths))
+    return [(stream, min(chunk_paths, paths - chunk * chunk_paths)) for chunk, stream in enumerate(streams)]
+
+def simulate_portfolio_chunk(
+    mean: np.ndarray,
+    factor: np.ndarray,
+    weights: np.ndarray,
+    stream: np.random.SeedSequence,
+    count: int,
+    out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Portfolio returns of count paths drawn from stream"""
+    draws = np.random.default_rng(stream).standard_normal((count, factor.shape[0]))
+    asset_returns = draws @ factor
+    asset_returns += mean
+    np.expm1(asset_returns, out=asset_returns)
+    return np.matmul(asset_returns, weights, out=out)
+
+def simulate_portfolio_returns(
+    mean: np.ndarray,
+    factor: np.ndarray,
+    weights: np.ndarray,
+    paths: int,
+    seed: int,
+    chunk_paths: int
+) -> np.ndarray:
+    """
+    Portfolio returns of `paths` Monte Carlo paths
+
+    Asset log returns are drawn as mean + z @ factor with z standard normal,
+    i.e. multivariate normal with covariance factor.T @ factor, and the
+    portfolio return is the weighted sum of the assets' simple returns. Paths
+    are drawn chunk_paths at a time to bound memory, each chunk from its own
+    stream spawned from seed, so the result depends on seed and chunk_paths
+    but not on whether the chunks are simulated one after another or in
+    parallel (simulate_portfolio_returns_parallel).
+    """
+    simulated = np.empty(paths)
+    start = 0
+    for stream, count in simulation_chunks(paths, seed, chunk_paths):
+        simulate_portfolio_chunk(mean, factor, weights, stream, count, out=simulated[start:start + count])
+        start += count
+    return simulated
+
+async def simulate_portfolio_returns_parallel(
+    mean: np.ndarray,
+    factor: np.ndarray,
+    weights: np.ndarray,
+    paths: int,
+    seed: int,
+    chunk_paths: int
+) -> np.ndarray:
+    """simulate_portfolio_returns with its chunks spread over the generation pool"""
+    parts = await asyncio.gather(*(
+        run_cpu_bound(simulate_portfolio_chunk, mean, factor, weights, stream, count)
+        for stream, count in simulation_chunks(paths, seed, chunk_paths)
+    ))
+    return np.concatenate(parts) if parts else np.empty(0)
+
+def value_at_risk(returns: np.ndarray, confidence: float) -> Tuple[float, float]:
+    """VaR and CVaR (expected shortfall) of a sample of returns, as positive loss fractions"""
+    threshold = np.quantile(returns, 1 - confidence)
+    return float(-threshold), float(-returns[returns <= threshold].mean())
+
+def parametric_value_at_risk(mean: float, deviation: float, confidence: float) -> Tuple[float, float]:
+    """VaR and CVaR of normally distributed returns, as positive loss fractions"""
+    z = norm.ppf(1 - confidence)
+    return float(-(mean + z * deviation)), float(-(mean - deviation * norm.pdf(z) / (1 - confidence)))
+
+def max_drawdown(equity: np.ndarray) -> Tuple[float, int, int]:
+    """Largest peak-to-trough decline of an equity curve, with the peak and trough positions"""
+    peaks = np.maximum.accumulate(equity)
+    drawdowns = 1 - equity / peaks
+    trough = int(np.argmax(drawdowns))
+    peak = int(np.argmax(equity[:trough + 1]))
+    return float(drawdowns[trough]), peak, trough
+
+async def fetch_portfolio_analytics(
+    holdings: Dict[str, float],
+    lookback: int = 252,
+    timeframe: TimeFrame = TimeFrame.ONE_DAY,
+    kind: str = "market",
+    confidence: float = 0.95,
+    horizon: int = 1,
+    risk_free_rate: float = 0.0,
+    simulations: int = 0,
+    seed: Optional[int] = None,
+    chunk_values: int = 2_000_000,
+    parallel: bool = False,
+    end_date: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Performance and risk of a portfolio over its last `lookback` completed bars
+
+    holdings maps symbols to weights, which are scaled to sum to 1; the
+    portfolio is rebalanced to them every bar. Returns and volatility are
+    annualized over calendar time. VaR and CVaR cover `horizon` bars and are
+    positive loss fractions: parametric (normal portfolio returns), historical
+    (overlapping horizons of the lookback) and, with simulations > 0, Monte
+    Carlo from multivariate normal asset log returns. chunk_values bounds the
+    random draws of one chunk of paths; with parallel the chunks are spread
+    over the generation pool, one in memory per worker, and give the same
+    result. The seed used is reported so a simulation can be repeated.
+    """
+    if not holdings:
+        raise ValueError("The portfolio has no holdings")
+    if lookback < 2:
+        raise ValueError("The lookback must span at least two returns")
+    if not 0 < confidence < 1:
+        raise ValueError("The confidence level must be between 0 and 1")
+    if horizon < 1:
+        raise ValueError("The horizon must be at least one bar")
+    symbols = list(holdings)
+    weights = np.array([holdings[symbol] for symbol in symbols], dtype=np.float64)
+    if not np.isfinite(weights).all() or weights.sum() == 0:
+        raise ValueError("Weights must be finite and must not sum to zero")
+    weights /= weights.sum()
+
+    # The forming bar would add a partial return, so the range ends at the last completed bar;
+    # aligning it first keeps the range start on a boundary so all returns_needed + 1 bars fit
+    time_delta = get_timedelta_from_timeframe(timeframe)
+    end_date = end_date or datetime.utcnow()
+    end_date = normalize_time_range(end_date, end_date, timeframe)[1] - time_delta
+    aligned = await fetch_aligned_returns(kind, symbols, end_date - lookback * time_delta, end_date, timeframe)
+    available = len(aligned.timestamps)
+    if available < 2:
+        raise ValueError(f"Only {available} aligned returns are available, at least 2 are needed")
+    log_returns = aligned.returns[-lookback:]
+    timestamps = aligned.timestamps[-lookback:]
+    if not np.isfinite(log_returns).all():
+        raise ValueError("Returns are undefined for symbols with non-positive prices")
+    periods_per_year = timedelta(days=365.25) / time_delta
+
+    with timed_stage("portfolio"):
+        returns = np.expm1(log_returns) @ weights
+        cumulative = np.concatenate(([0.0], np.cumsum(np.log1p(returns))))
+        equity = np.exp(cumulative)
+        total_return = equity[-1] - 1
+        mean, deviation = returns.mean(), returns.std(ddof=1)
+        risk_free = (1 + risk_free_rate) ** (1 / periods_per_year) - 1
+        drawdown, peak, trough = max_drawdown(equity)
+        # Equity point i is the close of return i - 1; point 0 is the bar before the first return
+        equity_timestamps = np.concatenate(([timestamps[0] - np.timedelta64(time_delta)], timestamps))
+
+        var, cvar = parametric_value_at_risk(horizon * mean, np.sqrt(horizon) * deviation, confidence)
+        risk = {
+            "confidence": confidence,
+            "horizon": horizon,
+            "parametric": {"var": var, "cvar": cvar}
+        }
+        if len(returns) >= horizon:
+            var, cvar = value_at_risk(np.expm1(cumulative[horizon:] - cumulative[:-horizon]), confidence)
+            risk["historical"] = {"var": var, "cvar": cvar, "samples": len(cumulative) - horizon}
+        else:
+            risk["historical"] = None
+
+    if simulations > 0:
+        seed = secrets.randbits(32) if seed is None else seed
+        asset_mean, factor = sampling_factor(log_returns)
+        chunk_paths = max(chunk_values // (factor.shape[0] + len(symbols)), 1)
+        with timed_stage("simulation"):
+            arguments = (horizon * asset_mean, np.sqrt(horizon) * factor, weights, simulations, seed, chunk_paths)
+            if parallel:
+                simulated = await simulate_portfolio_returns_parallel(*arguments)
+            else:
+                simulated = await run_cpu_bound(simulate_portfolio_returns, *arguments)
+            var, cvar = value_at_risk(simulated, confidence)
+        risk["monte_carlo"] = {"var": var, "cvar": cvar, "simulations": simulations, "seed": seed}
+    else:
+        risk["monte_carlo"] = None
+
+    start, peak_time, trough_time, end = timestamp_strings(equity_timestamps[[0, peak, trough, -1]])
+    return {
+        "holdings": [{"symbol": symbol, "weight": float(weight)} for symbol, weight in zip(symbols, weights)],
+        "timeframe": timeframe.value,
+        "observations": len(returns),
+        "start": start,
+        "end": end,
+        "total_return": float(total_return),
+        "annualized_return": float((1 + total_return) ** (periods_per_year / len(returns)) - 1),
+        "annualized_volatility": float(deviation * np.sqrt(periods_per_year)),
+        "sharpe_ratio": float((mean - risk_free) / deviation * np.sqrt(periods_per_year)) if deviation > 0 else None,
+        "max_drawdown": {
+            "drawdown": drawdown,
+            "peak": peak_time,
+            "trough": trough_time
+        },
+        "value_at_risk": risk
+    }
@@ -0,0 +1,7 @@
+# benchmarks/__init__.py
+"""
+Micro- and macro-benchmarks for the API
+
+Run with `python -m benchmarks` from the repository root; see
+`python -m benchmarks --help` for filtering, output and regression checks.
+"""
@@ -0,0 +1,86 @@
+# benchmarks/__main__.py
+import argparse
+import asyncio
+import fnmatch
+import json
+import logging
+import sys
+from typing import Any, Dict, List, Optional
+
+from config import get_settings
+
+def configure(simulated_latency: bool) -> None:
+    """
+    Make runs measure CPU work: no simulated upstream latency, no disk store
+    and no Redis unless explicitly kept
+    """
+    settings = get_settings()
+    if not simulated_latency:
+        settings.SIMULATED_FETCH_LATENCY_SECONDS = 0
+        settings.SIMULATED_SENTIMENT_LATENCY_SECONDS = 0
+    settings.STORE_ENABLED = False
+    settings.REDIS_ENABLED = False
+    logging.getLogger("bavest-api").setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Run the benchmark suite and optionally check it against a baseline"
+    )
+    parser.add_argument("-k", "--filter", action="append", default=[],
+                        help="Glob on benchmark names or groups (repeatable)")
+    parser.add_argument("--list", action="store_true", help="List benchmarks and exit")
+    parser.add_argument("--rounds", type=int, help="Override the number of timed rounds")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against results JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown of the median before a regression is reported (0.2 = 20%%)")
+    parser.add_argument("--simulated-latency", action="store_true",
+                        help="Keep the simulated upstream latency instead of measuring CPU only")
+    args = parser.parse_args(argv)
+
+    configure(args.simulated_latency)
+
+    # Benchmarks register themselves on import; import after configuring
+    from benchmarks import micro, macro, upstream  # noqa: F401
+    from benchmarks.harness import BENCHMARKS, compare_results, run_benchmarks
+
+    names = [
+        name for name, bench in BENCHMARKS.items()
+        if not args.filter or any(
+            fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(bench.group, pattern) or pattern in name
+            for pattern in args.filter
+        )
+    ]
+    if args.list:
+        for name in names:
+            print(f"{BENCHMARKS[name].group:14} {name}")
+        return 0
+
+    def progress(name: str, result: Dict[str, Any]) -> None:
+        line = f"{name:80} median {result['median'] * 1e3:10.3f} ms  p95 {result['p95'] * 1e3:10.3f} ms"
+        if "median_per_item" in result:
+            line += f"  {result['median_per_item'] * 1e6:8.3f} us/item"
+        print(line)
+
+    report = asyncio.run(run_benchmarks(names, args.rounds, progress))
+    report["simulated_latency"] = args.simulated_latency
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    rows = compare_results(baseline, report, args.threshold)
+    regressions = [row for row in rows if row["regression"]]
+    print(f"\nCompared {len(rows)} benchmarks against {args.baseline} (threshold {args.threshold:.0%})")
+    for row in rows:
+        marker = "REGRESSION" if row["regression"] else ""
+        print(f"{row['name']:80} {row['ratio']:6.2f}x {marker}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
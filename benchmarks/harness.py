@@ -0,0 +1,142 @@
+# benchmarks/harness.py
+import inspect
+import platform
+import statistics
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Registered benchmarks, in definition order
+BENCHMARKS: Dict[str, "Benchmark"] = {}
+
+class Benchmark:
+    """
+    A named, parameterless callable (sync or async) timed over several rounds
+
+    setup, when given, runs before every round outside the timed section, e.g.
+    to clear caches so each round measures the same work. items is the number
+    of rows (or other units) one round processes, to report a per-item cost.
+    teardown runs once after the last round, e.g. to close connections.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        group: str,
+        rounds: int = 10,
+        warmup: int = 1,
+        setup: Optional[Callable[[], Any]] = None,
+        items: Optional[int] = None,
+        teardown: Optional[Callable[[], Any]] = None
+    ):
+        self.name = name
+        self.func = func
+        self.group = group
+        self.rounds = rounds
+        self.warmup = warmup
+        self.setup = setup
+        self.items = items
+        self.teardown = teardown
+
+    async def run(self, rounds: Optional[int] = None) -> Dict[str, Any]:
+        """Time the benchmark and summarise the per-round durations in seconds"""
+        rounds = rounds or self.rounds
+        timings = []
+        try:
+            for round_number in range(self.warmup + rounds):
+                if self.setup is not None:
+                    await _call(self.setup)
+                started = time.perf_counter()
+                await _call(self.func)
+                elapsed = time.perf_counter() - started
+                if round_number >= self.warmup:
+                    timings.append(elapsed)
+        finally:
+            if self.teardown is not None:
+                await _call(self.teardown)
+        result = summarize(timings) | {"group": self.group}
+        if self.items:
+            result["items"] = self.items
+            result["median_per_item"] = result["median"] / self.items
+        return result
+
+def benchmark(
+    name: str,
+    group: str,
+    rounds: int = 10,
+    warmup: int = 1,
+    setup: Optional[Callable[[], Any]] = None,
+    items: Optional[int] = None,
+    teardown: Optional[Callable[[], Any]] = None
+) -> Callable[[Callable], Callable]:
+    """Register the decorated callable as a benchmark"""
+    def register(func: Callable) -> Callable:
+        if name in BENCHMARKS:
+            raise ValueError(f"Benchmark {name} is already registered")
+        BENCHMARKS[name] = Benchmark(name, func, group, rounds, warmup, setup, items, teardown)
+        return func
+    return register
+
+async def _call(func: Callable[[], Any]) -> Any:
+    result = func()
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+def summarize(timings: List[float]) -> Dict[str, Any]:
+    ordered = sorted(timings)
+    return {
+        "rounds": len(ordered),
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        "max": ordered[-1],
+        "ops_per_second": 1 / statistics.median(ordered) if statistics.median(ordered) > 0 else None
+    }
+
+async def run_benchmarks(
+    names: List[str],
+    rounds: Optional[int] = None,
+    progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """Run the named benchmarks in order and return a JSON-serialisable report"""
+    results = {}
+    for name in names:
+        results[name] = await BENCHMARKS[name].run(rounds)
+        if progress is not None:
+            progress(name, results[name])
+    return {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results
+    }
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float
+) -> List[Dict[str, Any]]:
+    """
+    Compare median timings of benchmarks present in both reports
+
+    Returns one row per shared benchmark; a row is a regression when the
+    current median exceeds the baseline median by more than threshold
+    (0.2 = 20%).
+    """
+    rows = []
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        ratio = result["median"] / previous["median"] if previous["median"] > 0 else float("inf")
+        rows.append({
+            "name": name,
+            "baseline": previous["median"],
+            "current": result["median"],
+            "ratio": ratio,
+            "regression": ratio > 1 + threshold
+        })
+    return rows
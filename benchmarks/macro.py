@@ -0,0 +1,71 @@
+# benchmarks/macro.py
+import httpx
+from starlette.testclient import TestClient
+
+from benchmarks.harness import benchmark
+from broadcaster import stream_hub
+from data_processor import data_cache
+from main import app
+
+_BASE_URL = "http://benchmark"
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url=_BASE_URL)
+
+def _register_market_data(symbols: int, days: int, timeframe: str, response_format: str) -> None:
+    query = {
+        "symbols": ["AAPL", "MSFT", "GOOGL", "AMZN", "META", "TSLA", "NVDA"][:symbols],
+        "data_source": "market",
+        "start_date": "2024-01-01T00:00:00",
+        "end_date": f"2024-01-{1 + days:02d}T00:00:00",
+        "timeframe": timeframe,
+        "limit": 100_000
+    }
+
+    @benchmark(
+        f"POST /market/data[symbols={symbols},days={days},timeframe={timeframe},format={response_format}]",
+        "endpoints",
+        setup=data_cache.clear
+    )
+    async def market_data():
+        async with _client() as client:
+            response = await client.post("/api/v1/market/data", params={"format": response_format}, json=query)
+            response.raise_for_status()
+
+    @benchmark(
+        f"POST /market/data cached[symbols={symbols},days={days},timeframe={timeframe},format={response_format}]",
+        "endpoints"
+    )
+    async def market_data_cached():
+        async with _client() as client:
+            response = await client.post("/api/v1/market/data", params={"format": response_format}, json=query)
+            response.raise_for_status()
+
+for _format in ("json", "columnar"):
+    _register_market_data(1, 7, "1m", _format)
+    _register_market_data(7, 30, "1h", _format)
+
+def _register_stocks(days: int, timeframe: str) -> None:
+    @benchmark(f"GET /stocks/{{symbol}}[days={days},timeframe={timeframe}]", "endpoints", setup=data_cache.clear)
+    async def stocks():
+        async with _client() as client:
+            response = await client.get("/api/v1/stocks/AAPL", params={"days": days, "timeframe": timeframe})
+            response.raise_for_status()
+
+_register_stocks(30, "1d")
+_register_stocks(7, "1m")
+
+def _register_stream(ticks: int) -> None:
+    @benchmark(f"WebSocket /stream/{{symbol}}[ticks={ticks}]", "endpoints", rounds=5)
+    def stream():
+        # httpx has no WebSocket support, so this drives the ASGI app through
+        # Starlette's test client; ticks are produced without waiting
+        previous_interval, stream_hub.tick_interval = stream_hub.tick_interval, 0
+        try:
+            with TestClient(app) as client, client.websocket_connect("/api/v1/stream/AAPL") as websocket:
+                for _ in range(ticks):
+                    websocket.receive_text()
+        finally:
+            stream_hub.tick_interval = previous_interval
+
+_register_stream(1_000)
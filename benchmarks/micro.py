@@ -0,0 +1,295 @@
+# benchmarks/micro.py
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+from pydantic import TypeAdapter
+
+from benchmarks.harness import benchmark
+from data_processor import (
+    STOCK_SYMBOLS, add_live_bars, data_cache, fetch_quotes, flush_series_store, intraday_store,
+    fetch_sentiment_data, fetch_sentiment_summary,
+    process_alternative_data, fetch_market_data, fetch_market_json, fetch_market_series,
+    stock_metadata, _generate_price_series, _stock_base_price
+)
+import data_processor
+from analytics import (
+    align_returns, correlation_from_covariance, covariance_matrices, fetch_correlation,
+    sampling_factor, simulate_portfolio_returns, simulate_portfolio_returns_parallel
+)
+from indicators import IndicatorState
+from series_store import SeriesStore
+from models import AlternativeDataBatch, AlternativeDataPoint, APIResponse, TimeFrame
+from serializers import STOCK_ROW_FIELDS, render_api_response, render_json_rows
+from ticks import FileReplaySource, TickPipeline, write_synthetic_ticks
+
+# Fixed reference time so every run generates the same bars
+_END = datetime(2024, 6, 28)
+
+def _register_generation(limit: int, symbol_count: int) -> None:
+    symbols = STOCK_SYMBOLS[:symbol_count]
+    time_delta = timedelta(minutes=1)
+    start = _END - limit * time_delta
+
+    @benchmark(f"generate_price_series[limit={limit},symbols={symbol_count}]", "generation")
+    def generate():
+        for symbol in symbols:
+            _generate_price_series(symbol, _stock_base_price(symbol), start, _END, time_delta, limit)
+
+for _limit in (100, 1_000, 10_000, 100_000):
+    _register_generation(_limit, 1)
+for _symbols in (3, 7):
+    _register_generation(10_000, _symbols)
+
+@benchmark("fetch_sentiment_data[days=365]", "sentiment", setup=data_cache.clear)
+async def sentiment_rows():
+    await fetch_sentiment_data("AAPL", _END - timedelta(days=365), _END)
+
+@benchmark("fetch_sentiment_summary[days=365]", "sentiment", setup=data_cache.clear)
+async def sentiment_summary():
+    await fetch_sentiment_summary("AAPL", _END - timedelta(days=365), _END)
+
+def _alternative_batch(points: int) -> AlternativeDataBatch:
+    rng = np.random.default_rng(0)
+    values = rng.normal(100, 15, points).tolist()
+    timestamps = [_END - timedelta(seconds=i) for i in range(points)]
+    return AlternativeDataBatch(
+        data_type="web_traffic",
+        source="vendor",
+        data_points=[
+            AlternativeDataPoint(data_type="web_traffic", source="vendor", timestamp=timestamp, value=value)
+            for timestamp, value in zip(timestamps, values)
+        ]
+    )
+
+def _register_alternative(points: int) -> None:
+    batch = _alternative_batch(points)
+
+    @benchmark(f"process_alternative_data[points={points}]", "alternative")
+    async def process():
+        await process_alternative_data(batch, "benchmark")
+
+    @benchmark(f"process_alternative_data_grouped[points={points}]", "alternative")
+    async def process_grouped():
+        await process_alternative_data(batch, "benchmark", group_by=("source",), bucket_seconds=3600)
+
+for _points in (1_000, 100_000):
+    _register_alternative(_points)
+
+def _register_serialization(rows: int) -> None:
+    state = {}
+
+    async def prepare():
+        if "response" not in state:
+            data = await fetch_market_data(
+                ["AAPL"], _END - rows * timedelta(minutes=1), _END, TimeFrame.ONE_MINUTE, limit=rows
+            )
+            state["response"] = APIResponse(success=True, message="benchmark", data=data, request_id="benchmark")
+
+    @benchmark(f"api_response_serialization[rows={rows}]", "serialization", setup=prepare)
+    def serialize():
+        state["response"].model_dump_json()
+
+for _rows in (1_000, 10_000):
+    _register_serialization(_rows)
+
+_api_response_adapter = TypeAdapter(APIResponse)
+
+def _register_json_response(rows: int) -> None:
+    # The same query every round: its series is served from the query cache,
+    # so rounds measure turning cached bars into response bytes
+    query = (["AAPL"], _END - rows * timedelta(minutes=1), _END, TimeFrame.ONE_MINUTE, rows)
+
+    @benchmark(f"json_response_models[rows={rows}]", "serialization", items=rows)
+    async def models():
+        # What response_model=APIResponse does: validate, dump in JSON mode, json.dumps
+        data = await fetch_market_data(*query)
+        response = APIResponse(success=True, message="benchmark", data=data, request_id="benchmark")
+        content = _api_response_adapter.dump_python(_api_response_adapter.validate_python(response), mode="json")
+        json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    @benchmark(f"json_response_fast[rows={rows}]", "serialization", items=rows)
+    async def fast():
+        series = (await fetch_market_series(*query))["AAPL"]
+        data = ("[" + render_json_rows(series, stock_metadata("AAPL"), STOCK_ROW_FIELDS) + "]").encode()
+        render_api_response(data, "benchmark", "benchmark")
+
+    @benchmark(f"json_response_fast_cached[rows={rows}]", "serialization", items=rows)
+    async def fast_cached():
+        _, data = await fetch_market_json(*query)
+        render_api_response(data, "benchmark", "benchmark")
+
+for _rows in (1_000, 10_000, 100_000):
+    _register_json_response(_rows)
+
+def _register_indicators(history: int, step: int, rounds: int = 50) -> None:
+    bars = _generate_price_series(
+        "AAPL", _stock_base_price("AAPL"), _END - (history + step * (rounds + 1)) * timedelta(minutes=1), _END,
+        timedelta(minutes=1), limit=None
+    )
+    head = {name: values[:history] for name, values in bars.items()}
+    state = {}
+
+    @benchmark(f"indicators_full[history={history}]", "indicators")
+    def full():
+        IndicatorState().extend(head)
+
+    def prepare():
+        if "indicators" not in state:
+            state["indicators"] = IndicatorState()
+            state["indicators"].extend(head)
+            state["position"] = history
+
+    @benchmark(f"indicators_incremental[history={history},step={step}]", "indicators", rounds=rounds, setup=prepare)
+    def incremental():
+        # Each round extends the same state by the next step bars
+        position = state["position"]
+        state["indicators"].extend({name: values[position:position + step] for name, values in bars.items()})
+        state["position"] = position + step
+
+_register_indicators(100_000, 10)
+
+def _register_ticks(ticks: int, symbol_count: int) -> None:
+    state = {}
+
+    def prepare():
+        if "path" not in state:
+            descriptor, state["path"] = tempfile.mkstemp(suffix=".csv")
+            os.close(descriptor)
+            write_synthetic_ticks(state["path"], ticks, symbol_count)
+
+    def remove():
+        os.remove(state.pop("path"))
+
+    @benchmark(
+        f"tick_rollup[ticks={ticks},symbols={symbol_count}]",
+        "ticks",
+        rounds=5,
+        setup=prepare,
+        teardown=remove,
+        items=ticks
+    )
+    async def rollup():
+        await TickPipeline().run(FileReplaySource(state["path"]), flush=True)
+
+    async def store_bars(symbol, lo, columns):
+        await add_live_bars("market", symbol, lo, columns)
+
+    @benchmark(
+        f"tick_pipeline[ticks={ticks},symbols={symbol_count}]",
+        "ticks",
+        rounds=5,
+        setup=prepare,
+        teardown=remove,
+        items=ticks
+    )
+    async def pipeline():
+        # Completed bars also go into the local segments, as in the server
+        await TickPipeline(bar_sink=store_bars).run(FileReplaySource(state["path"]), flush=True)
+
+_register_ticks(200_000, 500)
+
+def _register_intraday(hours: int, symbol_count: int) -> None:
+    symbols = STOCK_SYMBOLS[:symbol_count]
+
+    async def query():
+        now = datetime.utcnow()
+        await fetch_market_series(symbols, now - timedelta(hours=hours), now, TimeFrame.ONE_MINUTE, limit=None)
+
+    def clear_all():
+        data_cache.clear()
+        intraday_store.clear()
+
+    @benchmark(f"recent_bars_segments[hours={hours},symbols={symbol_count}]", "intraday", setup=clear_all)
+    async def segments():
+        # Segments stay cached across rounds; the query and intraday caches do not
+        await query()
+
+    @benchmark(f"recent_bars_intraday[hours={hours},symbols={symbol_count}]", "intraday", setup=data_cache.clear)
+    async def intraday():
+        await query()
+
+_register_intraday(4, 10)
+
+def _register_quotes(symbol_count: int) -> None:
+    symbols = [f"{STOCK_SYMBOLS[i % len(STOCK_SYMBOLS)]}{i}" for i in range(symbol_count)]
+
+    @benchmark(f"quotes[symbols={symbol_count}]", "intraday", items=symbol_count)
+    async def quotes():
+        await fetch_quotes("market", symbols)
+
+_register_quotes(500)
+
+def _register_correlation(symbol_count: int, bars: int, window: int, periods: int) -> None:
+    rng = np.random.default_rng(0)
+    timestamps = np.datetime64("2024-01-01", "us") + np.arange(bars) * np.timedelta64(1, "h")
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (bars, symbol_count)), axis=0))
+    symbols = [f"S{i:04d}" for i in range(symbol_count)]
+    series = {symbol: {"timestamp": timestamps, "close": closes[:, i]} for i, symbol in enumerate(symbols)}
+    returns = align_returns(series, symbols).returns
+
+    @benchmark(f"align_returns[symbols={symbol_count},bars={bars}]", "analytics")
+    def align():
+        align_returns(series, symbols)
+
+    @benchmark(f"correlation_matrix[symbols={symbol_count},window={window}]", "analytics")
+    def full():
+        correlation_from_covariance(covariance_matrices(returns[-window:], window))
+
+    @benchmark(f"correlation_rolling[symbols={symbol_count},window={window},periods={periods}]", "analytics")
+    def rolling():
+        used = window + periods - 1
+        correlation_from_covariance(covariance_matrices(returns[-used:], window))
+
+_register_correlation(500, 500, 60, 20)
+
+def _register_correlation_cold(symbol_count: int, window: int) -> None:
+    symbols = [f"S{i:04d}" for i in range(symbol_count)]
+    original = data_processor.series_store
+    state = {}
+
+    async def cold():
+        # Every round starts without cached bars and with an empty series store
+        await flush_series_store()
+        data_cache.clear()
+        intraday_store.clear()
+        if "directory" in state:
+            state["directory"].cleanup()
+        state["directory"] = tempfile.TemporaryDirectory()
+        data_processor.series_store = SeriesStore(state["directory"].name)
+
+    async def restore():
+        await flush_series_store()
+        data_processor.series_store = original
+        state.pop("directory").cleanup()
+
+    @benchmark(
+        f"correlation_cold[symbols={symbol_count},window={window}]",
+        "analytics", rounds=5, items=symbol_count, setup=cold, teardown=restore
+    )
+    async def correlation():
+        await fetch_correlation(symbols, window, end_date=_END)
+
+_register_correlation_cold(500, 60)
+
+def _register_monte_carlo(asset_count: int, observations: int, paths: int, chunk_values: int) -> None:
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0.0005, 0.01, (observations, asset_count))
+    mean, factor = sampling_factor(returns)
+    weights = np.full(asset_count, 1 / asset_count)
+    chunk_paths = chunk_values // (factor.shape[0] + asset_count)
+
+    # Per item is per path; paths per second is its inverse
+    @benchmark(f"monte_carlo_var[assets={asset_count},paths={paths}]", "analytics", rounds=5, items=paths)
+    def simulate():
+        simulate_portfolio_returns(mean, factor, weights, paths, 0, chunk_paths)
+
+    # The same paths with chunks spread over the generation pool (GENERATION_EXECUTOR, GENERATION_WORKERS)
+    @benchmark(f"monte_carlo_var_parallel[assets={asset_count},paths={paths}]", "analytics", rounds=5, items=paths)
+    async def simulate_parallel():
+        await simulate_portfolio_returns_parallel(mean, factor, weights, paths, 0, chunk_paths)
+
+_register_monte_carlo(50, 252, 1_000_000, 2_000_000)
+_register_monte_carlo(500, 252, 100_000, 2_000_000)
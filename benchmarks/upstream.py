@@ -0,0 +1,137 @@
+# benchmarks/upstream.py
+import argparse
+import asyncio
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import numpy as np
+from aiohttp import web
+
+from benchmarks.harness import benchmark
+from data_processor import STOCK_SYMBOLS, _bar_index, _generate_crypto_bars, _generate_stock_bars
+from providers import CircuitBreaker, HTTPProvider
+
+_GENERATORS = {"market": _generate_stock_bars, "crypto": _generate_crypto_bars}
+
+def create_upstream_app(latency: float = 0.02, failure_rate: float = 0.0) -> web.Application:
+    """
+    Stand-in for the upstream bar API that HTTPProvider speaks
+
+    Every call waits `latency` seconds and fails with 503 at `failure_rate`;
+    bars are the mock generator's, so results can be compared with the mock provider.
+    """
+    stats = {"requests": 0, "failed": 0, "in_flight": 0, "max_in_flight": 0}
+    # Generated series by (kind, symbol, lo, hi), so the stand-in spends little CPU per call
+    generated: Dict[Any, Dict[str, list]] = {}
+
+    async def bars(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            payload = await request.json()
+            await asyncio.sleep(latency)
+            if random.random() < failure_rate:
+                stats["failed"] += 1
+                return web.json_response({"error": "injected failure"}, status=503)
+
+            step = payload["interval_seconds"] * 1000
+            lo, hi = payload["start"] // step, payload["end"] // step
+            generate = _GENERATORS[payload["kind"]]
+            data = {}
+            for symbol in payload["symbols"]:
+                key = (payload["kind"], symbol, lo, hi)
+                if key not in generated:
+                    columns = generate(symbol, timedelta(milliseconds=step), lo, hi)
+                    series = {"timestamp": (columns.pop("timestamp").astype(np.int64) // 1000).tolist()}
+                    series.update({name: values.tolist() for name, values in columns.items()})
+                    generated[key] = series
+                data[symbol] = generated[key]
+            return web.json_response({"data": data})
+        finally:
+            stats["in_flight"] -= 1
+
+    app = web.Application()
+    app.router.add_post("/bars", bars)
+    app["stats"] = stats
+    return app
+
+class StandInUpstream:
+    """The stand-in upstream served on a free local port"""
+
+    def __init__(self, latency: float = 0.02, failure_rate: float = 0.0):
+        self.app = create_upstream_app(latency, failure_rate)
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return self.app["stats"]
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+def _register_pool(pool_size: int, symbol_count: int, batch_size: int, latency: float = 0.02) -> None:
+    # One past trading day of 1m bars per symbol; symbols get a suffix to reach the count
+    symbols = [f"{STOCK_SYMBOLS[i % len(STOCK_SYMBOLS)]}{i}" for i in range(symbol_count)]
+    time_delta = timedelta(minutes=1)
+    lo = _bar_index(datetime(2024, 6, 3, 13, 30), time_delta)
+    requests = [(symbol, lo, lo + 390) for symbol in symbols]
+    state = {}
+
+    async def start():
+        if "provider" not in state:
+            state["upstream"] = StandInUpstream(latency)
+            state["provider"] = HTTPProvider(
+                await state["upstream"].start(),
+                pool_size=pool_size,
+                per_host_limit=pool_size,
+                batch_size=batch_size,
+                breaker=CircuitBreaker(failure_threshold=10)
+            )
+
+    async def stop():
+        await state["provider"].close()
+        await state["upstream"].stop()
+
+    @benchmark(
+        f"upstream_fetch[pool={pool_size},symbols={symbol_count},batch={batch_size}]",
+        "upstream",
+        setup=start,
+        teardown=stop,
+        items=symbol_count
+    )
+    async def fetch():
+        await state["provider"].fetch_bars("market", time_delta, requests)
+
+# Unbatched calls: throughput follows the pool size until it covers every call
+for _pool in (1, 4, 16, 64):
+    _register_pool(_pool, 64, batch_size=1)
+_register_pool(4, 64, batch_size=16)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.upstream",
+        description="Serve the stand-in upstream bar API, e.g. for MARKET_DATA_SOURCE=api"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds every call waits")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of calls answered with 503")
+    args = parser.parse_args()
+    web.run_app(create_upstream_app(args.latency, args.failure_rate), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
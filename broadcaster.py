@@ -0,0 +1,162 @@
+# broadcaster.py
+import asyncio
+import json
+import logging
+from collections import deque
+from typing import Any, Dict, List, Optional, Set
+
+from config import get_settings
+from data_processor import get_streaming_data
+
+logger = logging.getLogger("bavest-api")
+
+DROP_OLDEST = "drop_oldest"
+CONFLATE = "conflate"
+
+class Subscription:
+    """
+    Bounded per-client mailbox of encoded ticks
+    
+    Publishing never blocks the producer. When the client falls behind, the
+    "drop_oldest" policy discards the oldest queued tick and "conflate" keeps only
+    the latest tick per symbol.
+    """
+    
+    def __init__(self, max_queue: int = 100, policy: str = DROP_OLDEST):
+        self.policy = policy
+        self.symbols: Set[str] = set()
+        self.dropped = 0
+        self._queue: deque = deque(maxlen=max(max_queue, 1))
+        self._latest: Dict[str, str] = {}
+        self._ready = asyncio.Event()
+    
+    def publish(self, symbol: str, message: str) -> None:
+        """Queue an encoded tick for this client without waiting"""
+        if self.policy == CONFLATE:
+            if symbol in self._latest:
+                self.dropped += 1
+                del self._latest[symbol]  # Re-insert so the symbol moves to the back
+            self._latest[symbol] = message
+        else:
+            if len(self._queue) == self._queue.maxlen:
+                self.dropped += 1
+            self._queue.append(message)
+        self._ready.set()
+    
+    async def get(self) -> str:
+        """Wait for the next encoded tick"""
+        while not self._queue and not self._latest:
+            self._ready.clear()
+            await self._ready.wait()
+        if self._queue:
+            return self._queue.popleft()
+        symbol = next(iter(self._latest))
+        return self._latest.pop(symbol)
+    
+    @property
+    def pending(self) -> int:
+        return len(self._queue) + len(self._latest)
+
+class StreamHub:
+    """
+    One tick producer per symbol, fanned out to every subscribed client
+    
+    A producer starts with its first subscriber and stops with its last one.
+    Each tick is JSON-encoded once and handed to the subscribers' mailboxes.
+    Once an external feed is attached it publishes the ticks instead and no
+    producers are started.
+    """
+    
+    def __init__(self, tick_interval: float = 1.0, max_queue: int = 100, policy: str = DROP_OLDEST):
+        self.tick_interval = tick_interval
+        self.max_queue = max_queue
+        self.policy = policy
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._producers: Dict[str, asyncio.Task] = {}
+        self.external_feed = False
+        self.ticks_published = 0
+    
+    def create_subscription(self) -> Subscription:
+        return Subscription(self.max_queue, self.policy)
+    
+    def subscribe(self, subscription: Subscription, symbols: List[str]) -> List[str]:
+        """Subscribe a client to symbols, starting producers as needed"""
+        added = []
+        for symbol in symbols:
+            if symbol in subscription.symbols:
+                continue
+            subscription.symbols.add(symbol)
+            self._subscribers.setdefault(symbol, set()).add(subscription)
+            if symbol not in self._producers and not self.external_feed:
+                self._producers[symbol] = asyncio.ensure_future(self._produce(symbol))
+            added.append(symbol)
+        return added
+    
+    def unsubscribe(self, subscription: Subscription, symbols: Optional[List[str]] = None) -> List[str]:
+        """Unsubscribe a client from symbols (all of them by default), stopping idle producers"""
+        removed = []
+        for symbol in list(subscription.symbols if symbols is None else symbols):
+            if symbol not in subscription.symbols:
+                continue
+            subscription.symbols.discard(symbol)
+            subscribers = self._subscribers.get(symbol)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[symbol]
+                    producer = self._producers.pop(symbol, None)
+                    if producer is not None:
+                        producer.cancel()
+            removed.append(symbol)
+        return removed
+    
+    def attach_feed(self) -> None:
+        """Take ticks from publish() from now on, stopping the simulated producers"""
+        self.external_feed = True
+        for producer in self._producers.values():
+            producer.cancel()
+        self._producers.clear()
+    
+    def has_subscribers(self, symbol: str) -> bool:
+        return symbol in self._subscribers
+    
+    def publish(self, symbol: str, data_point: Dict[str, Any]) -> None:
+        """Encode a tick once and hand it to the symbol's subscribers"""
+        subscribers = self._subscribers.get(symbol)
+        if not subscribers:
+            return
+        message = json.dumps(data_point)
+        for subscription in list(subscribers):
+            subscription.publish(symbol, message)
+        self.ticks_published += 1
+    
+    async def close(self) -> None:
+        """Stop every producer"""
+        producers = list(self._producers.values())
+        self._producers.clear()
+        self._subscribers.clear()
+        for producer in producers:
+            producer.cancel()
+        await asyncio.gather(*producers, return_exceptions=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        subscriptions = {sub for subs in self._subscribers.values() for sub in subs}
+        return {
+            "symbols": len(self._subscribers),
+            "external_feed": self.external_feed,
+            "subscriptions": len(subscriptions),
+            "ticks_published": self.ticks_published,
+            "dropped": sum(sub.dropped for sub in subscriptions),
+            "pending": sum(sub.pending for sub in subscriptions)
+        }
+    
+    async def _produce(self, symbol: str) -> None:
+        async for data_point in get_streaming_data(symbol, interval=self.tick_interval):
+            self.publish(symbol, data_point)
+
+_settings = get_settings()
+stream_hub = StreamHub(
+    tick_interval=_settings.STREAM_TICK_INTERVAL_SECONDS,
+    max_queue=_settings.STREAM_CLIENT_QUEUE_SIZE,
+    policy=_settings.STREAM_SLOW_CONSUMER_POLICY
+)
@@ -0,0 +1,453 @@
+# cache.py
+import asyncio
+import json
+import logging
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+logger = logging.getLogger("bavest-api")
+
+T = TypeVar("T")
+
+def estimate_size(value: Any) -> int:
+    """
+    Approximate the memory footprint of a cached value in bytes
+    
+    NumPy arrays report their buffer size; containers and plain objects are
+    walked recursively so that lists of models are accounted for as well.
+    A view is charged the whole array it keeps alive (e.g. the block a slice
+    was cut from, or the mapped file of a store column), once per value.
+    """
+    return _estimate_size(value, set())
+
+def _estimate_size(value: Any, owners: set) -> int:
+    if isinstance(value, np.ndarray):
+        owner = value
+        while isinstance(owner.base, np.ndarray):
+            owner = owner.base
+        if id(owner) in owners:
+            return sys.getsizeof(value)
+        owners.add(id(owner))
+        return owner.nbytes + sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            _estimate_size(k, owners) + _estimate_size(v, owners) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(_estimate_size(item, owners) for item in value)
+    if hasattr(value, "__dict__"):
+        return sys.getsizeof(value) + _estimate_size(vars(value), owners)
+    return sys.getsizeof(value)
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with per-entry expiry and a memory budget
+    
+    Entries are evicted least-recently-used first whenever either the entry
+    count or the estimated byte size exceeds its limit. A limit of 0 disables it.
+    """
+    
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 0, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at, _ = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key, expiring after ttl seconds (defaults to the cache TTL)"""
+        size = estimate_size(value)
+        expires_at = time.monotonic() + (self.ttl_seconds if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes and size > self.max_bytes:
+                # Never admit a value that alone exceeds the whole budget
+                self.evictions += 1
+                return
+            self._entries[key] = (value, expires_at, size)
+            self._bytes += size
+            self._evict()
+    
+    def delete(self, key: Hashable) -> bool:
+        """Remove key from the cache, returning whether it was present"""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            return True
+    
+    def clear(self) -> int:
+        """Drop every entry and return how many were removed"""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            return count
+    
+    def purge_expired(self) -> int:
+        """Drop all expired entries and return how many were removed"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (_, expires_at, _) in self._entries.items() if expires_at <= now]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+            return len(expired)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of cache occupancy and counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+    
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] > time.monotonic()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _remove(self, key: Hashable) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+    
+    def _evict(self) -> None:
+        while self._entries and (
+            (self.max_entries and len(self._entries) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+def concat_columns(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Concatenate consecutive column-array chunks that share the same columns"""
+    if len(parts) == 1:
+        return parts[0]
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+def _column_length(columns: Dict[str, np.ndarray]) -> int:
+    return len(next(iter(columns.values()))) if columns else 0
+
+class SegmentCache:
+    """
+    Range-aware cache of contiguous bar segments per series
+    
+    A series (e.g. one symbol at one timeframe) is addressed by integer bar
+    indices. Each series holds a sorted list of non-overlapping segments
+    `(first_index, columns)`; lookups report which sub-ranges are cached and which
+    are missing, and inserts merge adjacent or overlapping segments. Segment lists
+    live in a TTLCache so they share its memory budget and LRU eviction.
+    """
+    
+    def __init__(self, store: TTLCache, namespace: str = "segments"):
+        self.store = store
+        self.namespace = namespace
+        self._lock = threading.RLock()
+        self.bars_reused = 0
+        self.bars_missing = 0
+    
+    def lookup(
+        self,
+        key: Hashable,
+        lo: int,
+        hi: int
+    ) -> List[Tuple[int, int, Optional[Dict[str, np.ndarray]]]]:
+        """
+        Split the index range [lo, hi) into cached and missing pieces
+        
+        Returns `(piece_lo, piece_hi, columns)` tuples in index order; `columns`
+        is a zero-copy slice of the cached segment, or None for a gap.
+        """
+        pieces = []
+        cursor = lo
+        for seg_lo, columns in self.store.get((self.namespace, key)) or []:
+            seg_hi = seg_lo + _column_length(columns)
+            if seg_hi <= cursor:
+                continue
+            if seg_lo >= hi:
+                break
+            if seg_lo > cursor:
+                pieces.append((cursor, seg_lo, None))
+                cursor = seg_lo
+            piece_hi = min(hi, seg_hi)
+            window = slice(cursor - seg_lo, piece_hi - seg_lo)
+            pieces.append((cursor, piece_hi, {name: values[window] for name, values in columns.items()}))
+            cursor = piece_hi
+        if cursor < hi:
+            pieces.append((cursor, hi, None))
+        
+        with self._lock:
+            for piece_lo, piece_hi, columns in pieces:
+                if columns is None:
+                    self.bars_missing += piece_hi - piece_lo
+                else:
+                    self.bars_reused += piece_hi - piece_lo
+        return pieces
+    
+    def insert(self, key: Hashable, lo: int, columns: Dict[str, np.ndarray], replace: bool = False) -> None:
+        """
+        Add the segment starting at bar index lo, merging it with its neighbours
+
+        Where segments overlap the cached bars are kept, unless replace is set.
+        """
+        length = _column_length(columns)
+        if length == 0:
+            return
+        with self._lock:
+            existing = list(self.store.get((self.namespace, key)) or [])
+            if replace:
+                existing = _cut_segments(existing, lo, lo + length)
+            segments = sorted(existing + [(lo, columns)], key=lambda segment: segment[0])
+            merged = [segments[0]]
+            for seg_lo, seg_columns in segments[1:]:
+                last_lo, last_columns = merged[-1]
+                last_hi = last_lo + _column_length(last_columns)
+                if seg_lo > last_hi:
+                    merged.append((seg_lo, seg_columns))
+                    continue
+                # Overlapping or adjacent: keep what is cached and append the tail
+                overlap = last_hi - seg_lo
+                if overlap < _column_length(seg_columns):
+                    tail = {name: values[overlap:] for name, values in seg_columns.items()}
+                    merged[-1] = (last_lo, concat_columns([last_columns, tail]))
+            self.store.set((self.namespace, key), merged)
+    
+    def invalidate(self, key: Hashable) -> bool:
+        """Forget every segment of a series"""
+        return self.store.delete((self.namespace, key))
+    
+    def stats(self) -> Dict[str, Any]:
+        """Bars served from cached segments versus bars that had to be produced"""
+        with self._lock:
+            total = self.bars_reused + self.bars_missing
+            return {
+                "bars_reused": self.bars_reused,
+                "bars_missing": self.bars_missing,
+                "reuse_ratio": self.bars_reused / total if total else 0.0
+            }
+
+def _cut_segments(
+    segments: List[Tuple[int, Dict[str, np.ndarray]]],
+    lo: int,
+    hi: int
+) -> List[Tuple[int, Dict[str, np.ndarray]]]:
+    """Segments without the bars in [lo, hi)"""
+    kept = []
+    for seg_lo, seg_columns in segments:
+        seg_hi = seg_lo + _column_length(seg_columns)
+        if seg_hi <= lo or seg_lo >= hi:
+            kept.append((seg_lo, seg_columns))
+            continue
+        if seg_lo < lo:
+            kept.append((seg_lo, {name: values[:lo - seg_lo] for name, values in seg_columns.items()}))
+        if seg_hi > hi:
+            kept.append((hi, {name: values[hi - seg_lo:] for name, values in seg_columns.items()}))
+    return kept
+
+def encode_columns(columns: Dict[str, np.ndarray]) -> bytes:
+    """
+    Pack column arrays into a compact binary blob
+    
+    Layout: little-endian uint32 header length, a JSON header listing
+    (name, dtype, length) per column, then the raw array buffers in order.
+    """
+    arrays = [np.ascontiguousarray(values) for values in columns.values()]
+    header = json.dumps(
+        [[name, values.dtype.str, len(values)] for name, values in zip(columns, arrays)]
+    ).encode()
+    return b"".join([struct.pack("<I", len(header)), header] + [values.tobytes() for values in arrays])
+
+def decode_columns(blob: bytes) -> Dict[str, np.ndarray]:
+    """Unpack a blob produced by encode_columns into (read-only) column arrays"""
+    (header_length,) = struct.unpack_from("<I", blob)
+    offset = 4 + header_length
+    columns = {}
+    for name, dtype, length in json.loads(blob[4:offset]):
+        dtype = np.dtype(dtype)
+        columns[name] = np.frombuffer(blob, dtype=dtype, count=length, offset=offset)
+        offset += dtype.itemsize * length
+    return columns
+
+def create_redis_client(host: str, port: int, password: Optional[str] = None, timeout: float = 0.5):
+    """
+    Create an asyncio Redis client, or return None when the redis package is missing
+    
+    Connections are made lazily, so an unreachable server only surfaces on first use.
+    """
+    try:
+        import redis.asyncio as redis_asyncio
+    except ImportError:
+        logger.warning("redis package not installed, shared cache disabled")
+        return None
+    return redis_asyncio.Redis(
+        host=host,
+        port=port,
+        password=password,
+        socket_timeout=timeout,
+        socket_connect_timeout=timeout
+    )
+
+class RedisCache:
+    """
+    Shared L2 cache of column arrays in Redis
+    
+    Values are stored with encode_columns and read with a single MGET per batch of
+    keys; writes are pipelined SETs with expiry. Any client exposing the asyncio
+    redis `mget`/`pipeline` API works, so tests can pass an in-memory stand-in.
+    When the server cannot be reached the cache reports misses and stays
+    disabled for retry_interval seconds, leaving callers on their L1 cache.
+    """
+    
+    def __init__(
+        self,
+        client=None,
+        namespace: str = "bavest",
+        ttl_seconds: float = 3600,
+        retry_interval: float = 30.0
+    ):
+        self.client = client
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.retry_interval = retry_interval
+        self._retry_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+    
+    @property
+    def available(self) -> bool:
+        return self.client is not None and time.monotonic() >= self._retry_at
+    
+    async def get_many(self, keys: List[str]) -> Dict[str, Dict[str, np.ndarray]]:
+        """Fetch the cached columns for keys in one round trip; missing keys are omitted"""
+        if not keys or not self.available:
+            self.misses += len(keys)
+            return {}
+        try:
+            blobs = await self.client.mget([self._key(key) for key in keys])
+        except Exception as e:
+            self._mark_unavailable(e)
+            self.misses += len(keys)
+            return {}
+        
+        found = {key: decode_columns(blob) for key, blob in zip(keys, blobs) if blob is not None}
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+    
+    async def set_many(self, items: Dict[str, Dict[str, np.ndarray]], ttl: Optional[float] = None) -> None:
+        """Store columns for several keys in one pipelined round trip"""
+        if not items or not self.available:
+            return
+        expiry = max(int(self.ttl_seconds if ttl is None else ttl), 1)
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for key, columns in items.items():
+                pipe.set(self._key(key), encode_columns(columns), ex=expiry)
+            await pipe.execute()
+        except Exception as e:
+            self._mark_unavailable(e)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of L2 counters and availability"""
+        return {
+            "enabled": self.client is not None,
+            "available": self.available,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors
+        }
+    
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+    
+    def _mark_unavailable(self, error: Exception) -> None:
+        self.errors += 1
+        self._retry_at = time.monotonic() + self.retry_interval
+        logger.warning(f"Redis cache unavailable, using local cache only: {str(error)}")
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into one in-flight task
+    
+    The first caller for a key starts the work as a task; callers arriving while
+    it runs await the same task. Its result or exception is delivered to every
+    waiter. Each waiter awaits through asyncio.shield, so cancelling one waiter
+    never cancels the shared work for the others.
+    """
+    
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Task"] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.failures = 0
+    
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """Await factory() for key, joining an identical call that is already running"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Number of loads started, callers that joined one, and failed loads"""
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "failures": self.failures
+        }
+    
+    def _finish(self, key: Hashable, task: "asyncio.Task") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Retrieve the exception so it is not reported as unhandled when every waiter left
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
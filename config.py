@@ -1,10 +1,13 @@
 # config.py
 import os
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import Field, field_validator
 from typing import List, Optional
 from functools import lru_cache
 
+# Sources create_provider has a provider for
+MARKET_DATA_SOURCES = ("mock", "api")
+
 class Settings(BaseSettings):
     """Application configuration settings"""
     # API Configuration
@@ -29,20 +32,106 @@ class Settings(BaseSettings):
     REDIS_HOST: str = Field(default="localhost")
     REDIS_PORT: int = Field(default=6379)
     REDIS_PASSWORD: Optional[str] = Field(default=None)
+    REDIS_ENABLED: bool = Field(default=False)
+    REDIS_TIMEOUT_SECONDS: float = Field(default=0.5)
+    REDIS_KEY_PREFIX: str = Field(default="bavest")
     
     # Cache Configuration
     CACHE_EXPIRATION_SECONDS: int = Field(default=3600)  # 1 hour
+    CACHE_MAX_ENTRIES: int = Field(default=1024)  # 0 disables the entry limit
+    CACHE_MAX_BYTES: int = Field(default=256 * 1024 * 1024)  # 0 disables the size limit
+    CACHE_RENDERED_JSON: bool = Field(default=True)  # Also cache encoded JSON rows of query results
     
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = Field(default=100)
     
     # Data Source Configuration
-    MARKET_DATA_SOURCE: str = Field(default="mock")  # Options: mock, aws, gcp, api
+    MARKET_DATA_SOURCE: str = Field(default="mock")  # Options: mock, api
     ALTERNATIVE_DATA_SOURCE: str = Field(default="mock")
     
+    # Upstream HTTP API Configuration (MARKET_DATA_SOURCE=api)
+    UPSTREAM_BASE_URL: str = Field(default="http://localhost:9000")
+    UPSTREAM_API_KEY: Optional[str] = Field(default=None)
+    UPSTREAM_POOL_SIZE: int = Field(default=100)  # Keep-alive connections across all hosts
+    UPSTREAM_PER_HOST_LIMIT: int = Field(default=20)  # Concurrent connections per host
+    UPSTREAM_BATCH_SIZE: int = Field(default=50)  # Symbols per upstream call
+    UPSTREAM_TIMEOUT_SECONDS: float = Field(default=10.0)
+    UPSTREAM_RETRIES: int = Field(default=3)
+    UPSTREAM_BACKOFF_SECONDS: float = Field(default=0.2)  # Base of the jittered exponential backoff
+    UPSTREAM_BREAKER_THRESHOLD: int = Field(default=5)  # Consecutive failures that open the circuit
+    UPSTREAM_BREAKER_RESET_SECONDS: float = Field(default=30.0)
+    
+    # Data Generation Configuration
+    GENERATION_EXECUTOR: str = Field(default="thread")  # Options: thread, process, inline
+    GENERATION_WORKERS: int = Field(default=4)
+    FETCH_CONCURRENCY: int = Field(default=8)  # Concurrent per-symbol generation jobs
+    RESAMPLE_BASE_TIMEFRAME: str = Field(default="1m")  # Forming bars and intraday views of coarser timeframes are aggregated from it
+    RESAMPLE_MAX_BASE_BARS: int = Field(default=500_000)  # Most bars a query may assemble across its symbols
+    SIMULATED_FETCH_LATENCY_SECONDS: float = Field(default=0.5)  # Mock upstream latency for market data
+    SIMULATED_SENTIMENT_LATENCY_SECONDS: float = Field(default=0.3)  # Mock upstream latency for sentiment
+    
+    # Intraday Store Configuration
+    INTRADAY_ENABLED: bool = Field(default=True)
+    INTRADAY_CAPACITY_BARS: int = Field(default=480)  # Most recent base timeframe bars kept per symbol
+    INTRADAY_MAX_SYMBOLS: int = Field(default=2000)  # Least recently used series beyond this are dropped
+    QUOTES_MAX_SYMBOLS: int = Field(default=1000)  # Symbols accepted by one /quotes call
+    
+    # Analytics Configuration
+    ANALYTICS_MAX_SYMBOLS: int = Field(default=1000)
+    ANALYTICS_MAX_MATRIX_VALUES: int = Field(default=5_000_000)  # Values across all returned matrices
+    PORTFOLIO_MAX_SIMULATIONS: int = Field(default=1_000_000)  # Monte Carlo paths accepted per request
+    PORTFOLIO_SIMULATION_CHUNK_VALUES: int = Field(default=2_000_000)  # Random draws of one chunk of paths
+    PORTFOLIO_SIMULATION_PARALLEL: bool = Field(default=False)  # Spread the chunks over the generation pool
+    
+    # Series Store Configuration
+    STORE_ENABLED: bool = Field(default=True)
+    STORE_DIR: str = Field(default="data/series")
+    STORE_MAX_FILL_BARS: int = Field(default=100_000)  # Larger gaps after the stored bars are not persisted
+    STORE_MAX_OPEN_FILES: int = Field(default=256)  # Least recently used series files beyond this are closed
+    
+    # Streaming Configuration
+    STREAM_TICK_INTERVAL_SECONDS: float = Field(default=1.0)
+    STREAM_CLIENT_QUEUE_SIZE: int = Field(default=100)
+    STREAM_SLOW_CONSUMER_POLICY: str = Field(default="drop_oldest")  # Options: drop_oldest, conflate
+    
+    # Tick Ingestion Configuration
+    TICK_SOURCE: str = Field(default="none")  # Options: none, file, socket, kinesis (AWS_KINESIS_STREAM_NAME)
+    TICK_FILE_PATH: Optional[str] = Field(default=None)
+    TICK_REPLAY_SPEED: float = Field(default=0.0)  # 1 replays in real time, 0 as fast as possible
+    TICK_SOCKET_HOST: str = Field(default="127.0.0.1")
+    TICK_SOCKET_PORT: int = Field(default=9100)
+    TICK_SERIES_KIND: str = Field(default="market")  # Series the 1m bars are stored under: market, crypto
+    TICK_QUEUE_CHUNKS: int = Field(default=256)  # Raw chunks buffered before the source is held back
+    TICK_BATCH_MAX_TICKS: int = Field(default=20_000)
+    TICK_BATCH_INTERVAL_SECONDS: float = Field(default=0.05)  # Longest wait to fill a micro-batch
+    TICK_MAX_GAP_BARS: int = Field(default=1440)  # Longer silences are not filled with flat bars
+    
+    # Job Configuration
+    JOB_EXECUTOR: str = Field(default="process")  # Options: process, thread, inline
+    JOB_WORKERS: int = Field(default=2)
+    JOB_QUEUE_SIZE: int = Field(default=100)  # Submissions beyond this are rejected
+    JOB_RESULT_TTL_SECONDS: int = Field(default=3600)  # How long finished jobs stay retrievable
+    JOB_MAX_STORED: int = Field(default=10_000)
+    
+    # Ingestion Configuration
+    INGEST_CHUNK_ROWS: int = Field(default=10_000)  # Records validated and aggregated together
+    INGEST_MAX_ERRORS: int = Field(default=1000)  # Per-line errors reported in the response
+    
+    # Metrics Configuration
+    METRICS_ENABLED: bool = Field(default=True)
+    METRICS_LOOP_LAG_INTERVAL_SECONDS: float = Field(default=0.5)
+    
     # Logging Configuration
     LOG_LEVEL: str = Field(default="INFO")
     
+    @field_validator("MARKET_DATA_SOURCE")
+    @classmethod
+    def _check_market_data_source(cls, value: str) -> str:
+        # Rejected here, at startup, rather than by the first request that needs a provider
+        if value not in MARKET_DATA_SOURCES:
+            raise ValueError(f"MARKET_DATA_SOURCE {value!r} has no provider; use 'mock' or 'api'")
+        return value
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
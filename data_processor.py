@@ -3,17 +3,31 @@ import asyncio
 import json
 import logging
 import random
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, AsyncGenerator
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional, AsyncGenerator, Awaitable, Tuple, Callable, Sequence, Set
 
 import pandas as pd
 import numpy as np
-from scipy.stats import norm
 
 from models import (
     StockData, CryptoData, MarketSentiment,
     AlternativeDataBatch, TimeFrame
 )
+from cache import (
+    TTLCache, SegmentCache, RedisCache, SingleFlight,
+    concat_columns, create_redis_client
+)
+from config import get_settings
+from resampling import resample_ohlcv
+from aggregators import StreamingAggregator
+from series_store import SeriesStore, StoreError
+from metrics import timed_stage, CACHE_LOOKUPS
+from intraday import IntradayStore, bar_quote
+from providers import BAR_LAYOUTS, MarketDataProvider, UpstreamError, create_provider, empty_bars
+from serializers import STOCK_ROW_FIELDS, CRYPTO_ROW_FIELDS, render_json_rows
 
 logger = logging.getLogger("bavest-api")
 
@@ -22,76 +36,686 @@ STOCK_SYMBOLS = ["AAPL", "MSFT", "GOOGL", "AMZN", "META", "TSLA", "NVDA"]
 CRYPTO_SYMBOLS = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "XRPUSDT", "ADAUSDT"]
 SENTIMENT_SOURCES = ["twitter", "reddit", "news", "analyst_ratings", "forum_discussions"]
 
-# Cached data storage
-_market_data_cache = {}
-_crypto_data_cache = {}
-_sentiment_data_cache = {}
+# Origin of the bar grid used to align query ranges
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
-async def fetch_market_data(
+# Generated series trade at their base price at this instant; bars are fetched
+# and cached in fixed blocks so any sub-range can be produced on its own
+_SERIES_ANCHOR = datetime(2020, 1, 1)
+_SERIES_BLOCK_BARS = 1024
+
+# Intraday generation levels, coarsest first: the bars of each level subdivide
+# the bars of the level before it, down from daily bars
+_GENERATION_LEVELS = [
+    timedelta(days=1), timedelta(hours=4), timedelta(hours=1), timedelta(minutes=30),
+    timedelta(minutes=15), timedelta(minutes=5), timedelta(minutes=1)
+]
+_MASK64 = 2 ** 64 - 1
+
+# Column layout of generated price series
+OHLCV_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+# Alternative data values are aggregated this many rows at a time
+_ALTERNATIVE_CHUNK_ROWS = 65_536
+
+# Cached data storage shared by market, crypto and sentiment data
+_settings = get_settings()
+data_cache = TTLCache(
+    max_entries=_settings.CACHE_MAX_ENTRIES,
+    max_bytes=_settings.CACHE_MAX_BYTES,
+    ttl_seconds=_settings.CACHE_EXPIRATION_SECONDS
+)
+segment_cache = SegmentCache(data_cache)
+inflight_requests = SingleFlight()
+
+# Most recent bars and quotes per symbol, read as zero-copy views
+intraday_store = IntradayStore(
+    capacity_bars=_settings.INTRADAY_CAPACITY_BARS,
+    max_series=_settings.INTRADAY_MAX_SYMBOLS,
+    enabled=_settings.INTRADAY_ENABLED
+)
+
+# Completed bars persisted on disk across restarts
+series_store = SeriesStore(
+    _settings.STORE_DIR, enabled=_settings.STORE_ENABLED, max_open_files=_settings.STORE_MAX_OPEN_FILES
+)
+
+# Store appends still running behind the responses that fetched their bars
+_persist_tasks: Set[asyncio.Task] = set()
+
+# Pool for CPU-bound generation, created on first use
+_generation_executor: Optional[Executor] = None
+
+# Source of bars selected by MARKET_DATA_SOURCE, created on first use
+_market_provider: Optional[MarketDataProvider] = None
+redis_cache = RedisCache(
+    create_redis_client(
+        _settings.REDIS_HOST,
+        _settings.REDIS_PORT,
+        _settings.REDIS_PASSWORD,
+        _settings.REDIS_TIMEOUT_SECONDS
+    ) if _settings.REDIS_ENABLED else None,
+    namespace=_settings.REDIS_KEY_PREFIX,
+    ttl_seconds=_settings.CACHE_EXPIRATION_SECONDS
+)
+
+class QueryTooLarge(ValueError):
+    """Raised when a series query would assemble more bars than RESAMPLE_MAX_BASE_BARS"""
+
+async def fetch_market_series(
     symbols: List[str],
     start_date: datetime,
     end_date: datetime,
     timeframe: TimeFrame = TimeFrame.ONE_DAY,
     limit: int = 1000
-) -> List[StockData]:
+) -> Dict[str, Dict[str, np.ndarray]]:
     """
-    Fetch market data for specified symbols and time range
+    Fetch market data for specified symbols and time range in columnar form
     
-    In a real implementation, this would connect to data providers, APIs, or databases.
-    Here we generate mock data for demonstration purposes.
+    Bars come from the provider selected by MARKET_DATA_SOURCE: generated mock
+    data by default, or an upstream HTTP API.
+    Returns a mapping of symbol to its OHLCV column arrays.
     """
     logger.info(f"Fetching market data for {symbols} from {start_date} to {end_date}")
     
-    cache_key = f"{'-'.join(symbols)}_{start_date.isoformat()}_{end_date.isoformat()}_{timeframe}"
-    if cache_key in _market_data_cache:
-        logger.info(f"Returning cached market data for {cache_key}")
-        return _market_data_cache[cache_key]
-    
-    # Simulation of API latency
-    await asyncio.sleep(0.5)
-    
-    results = []
     for symbol in symbols:
         if symbol not in STOCK_SYMBOLS:
             # For demo, we'll generate data for unknown symbols too
             logger.warning(f"Symbol {symbol} not found in known stocks, generating mock data")
-        
-        # Generate time points based on timeframe
-        time_delta = _get_timedelta_from_timeframe(timeframe)
-        current_time = start_date
-        
-        # Base price for the asset (random but deterministic for the same symbol)
-        base_price = sum(ord(c) for c in symbol) % 100 + 50
-        
-        # Generate price series with random walk and some volatility
-        price_series = _generate_price_series(
-            symbol, 
-            base_price, 
-            start_date, 
-            end_date, 
-            time_delta,
-            limit
+    
+    return await _fetch_series("market", symbols, start_date, end_date, timeframe, limit)
+
+async def fetch_market_data(
+    symbols: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    timeframe: TimeFrame = TimeFrame.ONE_DAY,
+    limit: int = 1000
+) -> List[StockData]:
+    """
+    Fetch market data for specified symbols and time range
+    """
+    series_by_symbol = await fetch_market_series(symbols, start_date, end_date, timeframe, limit)
+    
+    results = []
+    with timed_stage("build_rows"):
+        for symbol, series in series_by_symbol.items():
+            metadata = stock_metadata(symbol)
+            
+            # Create StockData objects for each time point
+            rows = zip(
+                _series_timestamps(series, start_date),
+                series["open"].tolist(),
+                series["high"].tolist(),
+                series["low"].tolist(),
+                series["close"].tolist(),
+                series["volume"].tolist()
+            )
+            for timestamp, open_price, high_price, low_price, close_price, volume in rows:
+                stock_data = StockData(
+                    **metadata,
+                    timestamp=timestamp,
+                    open=open_price,
+                    high=high_price,
+                    low=low_price,
+                    close=close_price,
+                    volume=volume,
+                    adjusted_close=close_price
+                )
+                results.append(stock_data)
+    
+    return results
+
+async def fetch_crypto_series(
+    symbols: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    timeframe: TimeFrame = TimeFrame.ONE_HOUR,
+    limit: int = 1000
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Fetch cryptocurrency data for specified symbols and time range in columnar form
+    
+    Besides the OHLCV columns each series carries a `trades` column.
+    """
+    logger.info(f"Fetching crypto data for {symbols} from {start_date} to {end_date}")
+    return await _fetch_series("crypto", symbols, start_date, end_date, timeframe, limit)
+
+async def _fetch_series(
+    kind: str,
+    symbols: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    timeframe: TimeFrame,
+    limit: Optional[int]
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Shared fetch path for bar series
+    
+    Whole query results are cached under their normalized key. Recent ranges
+    are then served from views of the intraday rings. Below that, every
+    (symbol, timeframe) series keeps contiguous segments of completed bars, so only
+    the sub-ranges no earlier query covered are looked up further: first in the
+    on-disk series store, then as fixed-size blocks in the shared Redis cache,
+    and finally from the market data provider.
+    """
+    start_date, end_date, cache_ttl, cache_key = _series_query(kind, symbols, start_date, end_date, timeframe, limit)
+    with timed_stage("cache"):
+        cached = data_cache.get(cache_key)
+    if cached is not None:
+        CACHE_LOOKUPS.labels(kind, "hit").inc()
+        logger.info(f"Returning cached {kind} data for {cache_key}")
+        return cached
+    CACHE_LOOKUPS.labels(kind, "miss").inc()
+    
+    with timed_stage("intraday"):
+        recent = _read_intraday(kind, symbols, start_date, end_date, timeframe, limit)
+    if recent is not None:
+        return recent
+    
+    # Concurrent identical queries share a single load
+    return await inflight_requests.run(
+        cache_key,
+        lambda: _load_series(kind, symbols, start_date, end_date, timeframe, limit, cache_key, cache_ttl)
+    )
+
+def _series_query(
+    kind: str,
+    symbols: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    timeframe: TimeFrame,
+    limit: Optional[int]
+) -> Tuple[datetime, datetime, Optional[float], str]:
+    """Normalized range, cache TTL and query cache key of a series query"""
+    # Align the range to bar boundaries so relative-date queries share cache entries
+    start_date, end_date, cache_ttl = normalize_time_range(start_date, end_date, timeframe)
+    cache_key = f"{kind}:{'-'.join(symbols)}_{start_date.isoformat()}_{end_date.isoformat()}_{timeframe}_{limit}"
+    return start_date, end_date, cache_ttl, cache_key
+
+async def fetch_market_json(
+    symbols: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    timeframe: TimeFrame = TimeFrame.ONE_DAY,
+    limit: int = 1000
+) -> Tuple[int, bytes]:
+    """
+    Fetch market data as a JSON array of StockData rows
+    
+    Returns the row count and the encoded array, byte-identical to serializing
+    the result of fetch_market_data.
+    """
+    return await _fetch_json(
+        "market", fetch_market_series, stock_metadata, STOCK_ROW_FIELDS,
+        symbols, start_date, end_date, timeframe, limit
+    )
+
+async def fetch_crypto_json(
+    symbols: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    timeframe: TimeFrame = TimeFrame.ONE_HOUR,
+    limit: int = 1000
+) -> Tuple[int, bytes]:
+    """
+    Fetch cryptocurrency data as a JSON array of CryptoData rows
+    
+    Returns the row count and the encoded array, byte-identical to serializing
+    the result of fetch_crypto_data.
+    """
+    return await _fetch_json(
+        "crypto", fetch_crypto_series, crypto_metadata, CRYPTO_ROW_FIELDS,
+        symbols, start_date, end_date, timeframe, limit
+    )
+
+async def _fetch_json(
+    kind: str,
+    fetch_series: Callable[..., Awaitable[Dict[str, Dict[str, np.ndarray]]]],
+    metadata_fn: Callable[[str], Dict[str, str]],
+    fields: Sequence[Tuple[str, str, type]],
+    symbols: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    timeframe: TimeFrame,
+    limit: Optional[int]
+) -> Tuple[int, bytes]:
+    """
+    Shared fast path for JSON row responses
+    
+    Rows are rendered straight from the column arrays. With CACHE_RENDERED_JSON
+    the encoded bytes are cached next to the series, with the same TTL, so a
+    repeated query only pays for the response envelope.
+    """
+    # Timestamps of aware requests are rendered in UTC with a "Z" suffix
+    timestamp_suffix = "Z" if start_date.tzinfo is not None else ""
+    _, _, cache_ttl, cache_key = _series_query(kind, symbols, start_date, end_date, timeframe, limit)
+    json_key = ("json", cache_key, timestamp_suffix)
+    if _settings.CACHE_RENDERED_JSON:
+        with timed_stage("cache"):
+            cached = data_cache.get(json_key)
+        if cached is not None:
+            CACHE_LOOKUPS.labels(f"{kind}_json", "hit").inc()
+            return cached
+        CACHE_LOOKUPS.labels(f"{kind}_json", "miss").inc()
+    
+    series_by_symbol = await fetch_series(symbols, start_date, end_date, timeframe, limit)
+    with timed_stage("serialize"):
+        count = sum(len(series["timestamp"]) for series in series_by_symbol.values())
+        chunks = [
+            render_json_rows(series, metadata_fn(symbol), fields, timestamp_suffix)
+            for symbol, series in series_by_symbol.items()
+        ]
+        rendered = (count, ("[" + ",".join(chunk for chunk in chunks if chunk) + "]").encode())
+    
+    if _settings.CACHE_RENDERED_JSON:
+        data_cache.set(json_key, rendered, ttl=cache_ttl)
+    return rendered
+
+async def _load_series(
+    kind: str,
+    symbols: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    timeframe: TimeFrame,
+    limit: Optional[int],
+    cache_key: str,
+    cache_ttl: Optional[float]
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Resolve a normalized series query that missed the query cache and cache the result
+    
+    Completed bars of every timeframe are resolved from that timeframe's own
+    cached series. When the provider's timeframes nest (the generator makes
+    completed bars agree with their resampled finer bars) the forming bar is
+    aggregated from finer timeframes (_forming_bars), so it only covers what
+    has traded so far; otherwise it comes from the provider's own series of
+    the timeframe, like the completed bars. Bars that have not opened yet are
+    not returned. Raises QueryTooLarge when the query would assemble more than
+    RESAMPLE_MAX_BASE_BARS bars across its symbols.
+    """
+    time_delta = get_timedelta_from_timeframe(timeframe)
+    lo, hi = bar_index_range(start_date, end_date, time_delta, limit)
+    forming_bar = _bar_index(datetime.utcnow(), time_delta)
+    hi = max(min(hi, forming_bar + 1), lo)
+    
+    symbols = list(dict.fromkeys(symbols))
+    if len(symbols) * (hi - lo) > _settings.RESAMPLE_MAX_BASE_BARS:
+        raise QueryTooLarge(
+            f"{len(symbols)} symbols of {hi - lo} {timeframe.value} bars exceed "
+            f"{_settings.RESAMPLE_MAX_BASE_BARS} bars per query; request fewer symbols or a shorter range"
         )
+    
+    base_timeframe = TimeFrame(_settings.RESAMPLE_BASE_TIMEFRAME)
+    if hi <= forming_bar or _partial_tier(timeframe) is None or not get_market_provider().nested_timeframes:
+        results = await _resolve_bars(kind, symbols, timeframe, lo, hi, cache_ttl)
+    else:
+        completed, forming = await asyncio.gather(
+            _resolve_bars(kind, symbols, timeframe, lo, forming_bar, cache_ttl),
+            _forming_bars(kind, symbols, timeframe, forming_bar, cache_ttl)
+        )
+        results = {symbol: concat_columns([completed[symbol], forming[symbol]]) for symbol in symbols}
+    if timeframe == base_timeframe:
+        _write_intraday(kind, results, lo, hi, cache_ttl)
+    
+    # Cache the results
+    data_cache.set(cache_key, results, ttl=cache_ttl)
+    return results
+
+def _partial_tier(timeframe: TimeFrame) -> Optional[TimeFrame]:
+    """
+    Timeframe the forming bar of timeframe is aggregated from: the coarsest of
+    1d, 1h and RESAMPLE_BASE_TIMEFRAME that evenly divides it, or None
+    """
+    time_delta = get_timedelta_from_timeframe(timeframe)
+    base_timeframe = TimeFrame(_settings.RESAMPLE_BASE_TIMEFRAME)
+    base_delta = get_timedelta_from_timeframe(base_timeframe)
+    for tier in (TimeFrame.ONE_DAY, TimeFrame.ONE_HOUR, base_timeframe):
+        tier_delta = get_timedelta_from_timeframe(tier)
+        if base_delta <= tier_delta < time_delta and not time_delta % tier_delta and not tier_delta % base_delta:
+            return tier
+    return None
+
+async def _forming_bars(
+    kind: str,
+    symbols: List[str],
+    timeframe: TimeFrame,
+    index: int,
+    cache_ttl: Optional[float]
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    The forming bar at index of every symbol, aggregated from the completed bars
+    of its partial tier plus that tier's own forming bar
+    
+    A forming 1d bar, for example, is resampled from the completed 1h bars of
+    the day and the forming 1h bar, which in turn comes from 1m bars, so at most
+    a few dozen bars per tier are assembled.
+    """
+    tier = _partial_tier(timeframe)
+    if tier is None:
+        return await _resolve_bars(kind, symbols, timeframe, index, index + 1, cache_ttl)
+    time_delta = get_timedelta_from_timeframe(timeframe)
+    tier_delta = get_timedelta_from_timeframe(tier)
+    ratio = time_delta // tier_delta
+    tier_forming = min(_bar_index(datetime.utcnow(), tier_delta), (index + 1) * ratio - 1)
+    
+    # The tiers are independent, so their upstream fetches overlap
+    completed, forming = await asyncio.gather(
+        _resolve_bars(kind, symbols, tier, index * ratio, tier_forming, cache_ttl),
+        _forming_bars(kind, symbols, tier, tier_forming, cache_ttl)
+    )
+    with timed_stage("resample"):
+        return {
+            symbol: resample_ohlcv(concat_columns([completed[symbol], forming[symbol]]), time_delta)
+            for symbol in symbols
+        }
+
+def _base_range(timeframe: TimeFrame, lo: int, hi: int) -> Optional[Tuple[TimeFrame, int, int]]:
+    """
+    Base timeframe and base bar range that a query's bars can be resampled from,
+    or None when the timeframe is not a multiple of the base timeframe
+    """
+    time_delta = get_timedelta_from_timeframe(timeframe)
+    base_timeframe = TimeFrame(_settings.RESAMPLE_BASE_TIMEFRAME)
+    base_delta = get_timedelta_from_timeframe(base_timeframe)
+    ratio = time_delta // base_delta
+    if ratio < 1 or time_delta % base_delta != timedelta(0):
+        return None
+    # Base bars that have not opened yet do not exist, so the forming bar is partial
+    base_hi = min(hi * ratio, _bar_index(datetime.utcnow(), base_delta) + 1)
+    return base_timeframe, lo * ratio, max(base_hi, lo * ratio)
+
+def _read_intraday(
+    kind: str,
+    symbols: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    timeframe: TimeFrame,
+    limit: Optional[int]
+) -> Optional[Dict[str, Dict[str, np.ndarray]]]:
+    """
+    Results of a query whose base bars the intraday rings hold for every symbol, or None
+
+    Base timeframe queries get read-only views of the rings; coarser timeframes
+    are resampled from them.
+    """
+    if not intraday_store.enabled:
+        return None
+    time_delta = get_timedelta_from_timeframe(timeframe)
+    lo, hi = bar_index_range(start_date, end_date, time_delta, limit)
+    base = _base_range(timeframe, lo, hi)
+    if base is None or base[2] - base[1] > intraday_store.capacity_bars:
+        return None
+    base_timeframe, base_lo, base_hi = base
+    
+    results = {}
+    for symbol in dict.fromkeys(symbols):
+        views = intraday_store.window(kind, symbol, base_lo, base_hi)
+        if views is None:
+            return None
+        results[symbol] = views
+    if timeframe != base_timeframe:
+        with timed_stage("resample"):
+            results = {symbol: resample_ohlcv(views, time_delta) for symbol, views in results.items()}
+    return results
+
+def _write_intraday(
+    kind: str,
+    results: Dict[str, Dict[str, np.ndarray]],
+    lo: int,
+    hi: int,
+    cache_ttl: Optional[float]
+) -> None:
+    """
+    Keep base timeframe results that reach into the last INTRADAY_CAPACITY_BARS bars
+
+    The rings hold one bar per grid slot, so results with gaps are not kept.
+    """
+    if not intraday_store.enabled:
+        return
+    base_delta = get_timedelta_from_timeframe(TimeFrame(_settings.RESAMPLE_BASE_TIMEFRAME))
+    forming_bar = _bar_index(datetime.utcnow(), base_delta)
+    for symbol, columns in results.items():
+        if len(columns["timestamp"]) != hi - lo:
+            continue
+        if hi > forming_bar - intraday_store.capacity_bars:
+            intraday_store.write(kind, symbol, lo, columns, complete_hi=forming_bar, ttl=cache_ttl)
+
+async def _resolve_bars(
+    kind: str,
+    symbols: List[str],
+    timeframe: TimeFrame,
+    lo: int,
+    hi: int,
+    cache_ttl: Optional[float]
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Assemble the bar index range [lo, hi) of every symbol from local segments,
+    the on-disk store, shared-cache blocks and blocks fetched from the provider
+    """
+    time_delta = get_timedelta_from_timeframe(timeframe)
+    forming_bar = _bar_index(datetime.utcnow(), time_delta)
+    
+    with timed_stage("segments"):
+        plans = {
+            symbol: segment_cache.lookup((kind, symbol, timeframe.value), lo, hi)
+            for symbol in dict.fromkeys(symbols)
+        }
+    
+    # Gaps in the local segments are read from the on-disk store where it has the bars
+    with timed_stage("store"):
+        stored = {symbol: _stored_range(kind, symbol, timeframe, time_delta) for symbol in plans}
+        plans = {
+            symbol: _read_stored(kind, symbol, timeframe, time_delta, pieces, stored[symbol])
+            for symbol, pieces in plans.items()
+        }
+    
+    # Gaps in the local segments are filled block by block from the shared cache
+    block_keys = {}
+    for symbol, pieces in plans.items():
+        for piece_lo, piece_hi, columns in pieces:
+            if columns is None:
+                for block_lo, block_hi in _series_blocks(time_delta, piece_lo, piece_hi):
+                    block_keys[_block_key(kind, symbol, timeframe, block_lo)] = (symbol, block_lo, block_hi)
+    with timed_stage("redis"):
+        blocks = await redis_cache.get_many(list(block_keys))
+    
+    missing = {key: spec for key, spec in block_keys.items() if key not in blocks}
+    if missing:
+        # Every missing block of the query goes to the provider in one batch
+        with timed_stage("upstream"):
+            fetched = await get_market_provider().fetch_bars(kind, time_delta, list(missing.values()))
         
-        # Create StockData objects for each time point
-        for timestamp, price_data in price_series.items():
-            stock_data = StockData(
-                symbol=symbol,
-                exchange="NASDAQ",  # Mock exchange
-                timestamp=timestamp,
-                open=price_data["open"],
-                high=price_data["high"],
-                low=price_data["low"],
-                close=price_data["close"],
-                volume=price_data["volume"],
-                adjusted_close=price_data["close"]
+        completed, forming = {}, {}
+        for key, columns in zip(missing, fetched):
+            blocks[key] = columns
+            (completed if missing[key][2] <= forming_bar else forming)[key] = columns
+        with timed_stage("redis"):
+            await redis_cache.set_many(completed)
+            await redis_cache.set_many(forming, ttl=cache_ttl)
+    
+    for key, (symbol, block_lo, block_hi) in block_keys.items():
+        # Only completed bars are kept locally; the forming bar lives in the query cache.
+        # Segments are addressed by position, so blocks the upstream had no bars for are not kept
+        completed_bars = min(block_hi, forming_bar) - block_lo
+        if completed_bars > 0 and len(blocks[key]["timestamp"]) >= completed_bars:
+            segment_cache.insert(
+                (kind, symbol, timeframe.value),
+                block_lo,
+                {name: values[:completed_bars] for name, values in blocks[key].items()}
             )
-            results.append(stock_data)
     
-    # Cache the results
-    _market_data_cache[cache_key] = results
+    results = {}
+    for symbol, pieces in plans.items():
+        parts = []
+        for piece_lo, piece_hi, columns in pieces:
+            if columns is None:
+                piece_blocks = _series_blocks(time_delta, piece_lo, piece_hi)
+                columns = _slice_blocks(
+                    [blocks[_block_key(kind, symbol, timeframe, block_lo)] for block_lo, _ in piece_blocks],
+                    time_delta,
+                    piece_lo,
+                    piece_hi
+                )
+            parts.append(columns)
+        results[symbol] = concat_columns(parts) if parts else empty_bars(kind)
+    
+    # Appending to the store does not hold up the response
+    task = asyncio.ensure_future(_persist_bars(kind, timeframe, time_delta, results, lo, min(hi, forming_bar), stored))
+    _persist_tasks.add(task)
+    task.add_done_callback(_persist_tasks.discard)
     return results
 
+def _stored_range(kind: str, symbol: str, timeframe: TimeFrame, time_delta: timedelta) -> Optional[Tuple[int, int]]:
+    """Bar index range [lo, hi) held by the on-disk store, or None"""
+    try:
+        bounds = series_store.bounds(kind, symbol, timeframe.value)
+    except (StoreError, OSError) as e:
+        logger.warning(f"Series store unavailable for {kind}:{symbol}:{timeframe.value}: {str(e)}")
+        return None
+    if bounds is None:
+        return None
+    delta_us = np.timedelta64(time_delta // timedelta(microseconds=1), "us")
+    first, last = ((bound - np.datetime64(_EPOCH, "us")) // delta_us for bound in bounds)
+    return int(first), int(last) + 1
+
+def _read_stored(
+    kind: str,
+    symbol: str,
+    timeframe: TimeFrame,
+    time_delta: timedelta,
+    pieces: List[Tuple[int, int, Optional[Dict[str, np.ndarray]]]],
+    stored: Optional[Tuple[int, int]]
+) -> List[Tuple[int, int, Optional[Dict[str, np.ndarray]]]]:
+    """Fill the parts of missing pieces that the store covers with zero-copy views of its files"""
+    if stored is None:
+        return pieces
+    planned = []
+    for piece_lo, piece_hi, columns in pieces:
+        overlap_lo, overlap_hi = max(piece_lo, stored[0]), min(piece_hi, stored[1])
+        if columns is not None or overlap_lo >= overlap_hi:
+            planned.append((piece_lo, piece_hi, columns))
+            continue
+        try:
+            stored_columns = series_store.read(
+                kind, symbol, timeframe.value,
+                np.datetime64(_EPOCH + overlap_lo * time_delta, "us"),
+                np.datetime64(_EPOCH + (overlap_hi - 1) * time_delta, "us")
+            )
+        except (StoreError, OSError) as e:
+            # Serve the gap from the provider rather than failing the query
+            logger.warning(f"Series store unavailable for {kind}:{symbol}:{timeframe.value}: {str(e)}")
+            stored_columns = None
+        if stored_columns is None or len(stored_columns["timestamp"]) != overlap_hi - overlap_lo:
+            planned.append((piece_lo, piece_hi, columns))
+            continue
+        if piece_lo < overlap_lo:
+            planned.append((piece_lo, overlap_lo, None))
+        planned.append((overlap_lo, overlap_hi, stored_columns))
+        if overlap_hi < piece_hi:
+            planned.append((overlap_hi, piece_hi, None))
+    return planned
+
+async def _persist_bars(
+    kind: str,
+    timeframe: TimeFrame,
+    time_delta: timedelta,
+    results: Dict[str, Dict[str, np.ndarray]],
+    lo: int,
+    completed_hi: int,
+    stored: Dict[str, Optional[Tuple[int, int]]]
+) -> None:
+    """
+    Append the completed bars of [lo, completed_hi) that follow each stored series
+    
+    Stored series stay contiguous: a gap between the stored bars and the query is
+    fetched and appended first when it spans at most STORE_MAX_FILL_BARS bars,
+    otherwise the series is left as it is. Only ranges the upstream has no bars
+    for leave holes; reads check the row count and go to the provider there.
+    Appends skip rows that are already stored, so overlapping calls for the
+    same series are harmless.
+    """
+    if not series_store.enabled:
+        return
+    for symbol, columns in results.items():
+        stored_hi = stored[symbol][1] if stored.get(symbol) else lo
+        if completed_hi <= max(stored_hi, lo):
+            continue
+        try:
+            if stored_hi < lo:
+                if lo - stored_hi > _settings.STORE_MAX_FILL_BARS:
+                    continue
+                fill, = await get_market_provider().fetch_bars(kind, time_delta, [(symbol, stored_hi, lo)])
+                await asyncio.to_thread(series_store.append, kind, symbol, timeframe.value, fill)
+            window = slice(*np.searchsorted(columns["timestamp"], _index_timestamps(time_delta, max(stored_hi, lo), completed_hi)))
+            rows = {name: values[window] for name, values in columns.items()}
+            with timed_stage("persist"):
+                await asyncio.to_thread(series_store.append, kind, symbol, timeframe.value, rows)
+        except (StoreError, OSError, UpstreamError) as e:
+            logger.warning(f"Could not persist {kind}:{symbol}:{timeframe.value}: {str(e)}")
+
+async def flush_series_store() -> None:
+    """Wait for the store appends started so far"""
+    while _persist_tasks:
+        await asyncio.gather(*_persist_tasks, return_exceptions=True)
+
+async def add_live_bars(kind: str, symbol: str, lo: int, columns: Dict[str, np.ndarray]) -> None:
+    """
+    Take completed 1m bars rolled up from ticks, starting at bar index lo
+
+    They replace provider bars in the local segments, so the fetch path serves
+    them, and are appended to the on-disk store when they continue the stored series.
+    """
+    timeframe = TimeFrame.ONE_MINUTE
+    rows = _live_columns(kind, columns)
+    segment_cache.insert((kind, symbol, timeframe.value), lo, rows, replace=True)
+    if _settings.RESAMPLE_BASE_TIMEFRAME == timeframe.value:
+        intraday_store.write(kind, symbol, lo, rows, complete_hi=lo + len(rows["timestamp"]), live=True)
+    
+    if not series_store.enabled:
+        return
+    stored = _stored_range(kind, symbol, timeframe, get_timedelta_from_timeframe(timeframe))
+    if stored is not None and stored[1] != lo:
+        return
+    try:
+        await asyncio.to_thread(series_store.append, kind, symbol, timeframe.value, rows)
+    except (StoreError, OSError) as e:
+        logger.warning(f"Could not persist {kind}:{symbol}:{timeframe.value}: {str(e)}")
+
+def update_live_quote(kind: str, symbol: str, bar: Dict[str, Any], price: float, time_us: int) -> None:
+    """Take the forming 1m bar and last trade of a symbol from the tick pipeline"""
+    if _settings.RESAMPLE_BASE_TIMEFRAME != TimeFrame.ONE_MINUTE.value:
+        return
+    index = bar["index"]
+    columns = {"timestamp": np.array([_EPOCH + index * timedelta(minutes=1)], dtype="datetime64[us]")}
+    columns.update({name: np.array([bar[name]]) for name in BAR_LAYOUTS[kind]})
+    intraday_store.update_live(kind, symbol, index, _live_columns(kind, columns), price, time_us)
+
+def _live_columns(kind: str, columns: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Bars rolled up from ticks in the column layout of kind"""
+    rows = {"timestamp": columns["timestamp"]}
+    rows.update({name: columns[name].astype(dtype, copy=False) for name, dtype in BAR_LAYOUTS[kind].items()})
+    return rows
+
+async def fetch_quotes(kind: str, symbols: List[str]) -> List[Dict[str, Any]]:
+    """
+    Latest price and forming bar of every symbol
+    
+    Quotes come from the intraday store: the last trade while a tick feed runs,
+    otherwise the close of the forming bar. Symbols without a fresh quote are
+    fetched together as one query for the forming bar.
+    """
+    quotes = {symbol: intraday_store.quote(kind, symbol) for symbol in dict.fromkeys(symbols)}
+    missing = [symbol for symbol, quote in quotes.items() if quote is None]
+    if missing:
+        base_tf = TimeFrame(_settings.RESAMPLE_BASE_TIMEFRAME)
+        forming_bar = _align_to_bar(datetime.utcnow(), get_timedelta_from_timeframe(base_tf))
+        series = await _fetch_series(kind, missing, forming_bar, forming_bar, base_tf, None)
+        for symbol in missing:
+            quotes[symbol] = intraday_store.quote(kind, symbol) or bar_quote(symbol, series[symbol])
+    return [quote for quote in quotes.values() if quote is not None]
+
 async def fetch_crypto_data(
     symbols: List[str],
     start_date: datetime,
@@ -102,171 +726,306 @@ async def fetch_crypto_data(
     """
     Fetch cryptocurrency data for specified symbols and time range
     """
-    logger.info(f"Fetching crypto data for {symbols} from {start_date} to {end_date}")
-    
-    cache_key = f"{'-'.join(symbols)}_{start_date.isoformat()}_{end_date.isoformat()}_{timeframe}"
-    if cache_key in _crypto_data_cache:
-        logger.info(f"Returning cached crypto data for {cache_key}")
-        return _crypto_data_cache[cache_key]
-    
-    # Simulation of API latency
-    await asyncio.sleep(0.5)
+    series_by_symbol = await fetch_crypto_series(symbols, start_date, end_date, timeframe, limit)
     
     results = []
-    for symbol in symbols:
-        # Parse base and quote assets from symbol (typically BTCUSDT format)
-        if len(symbol) > 3:
-            base_asset = symbol[:-4] if symbol.endswith("USDT") else symbol[:3]
-            quote_asset = "USDT" if symbol.endswith("USDT") else symbol[3:]
-        else:
-            base_asset = symbol
-            quote_asset = "USD"
-        
-        # Generate time points based on timeframe
-        time_delta = _get_timedelta_from_timeframe(timeframe)
+    with timed_stage("build_rows"):
+        for symbol, series in series_by_symbol.items():
+            metadata = crypto_metadata(symbol)
         
-        # Base price for the crypto (random but deterministic for the same symbol)
-        base_price = sum(ord(c) for c in symbol) % 1000 + 100
-        if "BTC" in symbol:
-            base_price *= 30  # Make BTC much higher
-        elif "ETH" in symbol:
-            base_price *= 3   # Make ETH somewhat higher
-        
-        # Generate price series with higher volatility than stocks
-        price_series = _generate_price_series(
-            symbol, 
-            base_price, 
-            start_date, 
-            end_date, 
-            time_delta,
-            limit,
-            volatility_factor=1.5  # Higher volatility for crypto
-        )
-        
-        # Create CryptoData objects for each time point
-        for timestamp, price_data in price_series.items():
-            crypto_data = CryptoData(
-                symbol=symbol,
-                base_asset=base_asset,
-                quote_asset=quote_asset,
-                exchange="Binance",  # Mock exchange
-                timestamp=timestamp,
-                open=price_data["open"],
-                high=price_data["high"],
-                low=price_data["low"],
-                close=price_data["close"],
-                volume=price_data["volume"] / 10,  # Different volume scale for crypto
-                trades=int(price_data["volume"] / 100)
+            # Create CryptoData objects for each time point
+            rows = zip(
+                _series_timestamps(series, start_date),
+                series["open"].tolist(),
+                series["high"].tolist(),
+                series["low"].tolist(),
+                series["close"].tolist(),
+                series["volume"].tolist(),
+                series["trades"].tolist()
             )
-            results.append(crypto_data)
+            for timestamp, open_price, high_price, low_price, close_price, volume, trades in rows:
+                crypto_data = CryptoData(
+                    **metadata,
+                    timestamp=timestamp,
+                    open=open_price,
+                    high=high_price,
+                    low=low_price,
+                    close=close_price,
+                    volume=volume,
+                    trades=trades
+                )
+                results.append(crypto_data)
     
-    # Cache the results
-    _crypto_data_cache[cache_key] = results
     return results
 
-async def fetch_sentiment_data(
+async def iter_series(
+    fetch_series: Callable[..., Awaitable[Dict[str, Dict[str, np.ndarray]]]],
+    symbols: List[str],
+    start_date: datetime,
+    end_date: datetime,
+    timeframe: TimeFrame,
+    limit: Optional[int] = 1000
+) -> AsyncGenerator[Tuple[str, Dict[str, np.ndarray]], None]:
+    """
+    Yield (symbol, columns) pairs in request order as each symbol becomes available
+    
+    fetch_series is fetch_market_series or fetch_crypto_series. Symbols are
+    fetched individually with at most FETCH_CONCURRENCY of them in flight, so
+    memory stays bounded by the lookahead rather than the size of the query.
+    """
+    lookahead = max(_settings.FETCH_CONCURRENCY, 1)
+    remaining = iter(dict.fromkeys(symbols))
+    pending = deque()
+    
+    def schedule():
+        for symbol in islice(remaining, lookahead - len(pending)):
+            task = asyncio.ensure_future(fetch_series([symbol], start_date, end_date, timeframe, limit))
+            pending.append((symbol, task))
+    
+    try:
+        schedule()
+        while pending:
+            symbol, task = pending.popleft()
+            series = (await task)[symbol]
+            schedule()
+            yield symbol, series
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+async def fetch_sentiment_matrix(
     symbol: str,
     start_date: datetime,
     end_date: datetime,
     sources: Optional[List[str]] = None
-) -> List[MarketSentiment]:
+) -> Dict[str, Any]:
     """
-    Fetch sentiment data for a specific asset symbol
+    Fetch sentiment data for a specific asset symbol as a days x sources matrix
+    
+    Returns `timestamp` (one datetime64 per day), `sources` (column labels) and
+    `score`, `volume` and `momentum` arrays of shape (days, sources).
     """
     logger.info(f"Fetching sentiment data for {symbol} from {start_date} to {end_date}")
     
-    cache_key = f"{symbol}_{start_date.isoformat()}_{end_date.isoformat()}"
-    if cache_key in _sentiment_data_cache:
-        logger.info(f"Returning cached sentiment data for {cache_key}")
-        return _sentiment_data_cache[cache_key]
-    
-    # Simulation of API latency
-    await asyncio.sleep(0.3)
-    
     # Use specified sources or default to all sources
-    data_sources = sources if sources else SENTIMENT_SOURCES
+    data_sources = list(sources) if sources else list(SENTIMENT_SOURCES)
     
-    results = []
-    # Generate daily sentiment scores
-    current_date = start_date
+    # Sentiment is produced daily, so align the range to day boundaries
+    start_date, end_date, cache_ttl = normalize_time_range(start_date, end_date, TimeFrame.ONE_DAY)
+    cache_key = f"sentiment:{symbol}_{start_date.isoformat()}_{end_date.isoformat()}_{','.join(data_sources)}"
+    with timed_stage("cache"):
+        cached = data_cache.get(cache_key)
+    if cached is not None:
+        CACHE_LOOKUPS.labels("sentiment", "hit").inc()
+        logger.info(f"Returning cached sentiment data for {cache_key}")
+        return cached
+    CACHE_LOOKUPS.labels("sentiment", "miss").inc()
     
-    # Seed random based on symbol for consistent results
-    random.seed(sum(ord(c) for c in symbol))
+    # Concurrent identical queries share a single load
+    return await inflight_requests.run(
+        cache_key,
+        lambda: _load_sentiment(symbol, start_date, end_date, data_sources, cache_key, cache_ttl)
+    )
+
+async def fetch_sentiment_data(
+    symbol: str,
+    start_date: datetime,
+    end_date: datetime,
+    sources: Optional[List[str]] = None
+) -> List[MarketSentiment]:
+    """
+    Fetch sentiment data for a specific asset symbol
+    """
+    matrix = await fetch_sentiment_matrix(symbol, start_date, end_date, sources)
     
-    while current_date <= end_date:
-        for source in data_sources:
-            # Generate a sentiment score between -1 and 1
-            # with some natural time correlation (trending)
-            day_factor = (current_date - start_date).days / max(1, (end_date - start_date).days)
-            
-            # Create a trend with some randomization
-            base_sentiment = 0.2 * np.sin(day_factor * 6) + random.uniform(-0.3, 0.3)
-            sentiment_score = max(-1.0, min(1.0, base_sentiment))
-            
-            # Volume of mentions/data points that contributed to the sentiment
-            volume = int(random.uniform(100, 10000))
-            
+    results = []
+    timestamps = _series_timestamps(matrix, start_date)
+    scores, volumes, momentum = matrix["score"].tolist(), matrix["volume"].tolist(), matrix["momentum"].tolist()
+    for day, timestamp in enumerate(timestamps):
+        for column, source in enumerate(matrix["sources"]):
             sentiment_data = MarketSentiment(
                 symbol=symbol,
-                timestamp=current_date,
+                timestamp=timestamp,
                 source=source,
-                sentiment_score=sentiment_score,
-                volume=volume,
-                momentum_indicator=sentiment_score * (1 + day_factor)
+                sentiment_score=scores[day][column],
+                volume=volumes[day][column],
+                momentum_indicator=momentum[day][column]
             )
             results.append(sentiment_data)
-        
-        current_date += timedelta(days=1)
+    
+    return results
+
+async def fetch_sentiment_summary(
+    symbol: str,
+    start_date: datetime,
+    end_date: datetime,
+    sources: Optional[List[str]] = None,
+    momentum_window: int = 7
+) -> Dict[str, Any]:
+    """
+    Aggregate sentiment server-side instead of returning one row per day and source
+    
+    Produces a volume-weighted score per day, its rolling momentum (mean daily
+    change over momentum_window days) and a per-source breakdown for the period.
+    """
+    matrix = await fetch_sentiment_matrix(symbol, start_date, end_date, sources)
+    scores, volumes = matrix["score"], matrix["volume"].astype(float)
+    
+    daily_volume = volumes.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weighted = np.where(daily_volume > 0, (scores * volumes).sum(axis=1) / daily_volume, np.nan)
+    window = max(momentum_window, 1)
+    momentum = np.full(len(weighted), np.nan)
+    if len(weighted) > window:
+        momentum[window:] = (weighted[window:] - weighted[:-window]) / window
+    
+    total_volume = volumes.sum(axis=0)
+    has_days = len(weighted) > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        breakdown = {
+            source: {
+                "mean_score": float(scores[:, column].mean()) if has_days else None,
+                "weighted_score": float((scores[:, column] * volumes[:, column]).sum() / total_volume[column])
+                if total_volume[column] > 0 else None,
+                "min_score": float(scores[:, column].min()) if has_days else None,
+                "max_score": float(scores[:, column].max()) if has_days else None,
+                "total_volume": int(total_volume[column])
+            }
+            for column, source in enumerate(matrix["sources"])
+        }
+    
+    return {
+        "timestamp": matrix["timestamp"],
+        "weighted_score": weighted,
+        "volume": daily_volume.astype(np.int64),
+        "momentum": momentum,
+        "sources": breakdown
+    }
+
+async def _load_sentiment(
+    symbol: str,
+    start_date: datetime,
+    end_date: datetime,
+    sources: List[str],
+    cache_key: str,
+    cache_ttl: Optional[float]
+) -> Dict[str, Any]:
+    """
+    Generate sentiment for a normalized query that missed the cache and cache the result
+    """
+    # Simulation of API latency
+    with timed_stage("upstream"):
+        await asyncio.sleep(_settings.SIMULATED_SENTIMENT_LATENCY_SECONDS)
+    
+    with timed_stage("generate"):
+        results = _generate_sentiment_matrix(symbol, start_date, end_date, sources)
     
     # Cache the results
-    _sentiment_data_cache[cache_key] = results
+    data_cache.set(cache_key, results, ttl=cache_ttl)
     return results
 
-async def process_alternative_data(data: AlternativeDataBatch, request_id: str) -> Dict[str, Any]:
+async def process_alternative_data(
+    data: AlternativeDataBatch,
+    request_id: str,
+    group_by: Sequence[str] = (),
+    bucket_seconds: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Process alternative data and extract insights
-    This would typically be a background task
+    
+    The statistics run in the generation pool; the API submits batches to the
+    job manager instead of awaiting this directly.
     """
     logger.info(f"Processing {len(data.data_points)} alternative data points from {data.source}")
     
-    # Simulate processing delay
-    await asyncio.sleep(2)
-    
-    # In a real implementation, this would perform data analysis, ML predictions, etc.
-    # For demonstration, we'll return some mock insights
-    
-    # Extract data values
-    values = []
-    for point in data.data_points:
-        if isinstance(point.value, (int, float)):
-            values.append(point.value)
-        elif isinstance(point.value, dict) and 'value' in point.value:
-            if isinstance(point.value['value'], (int, float)):
-                values.append(point.value['value'])
-    
-    # Generate mock insights if we have numeric values
-    insights = {}
-    if values:
-        values_array = np.array(values)
-        insights = {
-            "count": len(values),
-            "mean": float(np.mean(values_array)),
-            "median": float(np.median(values_array)),
-            "std_dev": float(np.std(values_array)),
-            "min": float(np.min(values_array)),
-            "max": float(np.max(values_array)),
-            "processed_at": datetime.utcnow().isoformat()
-        }
+    insights = await run_cpu_bound(
+        compute_alternative_insights, extract_alternative_columns(data), tuple(group_by), bucket_seconds
+    )
     
     # Log processing completion
     logger.info(f"Request {request_id}: Finished processing alternative data")
     
     return insights
 
-async def get_streaming_data(symbol: str) -> AsyncGenerator[Dict[str, Any], None]:
+def extract_alternative_columns(data: AlternativeDataBatch) -> Dict[str, np.ndarray]:
     """
-    Generate streaming data for a given symbol
-    In a real implementation, this would connect to a market data stream
+    Collect a batch as parallel columns: value, data_type, source and timestamp
+    
+    Numeric values are either plain numbers or {"value": number}; anything
+    else becomes NaN and is skipped by the statistics. Timestamps are naive UTC.
+    """
+    count = len(data.data_points)
+    columns = {
+        "value": np.full(count, np.nan),
+        "data_type": np.empty(count, dtype=object),
+        "source": np.empty(count, dtype=object),
+        "timestamp": np.empty(count, dtype="datetime64[us]")
+    }
+    for row, point in enumerate(data.data_points):
+        value = point.value
+        if isinstance(value, dict):
+            value = value.get('value')
+        if isinstance(value, (int, float)):
+            columns["value"][row] = value
+        columns["data_type"][row] = point.data_type
+        columns["source"][row] = point.source
+        timestamp = point.timestamp
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+        columns["timestamp"][row] = timestamp
+    columns["data_type"] = columns["data_type"].astype(str)
+    columns["source"] = columns["source"].astype(str)
+    return columns
+
+def aggregate_alternative_chunk(
+    columns: Dict[str, np.ndarray],
+    group_by: Sequence[str] = (),
+    bucket_seconds: Optional[float] = None
+) -> StreamingAggregator:
+    """
+    Partial statistics of one chunk of alternative data columns
+    
+    A plain module-level function so chunks can be aggregated in a process
+    pool; the partial aggregators merge exactly.
+    """
+    bucket = timedelta(seconds=bucket_seconds) if bucket_seconds else None
+    aggregator = StreamingAggregator(group_by, bucket)
+    count = len(columns["value"])
+    for lo in range(0, count, _ALTERNATIVE_CHUNK_ROWS):
+        aggregator.update(**{name: values[lo:lo + _ALTERNATIVE_CHUNK_ROWS] for name, values in columns.items()})
+    return aggregator
+
+def summarize_alternative_insights(aggregator: StreamingAggregator) -> Dict[str, Any]:
+    """
+    Overall statistics of an aggregator plus one entry per group when grouped
+    
+    In a real implementation, this would perform data analysis, ML predictions, etc.
+    """
+    total = aggregator.total()
+    if total.count == 0:
+        return {}
+    insights = total.summary()
+    if aggregator.group_by or aggregator.bucket is not None:
+        insights["groups"] = aggregator.results()
+    insights["processed_at"] = datetime.utcnow().isoformat()
+    return insights
+
+def compute_alternative_insights(
+    columns: Dict[str, np.ndarray],
+    group_by: Sequence[str] = (),
+    bucket_seconds: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Summary statistics of alternative data columns in one streaming pass
+    
+    The median and percentiles come from a quantile sketch and are accurate to 1%.
+    """
+    return summarize_alternative_insights(aggregate_alternative_chunk(columns, group_by, bucket_seconds))
+
+async def get_streaming_data(symbol: str, interval: float = 1.0) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Generate streaming data for a given symbol, one tick every interval seconds
+    Used when no tick feed is configured; with TICK_SOURCE the stream carries ingested ticks
     """
     logger.info(f"Starting data stream for {symbol}")
     
@@ -292,27 +1051,378 @@ async def get_streaming_data(symbol: str) -> AsyncGenerator[Dict[str, Any], None
             }
             
             yield data_point
-            await asyncio.sleep(1)  # Stream data every second
+            await asyncio.sleep(interval)
     except Exception as e:
         logger.error(f"Error in data stream for {symbol}: {str(e)}")
     finally:
         logger.info(f"Closing data stream for {symbol}")
 
+def stock_metadata(symbol: str) -> Dict[str, str]:
+    """Descriptive (non-price) fields shared by every bar of a stock"""
+    return {"symbol": symbol, "exchange": "NASDAQ"}  # Mock exchange
+
+def crypto_metadata(symbol: str) -> Dict[str, str]:
+    """Descriptive (non-price) fields shared by every bar of a crypto pair"""
+    # Parse base and quote assets from symbol (typically BTCUSDT format)
+    if len(symbol) > 3:
+        base_asset = symbol[:-4] if symbol.endswith("USDT") else symbol[:3]
+        quote_asset = "USDT" if symbol.endswith("USDT") else symbol[3:]
+    else:
+        base_asset = symbol
+        quote_asset = "USD"
+    return {
+        "symbol": symbol,
+        "base_asset": base_asset,
+        "quote_asset": quote_asset,
+        "exchange": "Binance"  # Mock exchange
+    }
+
+def _get_generation_executor() -> Optional[Executor]:
+    """Executor configured by GENERATION_EXECUTOR, or None to run inline"""
+    global _generation_executor
+    if _generation_executor is None and _settings.GENERATION_EXECUTOR != "inline":
+        workers = max(_settings.GENERATION_WORKERS, 1)
+        if _settings.GENERATION_EXECUTOR == "process":
+            _generation_executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            _generation_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="generation")
+    return _generation_executor
+
+async def run_cpu_bound(func: Callable, *args: Any) -> Any:
+    """
+    Run CPU-bound work off the event loop in the generation pool
+    
+    With a process pool, func and its arguments must be picklable
+    (module-level functions and plain data).
+    """
+    executor = _get_generation_executor()
+    if executor is None:
+        return func(*args)
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+def get_market_provider() -> MarketDataProvider:
+    """Provider configured by MARKET_DATA_SOURCE"""
+    global _market_provider
+    if _market_provider is None:
+        _market_provider = create_provider(
+            _settings,
+            {"market": _generate_stock_bars, "crypto": _generate_crypto_bars},
+            run_cpu_bound
+        )
+    return _market_provider
+
+async def close_market_provider() -> None:
+    """Close the provider's connections; the next fetch creates a new one"""
+    global _market_provider
+    if _market_provider is not None:
+        await _market_provider.close()
+        _market_provider = None
+
+def shutdown_generation_executor() -> None:
+    """Stop the generation pool; it is recreated on the next use"""
+    global _generation_executor
+    if _generation_executor is not None:
+        _generation_executor.shutdown(wait=False, cancel_futures=True)
+        _generation_executor = None
+
 # Helper functions
-def _get_timedelta_from_timeframe(timeframe: TimeFrame) -> timedelta:
+_TIMEFRAME_DELTAS = {
+    TimeFrame.ONE_MINUTE: timedelta(minutes=1),
+    TimeFrame.FIVE_MINUTES: timedelta(minutes=5),
+    TimeFrame.FIFTEEN_MINUTES: timedelta(minutes=15),
+    TimeFrame.THIRTY_MINUTES: timedelta(minutes=30),
+    TimeFrame.ONE_HOUR: timedelta(hours=1),
+    TimeFrame.FOUR_HOURS: timedelta(hours=4),
+    TimeFrame.ONE_DAY: timedelta(days=1),
+    TimeFrame.ONE_WEEK: timedelta(weeks=1),
+    TimeFrame.ONE_MONTH: timedelta(days=30)
+}
+
+def get_timedelta_from_timeframe(timeframe: TimeFrame) -> timedelta:
     """Convert TimeFrame enum to timedelta object"""
-    mapping = {
-        TimeFrame.ONE_MINUTE: timedelta(minutes=1),
-        TimeFrame.FIVE_MINUTES: timedelta(minutes=5),
-        TimeFrame.FIFTEEN_MINUTES: timedelta(minutes=15),
-        TimeFrame.THIRTY_MINUTES: timedelta(minutes=30),
-        TimeFrame.ONE_HOUR: timedelta(hours=1),
-        TimeFrame.FOUR_HOURS: timedelta(hours=4),
-        TimeFrame.ONE_DAY: timedelta(days=1),
-        TimeFrame.ONE_WEEK: timedelta(weeks=1),
-        TimeFrame.ONE_MONTH: timedelta(days=30)
+    return _TIMEFRAME_DELTAS.get(timeframe, timedelta(days=1))
+
+def _align_to_bar(value: datetime, time_delta: timedelta) -> datetime:
+    """Floor a datetime to the start of its bar on a grid anchored at the Unix epoch"""
+    epoch = _EPOCH_UTC if value.tzinfo is not None else _EPOCH
+    return epoch + _bar_index(value, time_delta) * time_delta
+
+def normalize_time_range(
+    start_date: datetime,
+    end_date: datetime,
+    timeframe: TimeFrame,
+    now: Optional[datetime] = None
+) -> Tuple[datetime, datetime, Optional[float]]:
+    """
+    Align a query range to the bar boundaries of the timeframe
+    
+    The start is rounded up to the next bar boundary and the end down, so every
+    returned bar opens inside [start_date, end_date]. Boundaries lie on a grid
+    anchored at the Unix epoch rather than the calendar: 1w bars open on
+    Thursdays (1970-01-01 was a Thursday) and 1M bars are fixed 30-day periods.
+    Returns the aligned start and end together with the cache TTL for the result:
+    None (the default TTL) for completed bars, or the seconds until the currently
+    forming bar closes when the range reaches into it.
+    """
+    time_delta = get_timedelta_from_timeframe(timeframe)
+    aligned_start = _align_to_bar(start_date, time_delta)
+    start_date = aligned_start if aligned_start == start_date else aligned_start + time_delta
+    end_date = _align_to_bar(end_date, time_delta)
+    
+    if now is None:
+        now = datetime.now(timezone.utc) if end_date.tzinfo is not None else datetime.utcnow()
+    forming_bar = _align_to_bar(now, time_delta)
+    if end_date < forming_bar:
+        return start_date, end_date, None
+    
+    remaining = (forming_bar + time_delta - now).total_seconds()
+    return start_date, end_date, min(max(remaining, 1.0), _settings.CACHE_EXPIRATION_SECONDS)
+
+def _symbol_seed(symbol: str) -> int:
+    """Deterministic random seed for a symbol"""
+    return sum(ord(c) for c in symbol)
+
+def _series_timestamps(series: Dict[str, np.ndarray], reference: datetime) -> List[datetime]:
+    """
+    Convert the timestamp column of a generated series back to datetime objects,
+    carrying over the timezone of the reference (request) datetime
+    """
+    timestamps = series["timestamp"].astype(datetime).tolist()
+    if reference.tzinfo is not None:
+        timestamps = [ts.replace(tzinfo=timezone.utc) for ts in timestamps]
+    return timestamps
+
+def _bar_index(value: datetime, time_delta: timedelta) -> int:
+    """Index of the bar containing value on the epoch-anchored bar grid"""
+    epoch = _EPOCH_UTC if value.tzinfo is not None else _EPOCH
+    return (value - epoch) // time_delta
+
+def bar_index_range(
+    start_date: datetime,
+    end_date: datetime,
+    time_delta: timedelta,
+    limit: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Half-open range [lo, hi) of bar indices whose open time lies within
+    [start_date, end_date], truncated to at most limit bars
+    """
+    lo = _bar_index(start_date, time_delta)
+    epoch = _EPOCH_UTC if start_date.tzinfo is not None else _EPOCH
+    if epoch + lo * time_delta < start_date:
+        lo += 1
+    hi = max(lo, _bar_index(end_date, time_delta) + 1)
+    if limit is not None:
+        hi = min(hi, lo + max(limit, 0))
+    return lo, hi
+
+def _series_blocks(time_delta: timedelta, lo: int, hi: int) -> List[Tuple[int, int]]:
+    """Bar index ranges of the generation blocks that cover [lo, hi)"""
+    if hi <= lo:
+        return []
+    anchor = _bar_index(_SERIES_ANCHOR, time_delta)
+    first_block = (lo - anchor) // _SERIES_BLOCK_BARS
+    last_block = (hi - 1 - anchor) // _SERIES_BLOCK_BARS
+    return [
+        (anchor + block * _SERIES_BLOCK_BARS, anchor + (block + 1) * _SERIES_BLOCK_BARS)
+        for block in range(first_block, last_block + 1)
+    ]
+
+def _block_key(kind: str, symbol: str, timeframe: TimeFrame, block_lo: int) -> str:
+    """Shared-cache key of one generation block"""
+    return f"{kind}:{symbol}:{timeframe.value}:{block_lo}"
+
+def _slice_blocks(blocks: List[Dict[str, np.ndarray]], time_delta: timedelta, lo: int, hi: int) -> Dict[str, np.ndarray]:
+    """Cut the bars of the index range [lo, hi) out of consecutive blocks, which may have gaps"""
+    columns = concat_columns(blocks)
+    window = slice(*np.searchsorted(columns["timestamp"], _index_timestamps(time_delta, lo, hi)))
+    return {name: values[window] for name, values in columns.items()}
+
+def _index_timestamps(time_delta: timedelta, *indices: int) -> np.ndarray:
+    """Open times of the bars at the given indices of the grid"""
+    step = np.timedelta64(time_delta // timedelta(microseconds=1), "us")
+    return np.datetime64(_EPOCH, "us") + np.array(indices) * step
+
+def _block_levels(
+    entropy: List[int],
+    first_block: int,
+    last_block: int,
+    mu: float,
+    sigma: float
+) -> np.ndarray:
+    """
+    Log-price offsets (relative to the anchor) at the start of blocks
+    first_block .. last_block + 1
+    
+    Block increments after the anchor and before it come from two generators whose
+    prefixes are stable, so a block's level never depends on the requested range.
+    """
+    forward_count = max(last_block + 1, 0)
+    backward_count = max(-first_block, 0)
+    forward = np.random.default_rng(entropy + [1]).normal(mu, sigma, size=forward_count)
+    backward = np.random.default_rng(entropy + [2]).normal(mu, sigma, size=backward_count)
+    levels = np.concatenate((-np.cumsum(backward)[::-1], [0.0], np.cumsum(forward)))
+    return levels[first_block + backward_count:last_block + 2 + backward_count]
+
+def _generation_key(symbol: str, time_delta: timedelta) -> int:
+    """64-bit key of the per-bar draws of a symbol at one generation level"""
+    value = _symbol_seed(symbol) * 0x9E3779B97F4A7C15 + time_delta // timedelta(microseconds=1)
+    for shift, multiplier in ((30, 0xBF58476D1CE4E5B9), (27, 0x94D049BB133111EB)):
+        value = ((value ^ (value >> shift)) * multiplier) & _MASK64
+    return value ^ (value >> 31)
+
+def _bar_uniforms(key: int, indices: np.ndarray, streams: int) -> np.ndarray:
+    """
+    (streams, len(indices)) uniforms in (0, 1) that depend only on key and bar index
+    
+    Draws come from a SplitMix64 hash of (key, index, stream), so the draws of any
+    bar are available without generating the bars before it.
+    """
+    with np.errstate(over="ignore"):
+        x = indices.astype(np.int64).astype(np.uint64)[None, :] * np.uint64(streams)
+        x = x + np.arange(streams, dtype=np.uint64)[:, None] + np.uint64(key)
+        x ^= x >> np.uint64(30)
+        x *= np.uint64(0xBF58476D1CE4E5B9)
+        x ^= x >> np.uint64(27)
+        x *= np.uint64(0x94D049BB133111EB)
+        x ^= x >> np.uint64(31)
+    return ((x >> np.uint64(11)).astype(np.float64) + 0.5) / 2.0 ** 53
+
+def _split_counts(totals: np.ndarray, uniforms: np.ndarray) -> np.ndarray:
+    """Split integer totals (P,) into (P, n) random shares that add up to them exactly"""
+    shares = np.cumsum(0.5 + uniforms, axis=1)
+    shares /= shares[:, -1:]
+    shares[:, -1] = 1.0
+    bounds = np.floor(totals[:, None] * shares).astype(np.int64)
+    return np.diff(bounds, axis=1, prepend=0)
+
+def _split_bars(
+    parents: Dict[str, np.ndarray],
+    parent_lo: int,
+    count: int,
+    key: int,
+    time_delta: timedelta,
+    sigma: float
+) -> Dict[str, np.ndarray]:
+    """
+    Subdivide each parent bar into count bars of time_delta that aggregate back to it
+    
+    Closes follow a Brownian bridge in log price from the parent open to the parent
+    close, clipped to the parent's low and high; each bar opens at the previous
+    close. One bar reaches the parent high and one the parent low, and volume
+    (and trades) are split in integer shares, so resampling the children
+    reproduces the parent bar exactly.
+    """
+    parent_open, parent_high = parents["open"][:, None], parents["high"][:, None]
+    parent_low, parent_close = parents["low"][:, None], parents["close"][:, None]
+    rows = len(parents["timestamp"])
+    indices = parent_lo * count + np.arange(rows * count)
+    draws = _bar_uniforms(key, indices, 7).reshape(7, rows, count)
+    
+    normals = np.sqrt(-2 * np.log(draws[0])) * np.cos(2 * np.pi * draws[1])
+    walk = np.cumsum(sigma * normals, axis=1)
+    fractions = np.arange(1, count + 1) / count
+    log_open = np.log(parent_open)
+    log_close = log_open + fractions * (np.log(parent_close) - log_open) + walk - fractions * walk[:, -1:]
+    close = np.exp(log_close)
+    close[:, -1] = parent_close[:, 0]
+    close = np.clip(close, parent_low, parent_high)
+    open_ = np.concatenate((parent_open, close[:, :-1]), axis=1)
+    
+    high = np.minimum(np.maximum(open_, close) * (1 + draws[2] * sigma), parent_high)
+    low = np.maximum(np.minimum(open_, close) * (1 - draws[3] * sigma), parent_low)
+    high[np.arange(rows), np.argmax(draws[2], axis=1)] = parent_high[:, 0]
+    low[np.arange(rows), np.argmax(draws[3], axis=1)] = parent_low[:, 0]
+    
+    step = np.timedelta64(time_delta // timedelta(microseconds=1), "us")
+    children = {
+        "timestamp": np.datetime64(_EPOCH, "us") + indices * step,
+        "open": open_.ravel(),
+        "high": high.ravel(),
+        "low": low.ravel(),
+        "close": close.ravel(),
+        "volume": _split_counts(parents["volume"], draws[4]).ravel()
+    }
+    if "trades" in parents:
+        children["trades"] = _split_counts(parents["trades"], draws[5]).ravel()
+    return children
+
+def _generate_bars(
+    symbol: str,
+    base_price: float,
+    time_delta: timedelta,
+    lo: int,
+    hi: int,
+    volatility_factor: float = 1.0,
+    trades: bool = False
+) -> Dict[str, np.ndarray]:
+    """
+    Generate OHLCV bars for the bar index range [lo, hi) using geometric Brownian motion
+    
+    Daily bars are the primary series: their closes follow a GBM from
+    _SERIES_ANCHOR (see _block_levels, with one bar per block) and their other
+    columns come from per-bar draws. Intraday bars are produced level by level
+    (_GENERATION_LEVELS) by subdividing the bars of the level above, and weekly
+    and monthly bars are aggregated from daily bars. Every bar therefore has the
+    same value regardless of which range or timeframe it was requested in, and
+    resampling fine bars reproduces the coarse bars exactly. Columns are returned
+    as a dict of arrays (OHLCV_COLUMNS, plus an integer trades column with
+    trades=True); timestamps are naive UTC datetime64[us] values.
+    """
+    day = timedelta(days=1)
+    count = max(hi - lo, 0)
+    if time_delta > day:
+        if time_delta % day:
+            raise ValueError(f"Bars of {time_delta} do not span whole days")
+        ratio = time_delta // day
+        daily = _generate_bars(symbol, base_price, day, lo * ratio, (lo + count) * ratio, volatility_factor, trades)
+        return resample_ohlcv(daily, time_delta)
+    
+    # Parameters for the geometric Brownian motion
+    mu = 0.0001 * time_delta.total_seconds() / 86400  # Expected return (annualized)
+    sigma = 0.01 * volatility_factor * np.sqrt(time_delta.total_seconds() / 86400)  # Volatility
+    key = _generation_key(symbol, time_delta)
+    
+    if time_delta < day:
+        if time_delta not in _GENERATION_LEVELS:
+            raise ValueError(f"No generation level for bars of {time_delta}")
+        parent_delta = _GENERATION_LEVELS[_GENERATION_LEVELS.index(time_delta) - 1]
+        ratio = parent_delta // time_delta
+        parent_lo, parent_hi = lo // ratio, -(-(lo + count) // ratio)
+        parents = _generate_bars(symbol, base_price, parent_delta, parent_lo, parent_hi, volatility_factor, trades)
+        children = _split_bars(parents, parent_lo, ratio, key, time_delta, sigma)
+        offset = lo - parent_lo * ratio
+        return {name: values[offset:offset + count] for name, values in children.items()}
+    
+    step = np.timedelta64(time_delta // timedelta(microseconds=1), "us")
+    indices = np.arange(lo, lo + count)
+    anchor = _bar_index(_SERIES_ANCHOR, time_delta)
+    entropy = [_symbol_seed(symbol), time_delta // timedelta(microseconds=1)]
+    # A bar closes at the level its successor opens with
+    levels = _block_levels(entropy, lo - anchor, lo + count - 1 - anchor, mu, sigma)[1:]
+    close = base_price * np.exp(levels)
+    draws = _bar_uniforms(key, indices, 4)
+    
+    # Generate open, high, low as relative spreads around the close price
+    open_ = close * (1 + (draws[0] - 0.5) * sigma)
+    high = np.maximum(open_, close) * (1 + draws[1] * sigma)
+    low = np.minimum(open_, close) * (1 - draws[2] * sigma)
+    
+    # Generate volume, scaled so the finest bars trade about close * 1000
+    volume_base = np.floor(close * 1000) * (day // _GENERATION_LEVELS[-1])
+    volume = (volume_base * (1 + (draws[3] * 2 - 0.5))).astype(np.int64)
+    
+    bars = {
+        "timestamp": np.datetime64(_EPOCH, "us") + indices * step,
+        "open": open_,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": volume
     }
-    return mapping.get(timeframe, timedelta(days=1))
+    if trades:
+        bars["trades"] = volume // 100
+    return bars
 
 def _generate_price_series(
     symbol: str,
@@ -320,59 +1430,76 @@ def _generate_price_series(
     start_date: datetime,
     end_date: datetime,
     time_delta: timedelta,
-    limit: int = 1000,
+    limit: Optional[int] = 1000,
     volatility_factor: float = 1.0
-) -> Dict[datetime, Dict[str, float]]:
+) -> Dict[str, np.ndarray]:
     """
     Generate a series of price data points using geometric Brownian motion
+    
+    Covers the bars of the grid that open within [start_date, end_date], at most
+    limit of them. See _generate_bars for the columnar result.
     """
-    # Seed random based on symbol for consistent results
-    random.seed(sum(ord(c) for c in symbol))
-    np.random.seed(sum(ord(c) for c in symbol))
+    lo, hi = bar_index_range(start_date, end_date, time_delta, limit)
+    return _generate_bars(symbol, base_price, time_delta, lo, hi, volatility_factor)
+
+def _generate_sentiment_matrix(
+    symbol: str,
+    start_date: datetime,
+    end_date: datetime,
+    sources: List[str]
+) -> Dict[str, Any]:
+    """
+    Generate daily sentiment for every source in one vectorized pass
     
-    # Parameters for the geometric Brownian motion
-    mu = 0.0001 * time_delta.total_seconds() / 86400  # Expected return (annualized)
-    sigma = 0.01 * volatility_factor * np.sqrt(time_delta.total_seconds() / 86400)  # Volatility
+    Scores between -1 and 1 follow a shared trend over the period plus
+    per-source noise. Each source draws from its own generator seeded by
+    (symbol, source), so filtering sources does not change the others' values.
+    """
+    days = (end_date - start_date).days + 1 if end_date >= start_date else 0
+    timestamps = np.datetime64(start_date.replace(tzinfo=None), "us") + np.arange(days) * np.timedelta64(1, "D")
     
-    # Generate time points
-    time_points = []
-    current_time = start_date
-    while current_time <= end_date and len(time_points) < limit:
-        time_points.append(current_time)
-        current_time += time_delta
-    
-    # Limit to the requested number of points
-    time_points = time_points[:limit]
-    
-    # Generate price path
-    price_path = [base_price]
-    for i in range(1, len(time_points)):
-        # Generate daily returns using GBM
-        random_return = np.random.normal(mu, sigma)
-        new_price = price_path[-1] * np.exp(random_return)
-        price_path.append(new_price)
-    
-    # Create the price series with OHLC data
-    price_series = {}
-    for i, timestamp in enumerate(time_points):
-        close_price = price_path[i]
-        
-        # Generate open, high, low based on close price
-        daily_volatility = sigma * close_price
-        open_price = close_price * (1 + random.uniform(-0.5, 0.5) * daily_volatility)
-        high_price = max(open_price, close_price) * (1 + random.uniform(0, 1) * daily_volatility)
-        low_price = min(open_price, close_price) * (1 - random.uniform(0, 1) * daily_volatility)
-        
-        # Generate volume
-        volume_base = int(close_price * 1000)
-        volume = int(volume_base * (1 + random.uniform(-0.5, 1.5)))
-        
-        price_series[timestamp] = {
-            "open": open_price,
-            "high": high_price,
-            "low": low_price,
-            "close": close_price,
-            "volume": volume
-        }
+    # Natural time correlation (trending) across the period
+    day_factor = np.arange(days) / max(1, (end_date - start_date).days)
+    trend = 0.2 * np.sin(day_factor * 6)
+    
+    noise = np.empty((days, len(sources)))
+    volume = np.empty((days, len(sources)), dtype=np.int64)
+    for column, source in enumerate(sources):
+        rng = np.random.default_rng([_symbol_seed(symbol), _symbol_seed(source)])
+        noise[:, column] = rng.uniform(-0.3, 0.3, size=days)
+        # Volume of mentions/data points that contributed to the sentiment
+        volume[:, column] = rng.uniform(100, 10000, size=days).astype(np.int64)
     
-    return price_series
\ No newline at end of file
+    score = np.clip(trend[:, None] + noise, -1.0, 1.0)
+    return {
+        "timestamp": timestamps,
+        "sources": list(sources),
+        "score": score,
+        "volume": volume,
+        "momentum": score * (1 + day_factor)[:, None]
+    }
+
+def _stock_base_price(symbol: str) -> float:
+    """Base price for the asset (random but deterministic for the same symbol)"""
+    return sum(ord(c) for c in symbol) % 100 + 50
+
+def _crypto_base_price(symbol: str) -> float:
+    """Base price for the crypto (random but deterministic for the same symbol)"""
+    base_price = sum(ord(c) for c in symbol) % 1000 + 100
+    if "BTC" in symbol:
+        base_price *= 30  # Make BTC much higher
+    elif "ETH" in symbol:
+        base_price *= 3   # Make ETH somewhat higher
+    return base_price
+
+def _generate_stock_bars(symbol: str, time_delta: timedelta, lo: int, hi: int) -> Dict[str, np.ndarray]:
+    """Generate stock bars for the bar index range [lo, hi)"""
+    return _generate_bars(symbol, _stock_base_price(symbol), time_delta, lo, hi)
+
+def _generate_crypto_bars(symbol: str, time_delta: timedelta, lo: int, hi: int) -> Dict[str, np.ndarray]:
+    """Generate crypto bars for the bar index range [lo, hi), with a trades column"""
+    # Higher volatility for crypto
+    series = _generate_bars(symbol, _crypto_base_price(symbol), time_delta, lo, hi, volatility_factor=1.5, trades=True)
+    # Different volume scale for crypto; a power of two keeps aggregated volumes exact
+    series["volume"] = series["volume"] / 8
+    return series
@@ -0,0 +1,388 @@
+# indicators.py
+import asyncio
+import logging
+import weakref
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+from models import TimeFrame
+from metrics import timed_stage
+from data_processor import (
+    fetch_market_series, normalize_time_range,
+    get_timedelta_from_timeframe, data_cache
+)
+
+logger = logging.getLogger("bavest-api")
+
+# Indicator name -> output columns it produces
+INDICATOR_OUTPUTS = {
+    "sma": ["sma"],
+    "ema": ["ema"],
+    "rsi": ["rsi"],
+    "macd": ["macd", "macd_signal", "macd_hist"],
+    "bollinger": ["bb_middle", "bb_upper", "bb_lower"],
+    "vwap": ["vwap"]
+}
+
+# Running values (EMA, MACD, RSI) restart every _CHAIN_BARS bars of the
+# epoch-anchored bar grid, each chain after the same warm-up, so a bar's values
+# do not depend on where a request or the cached history started
+_CHAIN_BARS = 1024
+_EPOCH64 = np.datetime64("1970-01-01", "us")
+
+# One lock per cached state; a lock lives as long as someone holds or awaits it
+_state_locks: "weakref.WeakValueDictionary[Hashable, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+def _ema(values: np.ndarray, alpha: float, previous: Optional[float] = None) -> np.ndarray:
+    """
+    Exponential moving average y[t] = alpha * x[t] + (1 - alpha) * y[t-1]
+
+    Continues from `previous` when given, otherwise starts at the first value.
+    """
+    if len(values) == 0:
+        return values.astype(float)
+    if previous is None:
+        previous = values[0]
+    smoothed, _ = lfilter([alpha], [1.0, alpha - 1.0], values, zi=[(1.0 - alpha) * previous])
+    return smoothed
+
+def _rolling(values: np.ndarray, tail: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling mean and population std over `window` bars for each new value,
+    using `tail` (the preceding values) to complete the first windows
+    """
+    extended = np.concatenate((tail, values))
+    mean = np.full(len(values), np.nan)
+    std = np.full(len(values), np.nan)
+    first = max(window - 1, len(tail))
+    if len(extended) >= window and first < len(extended):
+        windows = sliding_window_view(extended, window)[first - (window - 1):]
+        mean[first - len(tail):] = windows.mean(axis=1)
+        std[first - len(tail):] = windows.std(axis=1)
+    return mean, std
+
+class IndicatorState:
+    """
+    Incrementally maintained indicator values for one symbol and timeframe
+
+    Keeps the computed output columns for every committed bar plus the running
+    state (EMA levels, RSI averages, trailing closes, VWAP sums) needed to extend
+    them. Output buffers grow geometrically, so appending k bars costs
+    O(k + window) instead of a full recomputation. VWAP restarts with every
+    session: the bars whose open times fall in the same `session` unit of
+    datetime64 (a UTC day by default).
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        num_std: float = 2.0,
+        rsi_period: int = 14,
+        macd_fast: int = 12,
+        macd_slow: int = 26,
+        macd_signal: int = 9,
+        session: str = "D"
+    ):
+        self.window = window
+        self.num_std = num_std
+        self.rsi_period = rsi_period
+        self.macd_fast = macd_fast
+        self.macd_slow = macd_slow
+        self.macd_signal = macd_signal
+        self.session = session
+
+        self._size = 0
+        self._timestamps = np.empty(0, dtype="datetime64[us]")
+        self._outputs = {
+            name: np.empty(0)
+            for names in INDICATOR_OUTPUTS.values() for name in names
+        }
+        self._running = self._initial_running()
+
+    @staticmethod
+    def _initial_running() -> Dict[str, Any]:
+        return {
+            "tail": np.empty(0),
+            "bars": 0,
+            "last_close": None,
+            "ema": None,
+            "fast": None,
+            "slow": None,
+            "signal": None,
+            "avg_gain": None,
+            "avg_loss": None,
+            "session": None,
+            "price_volume": 0.0,
+            "volume": 0.0
+        }
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[:self._size]
+
+    @property
+    def outputs(self) -> Dict[str, np.ndarray]:
+        return {name: values[:self._size] for name, values in self._outputs.items()}
+
+    @property
+    def first_timestamp(self) -> Optional[np.datetime64]:
+        return self._timestamps[0] if self._size else None
+
+    @property
+    def last_timestamp(self) -> Optional[np.datetime64]:
+        return self._timestamps[self._size - 1] if self._size else None
+
+    @property
+    def warmup(self) -> int:
+        """Bars a chain runs through before its values are used"""
+        return 10 * max(self.window, self.rsi_period, self.macd_slow + self.macd_signal)
+
+    def warmup_start(self, boundary: int, step: np.timedelta64) -> int:
+        """
+        Index of the first warm-up bar of the chain starting at bar index boundary
+
+        The warm-up covers at least `warmup` bars and reaches back to the first
+        bar of the boundary's session, so the session VWAP is complete.
+        """
+        session_open = (_EPOCH64 + boundary * step).astype(f"datetime64[{self.session}]").astype("datetime64[us]")
+        first_in_session = -int((_EPOCH64 - session_open) // step)
+        return min(boundary - self.warmup, first_in_session)
+
+    def restart(self, warmup: Dict[str, np.ndarray]) -> None:
+        """
+        Start a new chain of running values from the warm-up bars alone
+
+        Committed outputs are kept; the warm-up bars are not committed.
+        """
+        _, self._running = self._advance(warmup, self._initial_running())
+
+    def extend(self, columns: Dict[str, np.ndarray], commit: bool = True) -> Dict[str, np.ndarray]:
+        """
+        Compute indicators for bars that follow the committed ones
+
+        With commit=False (e.g. for a still forming bar) the state is left untouched.
+        """
+        outputs, running = self._advance(columns, self._running)
+        if commit:
+            self._running = running
+            self._append(columns["timestamp"], outputs)
+        return outputs
+
+    def _append(self, timestamps: np.ndarray, outputs: Dict[str, np.ndarray]) -> None:
+        count = len(timestamps)
+        if self._size + count > len(self._timestamps):
+            capacity = max(2 * len(self._timestamps), self._size + count, 1024)
+            self._timestamps = np.resize(self._timestamps, capacity)
+            self._outputs = {name: np.resize(values, capacity) for name, values in self._outputs.items()}
+        window = slice(self._size, self._size + count)
+        self._timestamps[window] = timestamps
+        for name, values in outputs.items():
+            self._outputs[name][window] = values
+        self._size += count
+
+    def _advance(
+        self,
+        columns: Dict[str, np.ndarray],
+        running: Dict[str, Any]
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        close = columns["close"].astype(float)
+        count = len(close)
+        if count == 0:
+            return {name: np.empty(0) for name in self._outputs}, running
+        outputs = {}
+
+        # SMA and Bollinger Bands share the rolling window
+        mean, std = _rolling(close, running["tail"], self.window)
+        outputs["sma"] = mean
+        outputs["bb_middle"] = mean
+        outputs["bb_upper"] = mean + self.num_std * std
+        outputs["bb_lower"] = mean - self.num_std * std
+
+        # EMA
+        ema = _ema(close, 2.0 / (self.window + 1), running["ema"])
+        outputs["ema"] = ema
+
+        # MACD
+        fast = _ema(close, 2.0 / (self.macd_fast + 1), running["fast"])
+        slow = _ema(close, 2.0 / (self.macd_slow + 1), running["slow"])
+        macd = fast - slow
+        signal = _ema(macd, 2.0 / (self.macd_signal + 1), running["signal"])
+        outputs["macd"] = macd
+        outputs["macd_signal"] = signal
+        outputs["macd_hist"] = macd - signal
+
+        # RSI with Wilder smoothing of gains and losses; the very first bar has
+        # no prior close and counts as unchanged
+        last_close = running["last_close"]
+        previous = close[:1] if last_close is None else np.array([last_close])
+        changes = np.diff(np.concatenate((previous, close)))
+        alpha = 1.0 / self.rsi_period
+        avg_gain = _ema(np.clip(changes, 0, None), alpha, running["avg_gain"])
+        avg_loss = _ema(np.clip(-changes, 0, None), alpha, running["avg_loss"])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+        bar_numbers = running["bars"] + np.arange(count)
+        outputs["rsi"] = np.where(bar_numbers >= self.rsi_period, rsi, np.nan)
+
+        # VWAP since the start of each bar's session; sums are carried over from
+        # the running state while the session continues
+        typical = (columns["high"] + columns["low"] + columns["close"]) / 3
+        volume = columns["volume"].astype(float)
+        price_volume = typical * volume
+        sessions = columns["timestamp"].astype(f"datetime64[{self.session}]")
+        starts = np.flatnonzero(sessions[1:] != sessions[:-1]) + 1
+        carried = running["session"] is not None and sessions[0] == running["session"]
+        carry_pv, carry_volume = (running["price_volume"], running["volume"]) if carried else (0.0, 0.0)
+        cumulative_pv = np.empty(count)
+        cumulative_volume = np.empty(count)
+        for first, last in zip(np.concatenate(([0], starts)), np.concatenate((starts, [count]))):
+            # Summing onto the carried value keeps the additions in bar order
+            cumulative_pv[first:last] = np.cumsum(np.concatenate(([carry_pv], price_volume[first:last])))[1:]
+            cumulative_volume[first:last] = np.cumsum(np.concatenate(([carry_volume], volume[first:last])))[1:]
+            carry_pv, carry_volume = 0.0, 0.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            outputs["vwap"] = np.where(cumulative_volume > 0, cumulative_pv / cumulative_volume, np.nan)
+
+        tail = np.concatenate((running["tail"], close))
+        return outputs, {
+            "tail": tail[len(tail) - (self.window - 1):] if self.window > 1 else np.empty(0),
+            "bars": running["bars"] + count,
+            "last_close": float(close[-1]),
+            "ema": float(ema[-1]),
+            "fast": float(fast[-1]),
+            "slow": float(slow[-1]),
+            "signal": float(signal[-1]),
+            "avg_gain": float(avg_gain[-1]),
+            "avg_loss": float(avg_loss[-1]),
+            "session": sessions[-1],
+            "price_volume": float(cumulative_pv[-1]),
+            "volume": float(cumulative_volume[-1])
+        }
+
+def compute_indicators(columns: Dict[str, np.ndarray], **params: Any) -> Dict[str, np.ndarray]:
+    """Compute every indicator over a whole series from scratch"""
+    return IndicatorState(**params).extend(columns)
+
+def _extend_state(
+    state: IndicatorState,
+    series: Dict[str, np.ndarray],
+    next_bar: int,
+    last_bar: int,
+    forming_bar: int,
+    step: np.timedelta64
+) -> Optional[Tuple[np.ndarray, Dict[str, np.ndarray]]]:
+    """
+    Commit the completed bars of series from bar index next_bar through last_bar
+
+    Chains are restarted at their boundaries from their warm-up bars. Returns the
+    forming bar's timestamp and values, evaluated without committing it, if the
+    series has one.
+    """
+    # Nothing past the forming bar is committed, so no chain restarts after it
+    last_bar = min(last_bar, forming_bar)
+    indices = (series["timestamp"] - _EPOCH64) // step
+
+    def rows(lo: int, hi: int) -> Dict[str, np.ndarray]:
+        window = slice(int(np.searchsorted(indices, lo)), int(np.searchsorted(indices, hi)))
+        return {name: values[window] for name, values in series.items()}
+
+    first_boundary = -(-next_bar // _CHAIN_BARS) * _CHAIN_BARS
+    edges = sorted({next_bar, *range(first_boundary, last_bar + 1, _CHAIN_BARS)}) + [last_bar + 1]
+    preview = None
+    for seg_lo, seg_hi in zip(edges, edges[1:]):
+        if seg_lo % _CHAIN_BARS == 0:
+            state.restart(rows(state.warmup_start(seg_lo, step), seg_lo))
+        state.extend(rows(seg_lo, min(seg_hi, forming_bar)))
+        if seg_lo <= forming_bar < seg_hi:
+            forming = rows(forming_bar, seg_hi)
+            if len(forming["timestamp"]):
+                preview = (forming["timestamp"], state.extend(forming, commit=False))
+    return preview
+
+async def fetch_indicators(
+    symbol: str,
+    start_date: datetime,
+    end_date: datetime,
+    timeframe: TimeFrame = TimeFrame.ONE_DAY,
+    indicators: Optional[List[str]] = None,
+    **params: Any
+) -> Dict[str, Any]:
+    """
+    Compute the requested indicators over the market series of a symbol
+
+    Indicator state is cached per (symbol, timeframe, parameters). A request only
+    fetches bars after the last committed one and extends the state with them;
+    the forming bar is evaluated without being committed. Requests starting
+    before the cached history rebuild the state from the chain containing their
+    start. Running values restart at fixed chain boundaries after a warm-up and
+    VWAP restarts every session (a UTC day for intraday bars, a year otherwise),
+    so every bar gets the same values whichever request computed it.
+    Returns a columnar dict: timestamp plus one array per indicator output.
+    """
+    names = indicators or list(INDICATOR_OUTPUTS)
+    unknown = [name for name in names if name not in INDICATOR_OUTPUTS]
+    if unknown:
+        raise ValueError(f"Unknown indicators: {', '.join(unknown)}")
+
+    start_date, end_date, _ = normalize_time_range(start_date, end_date, timeframe)
+    time_delta = get_timedelta_from_timeframe(timeframe)
+    step = np.timedelta64(time_delta // timedelta(microseconds=1), "us")
+    start64 = np.datetime64(start_date.replace(tzinfo=None), "us")
+    end64 = np.datetime64(end_date.replace(tzinfo=None), "us")
+    forming64 = np.datetime64(normalize_time_range(datetime.utcnow(), datetime.utcnow(), timeframe)[1], "us")
+    last_bar = int((end64 - _EPOCH64) // step)
+    session = "D" if time_delta < timedelta(days=1) else "Y"
+
+    cache_key = ("indicators", symbol, timeframe.value, tuple(sorted(params.items())))
+    lock = _state_locks.get(cache_key)
+    if lock is None:
+        lock = _state_locks[cache_key] = asyncio.Lock()
+
+    # Reading, extending and storing the state is one step per key, so concurrent
+    # requests never extend the same state twice or drop each other's bars
+    async with lock:
+        state = data_cache.get(cache_key)
+        if state is None or start64 < state.first_timestamp:
+            state = IndicatorState(session=session, **params)
+            next_bar = int((start64 - _EPOCH64) // step) // _CHAIN_BARS * _CHAIN_BARS
+        else:
+            next_bar = int((state.last_timestamp - _EPOCH64) // step) + 1
+
+        preview = None
+        if next_bar <= last_bar:
+            first_boundary = -(-next_bar // _CHAIN_BARS) * _CHAIN_BARS
+            fetch_from = min(
+                [next_bar] + [state.warmup_start(boundary, step)
+                              for boundary in range(first_boundary, last_bar + 1, _CHAIN_BARS)]
+            )
+            fetch_from = (_EPOCH64 + fetch_from * step).astype(datetime)
+            if start_date.tzinfo is not None:
+                fetch_from = fetch_from.replace(tzinfo=start_date.tzinfo)
+            series = (await fetch_market_series([symbol], fetch_from, end_date, timeframe, limit=None))[symbol]
+            with timed_stage("indicators"):
+                forming_bar = int((forming64 - _EPOCH64) // step)
+                preview = _extend_state(state, series, next_bar, last_bar, forming_bar, step)
+            data_cache.set(cache_key, state)
+
+    # Slice the committed history to the requested window and append the forming bar
+    window = slice(
+        int(np.searchsorted(state.timestamps, start64)),
+        int(np.searchsorted(state.timestamps, end64, side="right"))
+    )
+    timestamps = [state.timestamps[window]]
+    outputs = {
+        name: [state.outputs[name][window]]
+        for indicator in names for name in INDICATOR_OUTPUTS[indicator]
+    }
+    if preview is not None:
+        timestamps.append(preview[0])
+        for name in outputs:
+            outputs[name].append(preview[1][name])
+
+    result = {"timestamp": np.concatenate(timestamps)}
+    result.update({name: np.concatenate(parts) for name, parts in outputs.items()})
+    return result
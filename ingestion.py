@@ -0,0 +1,198 @@
+# ingestion.py
+import asyncio
+import json
+import logging
+from datetime import timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import msgpack
+except ImportError:  # msgpack uploads are optional
+    msgpack = None
+
+from aggregators import StreamingAggregator
+from config import get_settings
+from data_processor import aggregate_alternative_chunk, run_cpu_bound, summarize_alternative_insights
+
+logger = logging.getLogger("bavest-api")
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Fields every uploaded record must carry
+REQUIRED_FIELDS = ("data_type", "source", "timestamp", "value")
+
+async def iter_ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Parse an NDJSON byte stream as it arrives
+
+    Yields (line number, record) pairs; a line that is not valid JSON yields its
+    ValueError instead of a record. Blank lines are skipped.
+    """
+    # Only the unfinished last line is kept between chunks. bytearray appends
+    # and front deletions are amortized O(1) and only new chunks are searched
+    # for newlines, so a line split over many chunks costs linear time.
+    buffer = bytearray()
+    line_number = 0
+    async for chunk in chunks:
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            buffer += chunk
+            continue
+        cut = len(buffer) + end
+        buffer += chunk
+        lines = bytes(buffer[:cut]).split(b"\n")
+        del buffer[:cut + 1]
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, _parse_json_line(line)
+    if buffer.strip():
+        yield line_number + 1, _parse_json_line(buffer)
+
+async def iter_msgpack_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Parse a stream of concatenated msgpack objects as it arrives
+
+    Records are numbered from 1 in place of line numbers. Corrupt data ends the
+    stream with a ValueError for the next record number.
+    """
+    if msgpack is None:
+        raise RuntimeError("msgpack uploads require the 'msgpack' package")
+    unpacker = msgpack.Unpacker(raw=False, timestamp=3)
+    record_number = 0
+    async for chunk in chunks:
+        unpacker.feed(chunk)
+        try:
+            for record in unpacker:
+                record_number += 1
+                yield record_number, record
+        except (ValueError, msgpack.UnpackException) as e:
+            yield record_number + 1, ValueError(f"Invalid msgpack data: {str(e)}")
+            return
+
+def _parse_json_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {str(e)}")
+
+def _numeric_value(value: Any) -> float:
+    if isinstance(value, dict):
+        value = value.get("value")
+    return float(value) if isinstance(value, (int, float)) else np.nan
+
+def validate_alternative_records(
+    records: List[Tuple[int, Any]]
+) -> Tuple[Dict[str, np.ndarray], List[Dict[str, Any]]]:
+    """
+    Validate a chunk of parsed records column by column
+
+    Returns the valid rows as the parallel columns the aggregators consume
+    (value, data_type, source, timestamp) plus one error per rejected line.
+    Values follow AlternativeDataPoint: numbers, strings, booleans or objects,
+    with only numbers (or {"value": number}) contributing to the statistics.
+    """
+    errors = []
+    rows = []
+    for line, record in records:
+        if isinstance(record, Exception):
+            errors.append({"line": line, "error": str(record)})
+        elif not isinstance(record, dict):
+            errors.append({"line": line, "error": "Record must be an object"})
+        else:
+            rows.append((line, record))
+
+    lines = np.array([line for line, _ in rows], dtype=np.int64)
+    frame = pd.DataFrame.from_records([record for _, record in rows], columns=list(REQUIRED_FIELDS))
+    problems = pd.Series("", index=frame.index)
+
+    for field in REQUIRED_FIELDS:
+        missing = frame[field].isna().to_numpy()
+        problems[missing & (problems == "")] = f"Missing field '{field}'"
+    for field in ("data_type", "source"):
+        not_text = ~frame[field].map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+        problems[not_text & (problems == "")] = f"Field '{field}' must be a string"
+    timestamps = pd.to_datetime(frame["timestamp"], errors="coerce", utc=True, format="ISO8601")
+    problems[timestamps.isna().to_numpy() & (problems == "")] = "Field 'timestamp' must be an ISO 8601 datetime"
+    invalid_value = ~frame["value"].map(lambda value: isinstance(value, (int, float, str, bool, dict))).to_numpy(dtype=bool)
+    problems[invalid_value & (problems == "")] = "Field 'value' must be a number, string, boolean or object"
+
+    rejected = (problems != "").to_numpy()
+    errors.extend(
+        {"line": int(line), "error": problem}
+        for line, problem in zip(lines[rejected], problems[rejected])
+    )
+    errors.sort(key=lambda error: error["line"])
+
+    valid = frame[~rejected]
+    columns = {
+        "value": valid["value"].map(_numeric_value).to_numpy(dtype=float),
+        "data_type": valid["data_type"].to_numpy(dtype=str),
+        "source": valid["source"].to_numpy(dtype=str),
+        "timestamp": timestamps[~rejected].dt.tz_localize(None).to_numpy(dtype="datetime64[us]")
+    }
+    return columns, errors
+
+async def ingest_alternative_stream(
+    records: AsyncIterator[Tuple[int, Any]],
+    group_by: Sequence[str] = (),
+    bucket_seconds: Optional[float] = None,
+    chunk_rows: Optional[int] = None,
+    max_errors: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Validate and aggregate uploaded records chunk by chunk as they are parsed
+
+    Each validated chunk is aggregated in the generation pool while the next
+    one is read; partial aggregators are merged in upload order. At most
+    max_errors per-line errors are reported, all of them are counted.
+    """
+    settings = get_settings()
+    chunk_rows = chunk_rows or settings.INGEST_CHUNK_ROWS
+    max_errors = settings.INGEST_MAX_ERRORS if max_errors is None else max_errors
+    in_flight_limit = max(settings.GENERATION_WORKERS, 1)
+
+    bucket = timedelta(seconds=bucket_seconds) if bucket_seconds else None
+    aggregator = StreamingAggregator(group_by, bucket)
+    pending: List[asyncio.Future] = []
+    errors: List[Dict[str, Any]] = []
+    counts = {"received": 0, "accepted": 0, "rejected": 0}
+
+    async def submit(chunk: List[Tuple[int, Any]]) -> None:
+        columns, chunk_errors = validate_alternative_records(chunk)
+        counts["received"] += len(chunk)
+        counts["accepted"] += len(columns["value"])
+        counts["rejected"] += len(chunk_errors)
+        errors.extend(chunk_errors[:max(max_errors - len(errors), 0)])
+        if len(columns["value"]):
+            pending.append(asyncio.ensure_future(
+                run_cpu_bound(aggregate_alternative_chunk, columns, tuple(group_by), bucket_seconds)
+            ))
+        # Bound the number of chunks held in memory while workers catch up
+        while len(pending) >= in_flight_limit:
+            aggregator.merge(await pending.pop(0))
+
+    try:
+        chunk = []
+        async for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_rows:
+                await submit(chunk)
+                chunk = []
+        if chunk:
+            await submit(chunk)
+        while pending:
+            aggregator.merge(await pending.pop(0))
+    finally:
+        for future in pending:
+            future.cancel()
+
+    return {
+        **counts,
+        "errors": errors,
+        "errors_truncated": counts["rejected"] > len(errors),
+        "insights": summarize_alternative_insights(aggregator)
+    }
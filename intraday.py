@@ -0,0 +1,227 @@
+# intraday.py
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+_EPOCH = datetime(1970, 1, 1)
+
+def _isoformat(value: np.datetime64) -> str:
+    return (_EPOCH + timedelta(microseconds=int(value.astype("datetime64[us]").astype(np.int64)))).isoformat()
+
+def bar_quote(symbol: str, columns: Dict[str, np.ndarray], position: int = -1) -> Optional[Dict[str, Any]]:
+    """Quote of a symbol from one bar of its series: the bar's close and values"""
+    if len(columns["timestamp"]) == 0:
+        return None
+    bar = {"timestamp": _isoformat(columns["timestamp"][position])}
+    bar.update({name: values[position].item() for name, values in columns.items() if name != "timestamp"})
+    return {
+        "symbol": symbol,
+        "price": bar["close"],
+        "timestamp": bar["timestamp"],
+        "bar": bar,
+        "source": "bars"
+    }
+
+class BarRing:
+    """
+    Fixed-capacity ring of the most recent consecutive bars of one series
+
+    Every bar is written twice, at its slot and at slot + capacity, so any run
+    of up to capacity consecutive bars is one contiguous slice of the arrays:
+    appends are O(1) and reads are zero-copy views. Bars from index
+    complete_hi on are still forming and only valid until forming_expires.
+    Once a live feed updates the forming bar, other writers no longer
+    overwrite it.
+    """
+
+    def __init__(self, capacity: int, layout: Dict[str, type]):
+        self.capacity = capacity
+        self._columns = {"timestamp": np.zeros(2 * capacity, dtype="datetime64[us]")}
+        self._columns.update({name: np.zeros(2 * capacity, dtype=dtype) for name, dtype in layout.items()})
+        self.lo = 0
+        self.hi = 0
+        self.complete_hi = 0
+        self.forming_expires = 0.0
+        self.live_forming: Optional[int] = None
+        # Price and epoch microseconds of the last trade from the live feed
+        self.last_trade: Optional[Tuple[float, int]] = None
+
+    @property
+    def nbytes(self) -> int:
+        return sum(values.nbytes for values in self._columns.values())
+
+    def write(
+        self,
+        lo: int,
+        columns: Dict[str, np.ndarray],
+        complete_hi: int,
+        expires: float = math.inf,
+        live: bool = False
+    ) -> None:
+        """
+        Write the bars starting at index lo; bars from complete_hi on are forming
+
+        The ring keeps the newest capacity bars of its contents and the write.
+        A write that neither overlaps nor follows the ring restarts it, unless
+        it is older than everything the ring holds.
+        """
+        hi = lo + len(columns["timestamp"])
+        if not live and self.live_forming is not None:
+            hi = min(hi, self.live_forming)
+        if hi <= lo:
+            return
+        if self.hi > self.lo and hi < self.lo:
+            return
+        if self.hi == self.lo or lo > self.hi:
+            self.lo = self.hi = self.complete_hi = lo
+
+        new_hi = max(self.hi, hi)
+        new_lo = max(min(self.lo, lo), new_hi - self.capacity)
+        start = max(lo, new_lo)
+        offset, count = start - lo, hi - start
+        slot = start % self.capacity
+        first = min(count, self.capacity - slot)
+        rest = count - first
+        for name, target in self._columns.items():
+            values = columns[name][offset:offset + count]
+            target[slot:slot + first] = values[:first]
+            target[slot + self.capacity:slot + self.capacity + first] = values[:first]
+            if rest:
+                target[:rest] = values[first:]
+                target[self.capacity:self.capacity + rest] = values[first:]
+        self.lo, self.hi = new_lo, new_hi
+
+        self.complete_hi = max(self.complete_hi, min(hi, complete_hi))
+        if hi > complete_hi:
+            self.forming_expires = expires
+            if live:
+                self.live_forming = complete_hi
+
+    def window(self, lo: int, hi: int) -> Optional[Dict[str, np.ndarray]]:
+        """Read-only views of the bars [lo, hi), or None unless the ring holds all of them"""
+        if lo < self.lo or hi > self.hi or hi < lo:
+            return None
+        if hi > self.complete_hi and time.monotonic() >= self.forming_expires:
+            return None
+        start = lo % self.capacity
+        views = {}
+        for name, values in self._columns.items():
+            view = values[start:start + hi - lo]
+            view.flags.writeable = False
+            views[name] = view
+        return views
+
+    def quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Last trade (or close) and forming bar, or None without a fresh forming bar"""
+        if self.hi <= self.complete_hi or time.monotonic() >= self.forming_expires:
+            return None
+        quote = bar_quote(symbol, self._columns, (self.hi - 1) % self.capacity)
+        if self.last_trade is not None and self.live_forming is not None:
+            price, time_us = self.last_trade
+            quote["price"] = price
+            quote["timestamp"] = (_EPOCH + timedelta(microseconds=time_us)).isoformat()
+            quote["source"] = "ticks"
+        return quote
+
+class IntradayStore:
+    """
+    Rings of the most recent bars and the last quote per (kind, symbol)
+
+    Recent queries read zero-copy views of the rings instead of assembling
+    bars through the caches. Series beyond max_series are dropped least
+    recently used first. Used from the event loop only.
+    """
+
+    def __init__(self, capacity_bars: int = 480, max_series: int = 2000, enabled: bool = True):
+        self.capacity_bars = max(capacity_bars, 1)
+        self.max_series = max(max_series, 1)
+        self.enabled = enabled
+        self._rings: "OrderedDict[Hashable, BarRing]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _ring(self, kind: str, symbol: str, layout: Optional[Dict[str, type]] = None) -> Optional[BarRing]:
+        key = (kind, symbol)
+        ring = self._rings.get(key)
+        if ring is not None:
+            self._rings.move_to_end(key)
+        elif layout is not None:
+            ring = self._rings[key] = BarRing(self.capacity_bars, layout)
+            if len(self._rings) > self.max_series:
+                self._rings.popitem(last=False)
+                self.evictions += 1
+        return ring
+
+    def write(
+        self,
+        kind: str,
+        symbol: str,
+        lo: int,
+        columns: Dict[str, np.ndarray],
+        complete_hi: int,
+        ttl: Optional[float] = None,
+        live: bool = False
+    ) -> None:
+        """Keep the bars starting at index lo; forming bars are valid for ttl seconds (or until replaced)"""
+        if not self.enabled or len(columns["timestamp"]) == 0:
+            return
+        # Only the newest capacity bars can end up in the ring
+        skip = max(len(columns["timestamp"]) - self.capacity_bars, 0)
+        if skip:
+            lo += skip
+            columns = {name: values[skip:] for name, values in columns.items()}
+        layout = {name: values.dtype for name, values in columns.items() if name != "timestamp"}
+        expires = math.inf if ttl is None else time.monotonic() + ttl
+        self._ring(kind, symbol, layout).write(lo, columns, complete_hi, expires, live)
+
+    def update_live(
+        self,
+        kind: str,
+        symbol: str,
+        index: int,
+        bar: Dict[str, np.ndarray],
+        price: float,
+        time_us: int
+    ) -> None:
+        """Replace the forming bar (index, one-row columns) and last trade from the live feed"""
+        if not self.enabled:
+            return
+        self.write(kind, symbol, index, bar, complete_hi=index, live=True)
+        self._rings[(kind, symbol)].last_trade = (price, time_us)
+
+    def window(self, kind: str, symbol: str, lo: int, hi: int) -> Optional[Dict[str, np.ndarray]]:
+        """Zero-copy views of the bars [lo, hi) of a series, or None when not held"""
+        ring = self._ring(kind, symbol) if self.enabled else None
+        views = ring.window(lo, hi) if ring is not None else None
+        if views is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return views
+
+    def quote(self, kind: str, symbol: str) -> Optional[Dict[str, Any]]:
+        ring = self._ring(kind, symbol) if self.enabled else None
+        return ring.quote(symbol) if ring is not None else None
+
+    def clear(self) -> int:
+        """Drop every series; returns how many there were"""
+        removed = len(self._rings)
+        self._rings.clear()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "series": len(self._rings),
+            "capacity_bars": self.capacity_bars,
+            "bytes": sum(ring.nbytes for ring in self._rings.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "evictions": self.evictions
+        }
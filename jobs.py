@@ -0,0 +1,277 @@
+# jobs.py
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from config import get_settings
+from models import JobStatus
+
+logger = logging.getLogger("bavest-api")
+
+# Finished jobs counted by the throughput metric
+_THROUGHPUT_WINDOW_SECONDS = 60.0
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+class Job:
+    """
+    A unit of CPU-bound work tracked from submission to its result
+    """
+
+    def __init__(self, job_id: str, kind: str, metadata: Optional[Dict[str, Any]] = None):
+        self.id = job_id
+        self.kind = kind
+        self.metadata = metadata or {}
+        self.status = JobStatus.QUEUED
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.submitted_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._queued_since = time.monotonic()
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._future: Optional[asyncio.Future] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Status, timings and (once completed) the result of the job"""
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status.value,
+            "metadata": self.metadata,
+            "submitted_at": self.submitted_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "wait_seconds": self._started - self._queued_since if self._started else None,
+            "run_seconds": self._finished - self._started if self._finished and self._started else None,
+            "result": self.result,
+            "error": self.error
+        }
+
+def _latency_summary(samples: deque) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"mean": None, "p50": None, "p95": None, "max": None}
+    values = np.fromiter(samples, dtype=float)
+    p50, p95 = np.percentile(values, [50, 95])
+    return {"mean": float(values.mean()), "p50": float(p50), "p95": float(p95), "max": float(values.max())}
+
+class JobManager:
+    """
+    Bounded job queue drained by a fixed number of workers into an executor
+
+    Submissions beyond queue_size are rejected rather than buffered without
+    limit; a job cancelled while queued leaves the queue at once. Jobs are kept in a store keyed by id; finished jobs stay retrievable
+    for result_ttl seconds and at most max_jobs of them are retained.
+    The executor is a process pool by default so NumPy work never competes
+    with the event loop; "thread" and "inline" are available for debugging.
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        queue_size: int = 100,
+        executor: str = "process",
+        result_ttl: float = 3600,
+        max_jobs: int = 10_000
+    ):
+        self.workers = max(workers, 1)
+        self.queue_size = max(queue_size, 1)
+        self.executor_kind = executor
+        self.result_ttl = result_ttl
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        # Queued (job, func, args) entries; each one releases _ready once
+        self._pending: deque = deque()
+        self._ready: Optional[asyncio.Semaphore] = None
+        self._tasks: List[asyncio.Task] = []
+        self._executor: Optional[Executor] = None
+        self._running = 0
+        self._wait_times: deque = deque(maxlen=1000)
+        self._run_times: deque = deque(maxlen=1000)
+        self._finish_times: deque = deque()
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+
+    def submit(
+        self,
+        job_id: str,
+        func: Callable,
+        *args: Any,
+        kind: str = "job",
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Job:
+        """
+        Queue func(*args) under job_id and return the job record
+
+        func and its arguments must be picklable when a process pool is used.
+        Raises JobQueueFull when the queue is at capacity.
+        """
+        self._start()
+        self._prune()
+        if len(self._pending) >= self.queue_size:
+            self.rejected += 1
+            raise JobQueueFull(f"Job queue is full ({self.queue_size} jobs pending)")
+        job = Job(job_id, kind, metadata)
+        self._pending.append((job, func, args))
+        self._ready.release()
+        self._jobs[job_id] = job
+        self.submitted += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return the job with this id, or None if it is unknown or expired"""
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a queued or running job
+
+        A queued job is taken off the queue and never starts. A job already running in a process pool
+        cannot be interrupted; its result is discarded when it finishes.
+        Finished jobs are returned unchanged.
+        """
+        job = self.get(job_id)
+        if job is None or job.done:
+            return job
+        if job.status == JobStatus.QUEUED:
+            for position, (queued, _, _) in enumerate(self._pending):
+                if queued is job:
+                    del self._pending[position]
+                    break
+        if job._future is not None:
+            job._future.cancel()
+        self._finish(job, JobStatus.CANCELLED)
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, outcome counters, latency and throughput of the job engine"""
+        now = time.monotonic()
+        while self._finish_times and self._finish_times[0] < now - _THROUGHPUT_WINDOW_SECONDS:
+            self._finish_times.popleft()
+        return {
+            "executor": self.executor_kind,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queue_depth": len(self._pending),
+            "running": self._running,
+            "stored_jobs": len(self._jobs),
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "wait_seconds": _latency_summary(self._wait_times),
+            "run_seconds": _latency_summary(self._run_times),
+            "throughput_per_second": len(self._finish_times) / _THROUGHPUT_WINDOW_SECONDS
+        }
+
+    async def close(self) -> None:
+        """Stop the workers and the executor; pending jobs are cancelled"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self._jobs.values():
+            if not job.done:
+                self._finish(job, JobStatus.CANCELLED)
+        self._pending.clear()
+        self._ready = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _start(self) -> None:
+        if self._tasks:
+            return
+        self._ready = asyncio.Semaphore(len(self._pending))
+        if self.executor_kind == "process":
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        elif self.executor_kind == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="jobs")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._ready.acquire()
+            if not self._pending:
+                continue  # Its job was cancelled while queued
+            job, func, args = self._pending.popleft()
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.utcnow()
+            job._started = time.monotonic()
+            self._wait_times.append(job._started - job._queued_since)
+            self._running += 1
+            try:
+                if self._executor is None:
+                    result = func(*args)
+                else:
+                    job._future = loop.run_in_executor(self._executor, func, *args)
+                    result = await job._future
+            except asyncio.CancelledError:
+                if job.status != JobStatus.CANCELLED:
+                    raise  # The worker itself is shutting down
+            except Exception as e:
+                logger.error(f"Job {job.id} failed: {str(e)}")
+                job.error = str(e)
+                self._finish(job, JobStatus.FAILED)
+            else:
+                if job.status == JobStatus.RUNNING:
+                    job.result = result
+                    self._finish(job, JobStatus.COMPLETED)
+            finally:
+                self._running -= 1
+                job._future = None
+
+    def _finish(self, job: Job, status: JobStatus) -> None:
+        job.status = status
+        job.finished_at = datetime.utcnow()
+        job._finished = time.monotonic()
+        if status == JobStatus.COMPLETED:
+            self.completed += 1
+        elif status == JobStatus.FAILED:
+            self.failed += 1
+        else:
+            self.cancelled += 1
+        if job._started is not None:
+            self._run_times.append(job._finished - job._started)
+        self._finish_times.append(job._finished)
+
+    def _prune(self) -> None:
+        """Forget finished jobs past their retention, oldest first"""
+        expired_before = time.monotonic() - self.result_ttl
+        excess = len(self._jobs) - self.max_jobs
+        removable = []
+        for job_id, job in self._jobs.items():
+            # Jobs are stored in submission order, so later ones cannot have expired
+            if job._queued_since >= expired_before and len(removable) >= excess:
+                break
+            if job.done and (len(removable) < excess or job._finished < expired_before):
+                removable.append(job_id)
+        for job_id in removable:
+            del self._jobs[job_id]
+
+_settings = get_settings()
+job_manager = JobManager(
+    workers=_settings.JOB_WORKERS,
+    queue_size=_settings.JOB_QUEUE_SIZE,
+    executor=_settings.JOB_EXECUTOR,
+    result_ttl=_settings.JOB_RESULT_TTL_SECONDS,
+    max_jobs=_settings.JOB_MAX_STORED
+)
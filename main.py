@@ -1,12 +1,21 @@
 # main.py
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+import asyncio
 import uvicorn
 import logging
 from typing import List
 
 from config import Settings, get_settings
 from routes import router as api_router
+from data_processor import (
+    shutdown_generation_executor, close_market_provider, flush_series_store, get_market_provider
+)
+from broadcaster import stream_hub
+from ticks import tick_pipeline, create_tick_source
+from jobs import job_manager
+from metrics import MetricsMiddleware, registry, sample_event_loop_lag, PROMETHEUS_MEDIA_TYPE
 
 # Configure logging
 logging.basicConfig(
@@ -34,9 +43,46 @@ def create_app(settings: Settings = get_settings()) -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Record per-route latency and add Server-Timing headers
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
     # Include API routes
     app.include_router(api_router, prefix="/api/v1")
 
+    background_tasks = []
+
+    @app.on_event("startup")
+    async def start_monitors():
+        """Start sampling event loop lag, the market data provider and the tick feed configured by TICK_SOURCE"""
+        if settings.METRICS_ENABLED:
+            background_tasks.append(
+                asyncio.create_task(sample_event_loop_lag(settings.METRICS_LOOP_LAG_INTERVAL_SECONDS))
+            )
+        # Fails here, before serving requests, if the provider cannot be created
+        get_market_provider()
+        tick_source = create_tick_source(settings)
+        if tick_source is not None:
+            stream_hub.attach_feed()
+            background_tasks.append(asyncio.create_task(tick_pipeline.run(tick_source)))
+            logger.info(f"Ingesting ticks from the {tick_source.name} source")
+
+    @app.on_event("shutdown")
+    async def shutdown_workers():
+        """Release worker pools and stream producers when the server stops"""
+        for task in background_tasks:
+            task.cancel()
+        await stream_hub.close()
+        await job_manager.close()
+        await flush_series_store()
+        await close_market_provider()
+        shutdown_generation_executor()
+
+    @app.get("/metrics", tags=["Health"], include_in_schema=False)
+    async def metrics():
+        """Metrics in the Prometheus text exposition format"""
+        return Response(content=registry.render(), media_type=PROMETHEUS_MEDIA_TYPE)
+
     @app.get("/", tags=["Health"])
     async def health_check():
         """Root endpoint for health checks"""
@@ -22,6 +22,19 @@ class TimeFrame(str, Enum):
     ONE_WEEK = "1w"
     ONE_MONTH = "1M"
 
+class ResponseFormat(str, Enum):
+    JSON = "json"
+    COLUMNAR = "columnar"
+    NPZ = "npz"
+    ARROW = "arrow"
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
 class StockData(BaseModel):
     """Model for stock/equity data"""
     symbol: str
@@ -130,6 +143,43 @@ class DataQuery(BaseModel):
             ]
         }
 
+class PortfolioHolding(BaseModel):
+    """Model for one position of a portfolio"""
+    symbol: str
+    weight: float
+
+class PortfolioQuery(BaseModel):
+    """Model for portfolio performance and risk analytics"""
+    holdings: List[PortfolioHolding]
+    data_source: DataSourceType = DataSourceType.MARKET
+    timeframe: TimeFrame = TimeFrame.ONE_DAY
+    lookback: int = Field(default=252, ge=2)  # Returns the statistics are estimated from
+    confidence: float = Field(default=0.95, gt=0, lt=1)
+    horizon: int = Field(default=1, ge=1)  # Bars covered by VaR and CVaR
+    risk_free_rate: float = 0.0  # Annual, for the Sharpe ratio
+    simulations: int = Field(default=100_000, ge=0)  # Monte Carlo paths; 0 skips the simulation
+    seed: Optional[int] = Field(default=None, ge=0)
+    
+    class Config:
+        json_schema_extra = {
+            "example": [
+                {
+                "holdings": [
+                    {"symbol": "AAPL", "weight": 0.5},
+                    {"symbol": "MSFT", "weight": 0.3},
+                    {"symbol": "GOOGL", "weight": 0.2}
+                ],
+                "data_source": "market",
+                "timeframe": "1d",
+                "lookback": 252,
+                "confidence": 0.99,
+                "horizon": 10,
+                "simulations": 100000,
+                "seed": 42
+                }
+            ]
+        }
+
 class APIResponse(BaseModel):
     """Standard API response model"""
     success: bool
@@ -0,0 +1,446 @@
+# providers.py
+import abc
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+import numpy as np
+
+logger = logging.getLogger("bavest-api")
+
+# Price columns of each kind of bar series and their dtypes; every series
+# also has a datetime64[us] timestamp column
+BAR_LAYOUTS: Dict[str, Dict[str, type]] = {
+    "market": {"open": np.float64, "high": np.float64, "low": np.float64, "close": np.float64, "volume": np.int64},
+    "crypto": {
+        "open": np.float64, "high": np.float64, "low": np.float64, "close": np.float64,
+        "volume": np.float64, "trades": np.int64
+    },
+}
+
+# One request for the bar index range [lo, hi) of a symbol
+BarRequest = Tuple[str, int, int]
+
+def empty_bars(kind: str) -> Dict[str, np.ndarray]:
+    """Zero-length series with the column layout of kind"""
+    return _empty_columns(BAR_LAYOUTS[kind])
+
+def _empty_columns(layout: Dict[str, type]) -> Dict[str, np.ndarray]:
+    columns = {"timestamp": np.empty(0, dtype="datetime64[us]")}
+    columns.update({name: np.empty(0, dtype=dtype) for name, dtype in layout.items()})
+    return columns
+
+class UpstreamError(Exception):
+    """The upstream data source failed or returned unusable data"""
+
+class UpstreamUnavailable(UpstreamError):
+    """Calls are not attempted because the circuit breaker is open"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class MarketDataProvider(abc.ABC):
+    """
+    Source of bar series on the epoch-anchored grid
+
+    fetch_bars resolves many (symbol, lo, hi) requests of one kind and
+    timeframe at once so providers can batch them; results come back in
+    request order as dicts of column arrays.
+    """
+
+    name = "base"
+    # Whether completed bars of a timeframe equal the provider's finer bars
+    # resampled, so a forming bar may be aggregated from finer timeframes
+    nested_timeframes = False
+
+    @abc.abstractmethod
+    async def fetch_bars(
+        self,
+        kind: str,
+        time_delta: timedelta,
+        requests: List[BarRequest]
+    ) -> List[Dict[str, np.ndarray]]:
+        """Columns of every requested bar index range [lo, hi), in request order"""
+
+    async def close(self) -> None:
+        """Release connections and pools"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"provider": self.name}
+
+class MockProvider(MarketDataProvider):
+    """
+    Generated bars with simulated upstream latency
+
+    generators maps a kind to a picklable (symbol, time_delta, lo, hi) -> columns
+    function; run executes it off the event loop. The latency is paid once per
+    fetch, however many series it covers.
+    """
+
+    name = "mock"
+    # The generator splits every bar into its finer bars
+    nested_timeframes = True
+
+    def __init__(
+        self,
+        settings: Any,
+        generators: Dict[str, Callable[[str, timedelta, int, int], Dict[str, np.ndarray]]],
+        run: Callable[..., Awaitable[Any]]
+    ):
+        self.settings = settings
+        self.generators = generators
+        self.run = run
+        self.fetches = 0
+        self.series = 0
+
+    async def fetch_bars(
+        self,
+        kind: str,
+        time_delta: timedelta,
+        requests: List[BarRequest]
+    ) -> List[Dict[str, np.ndarray]]:
+        generate = self.generators[kind]
+        if any(hi > lo for _, lo, hi in requests):
+            self.fetches += 1
+            await asyncio.sleep(self.settings.SIMULATED_FETCH_LATENCY_SECONDS)
+        self.series += len(requests)
+
+        # Fan the series out to the generation pool with bounded concurrency
+        semaphore = asyncio.Semaphore(max(self.settings.FETCH_CONCURRENCY, 1))
+
+        async def produce(symbol: str, lo: int, hi: int) -> Dict[str, np.ndarray]:
+            async with semaphore:
+                return await self.run(generate, symbol, time_delta, lo, hi)
+
+        return list(await asyncio.gather(*(produce(*request) for request in requests)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"provider": self.name, "fetches": self.fetches, "series": self.series}
+
+class CircuitBreaker:
+    """
+    Stop calling an upstream that keeps failing
+
+    After failure_threshold consecutive failures the breaker opens and calls
+    are refused for reset_seconds. Then it is half-open: one trial call is let
+    through, and its outcome closes the breaker again or reopens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_running = False
+        self.opens = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(self.reset_seconds - (time.monotonic() - self.opened_at), 0.0)
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted now; a half-open breaker admits one trial"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_running:
+            self.trial_running = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def release(self) -> None:
+        """Give up a call without an outcome, e.g. a cancelled one, so another trial may run"""
+        self.trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.trial_running or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self.trial_running:
+                self.opens += 1
+            self.opened_at = time.monotonic()
+        self.trial_running = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opens": self.opens,
+            "rejected": self.rejected
+        }
+
+class _RetryableStatus(Exception):
+    def __init__(self, status: int, retry_after: Optional[float]):
+        super().__init__(f"Upstream answered {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+class HTTPProvider(MarketDataProvider):
+    """
+    Bars from an HTTP upstream over a shared keep-alive connection pool
+
+    Requests for the same range are batched, up to batch_size symbols per
+    `POST {base_url}/bars` call:
+
+        {"kind": "market", "interval_seconds": 60, "start": <epoch ms>, "end": <epoch ms>,
+         "symbols": ["AAPL", ...]}
+
+    answered with columnar bars per symbol, timestamps in epoch milliseconds:
+
+        {"data": {"AAPL": {"timestamp": [...], "open": [...], ..., "volume": [...]}}}
+
+    The connector caps open connections overall (pool_size) and per host
+    (per_host_limit). Timeouts, connection errors, 429 and 5xx answers are
+    retried with full-jitter exponential backoff; a circuit breaker fails calls
+    fast while the upstream is down.
+
+    Bars are placed on the grid and only requested up to the bar forming now.
+    Gaps inside a range become flat bars at the previous close with no volume;
+    a range the upstream has no bars for at all (a symbol not trading, or not
+    known upstream) is a gap too and comes back without rows.
+    """
+
+    name = "api"
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Optional[str] = None,
+        pool_size: int = 100,
+        per_host_limit: int = 20,
+        batch_size: int = 50,
+        timeout_seconds: float = 10.0,
+        retries: int = 3,
+        backoff_seconds: float = 0.2,
+        max_backoff_seconds: float = 5.0,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit
+        self.batch_size = max(batch_size, 1)
+        self.timeout_seconds = timeout_seconds
+        self.retries = max(retries, 0)
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.breaker = breaker or CircuitBreaker()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.calls = 0
+        self.retried = 0
+        self.failures = 0
+        self.series = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Created on first use: a session belongs to the running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.per_host_limit)
+            headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else None
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds)
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def fetch_bars(
+        self,
+        kind: str,
+        time_delta: timedelta,
+        requests: List[BarRequest]
+    ) -> List[Dict[str, np.ndarray]]:
+        layout = BAR_LAYOUTS[kind]
+        step = time_delta // timedelta(microseconds=1)
+        # Bars after the one forming now do not exist upstream yet
+        now_hi = int(time.time() * 1_000_000) // step + 1
+
+        by_range: Dict[Tuple[int, int], List[str]] = defaultdict(list)
+        for symbol, lo, hi in requests:
+            if min(hi, now_hi) > lo:
+                by_range[lo, min(hi, now_hi)].append(symbol)
+        batches = [
+            (lo, hi, symbols[i:i + self.batch_size])
+            for (lo, hi), symbols in by_range.items()
+            for i in range(0, len(symbols), self.batch_size)
+        ]
+
+        async def fetch_batch(lo: int, hi: int, symbols: List[str]) -> Dict[Tuple[str, int], Dict[str, np.ndarray]]:
+            payload = {
+                "kind": kind,
+                "interval_seconds": int(time_delta.total_seconds()),
+                "start": lo * step // 1000,
+                "end": hi * step // 1000,
+                "symbols": list(dict.fromkeys(symbols))
+            }
+            data = (await self._call(payload)).get("data") or {}
+            return {
+                (symbol, lo): self._to_grid(symbol, data.get(symbol), layout, step, lo, hi)
+                for symbol in symbols
+            }
+
+        fetched: Dict[Tuple[str, int], Dict[str, np.ndarray]] = {}
+        for batch in await asyncio.gather(*(fetch_batch(*batch) for batch in batches)):
+            fetched.update(batch)
+        self.series += len(requests)
+
+        return [fetched.get((symbol, lo)) or empty_bars(kind) for symbol, lo, _ in requests]
+
+    async def _call(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """POST one batch, retrying transient failures, behind the circuit breaker"""
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                raise UpstreamUnavailable(
+                    f"Upstream {self.base_url} is unavailable (circuit open)",
+                    self.breaker.retry_after()
+                )
+            self.calls += 1
+            retry_after = None
+            healthy = None
+            try:
+                async with self._get_session().post(f"{self.base_url}/bars", json=payload) as response:
+                    if response.status == 429 or response.status >= 500:
+                        raise _RetryableStatus(response.status, _parse_retry_after(response.headers))
+                    if response.status >= 400:
+                        # The request itself is wrong; the upstream is healthy
+                        healthy = True
+                        raise UpstreamError(f"Upstream rejected the request ({response.status}): {await response.text()}")
+                    body = await response.json()
+                healthy = True
+                return body
+            except UpstreamError:
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError, _RetryableStatus, ValueError) as e:
+                healthy = False
+                self.failures += 1
+                error = e
+                retry_after = getattr(e, "retry_after", None)
+            finally:
+                # Every attempt settles the breaker, also when it is cancelled
+                if healthy is None:
+                    self.breaker.release()
+                elif healthy:
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+
+            if attempt < self.retries:
+                self.retried += 1
+                # Full jitter: uniform in [0, capped exponential backoff]
+                delay = random.uniform(0, min(self.max_backoff_seconds, self.backoff_seconds * 2 ** attempt))
+                await asyncio.sleep(max(delay, retry_after or 0.0))
+
+        raise UpstreamError(f"Upstream {self.base_url} failed after {self.retries + 1} attempts: {type(error).__name__}: {error}")
+
+    @staticmethod
+    def _to_grid(
+        symbol: str,
+        bars: Optional[Dict[str, List[Any]]],
+        layout: Dict[str, type],
+        step: int,
+        lo: int,
+        hi: int
+    ) -> Dict[str, np.ndarray]:
+        """Place upstream bars on the grid slots [lo, hi), filling gaps with flat bars"""
+        if not bars or not bars.get("timestamp"):
+            return _empty_columns(layout)
+        try:
+            positions = np.asarray(bars["timestamp"], dtype=np.int64) * 1000 // step - lo
+            values = {name: np.asarray(bars[name], dtype=dtype) for name, dtype in layout.items()}
+        except (KeyError, TypeError, ValueError) as e:
+            raise UpstreamError(f"Upstream returned malformed bars for {symbol}: {str(e)}")
+
+        inside = (positions >= 0) & (positions < hi - lo)
+        if not inside.any():
+            return _empty_columns(layout)
+        order = np.argsort(positions[inside], kind="stable")
+        positions = positions[inside][order]
+        values = {name: column[inside][order] for name, column in values.items()}
+
+        # Index of the last upstream bar at or before each slot
+        count = hi - lo
+        present = np.zeros(count, dtype=bool)
+        present[positions] = True
+        source = np.full(count, -1, dtype=np.int64)
+        source[positions] = np.arange(len(positions))
+        source = np.maximum.accumulate(source)
+        leading = source < 0
+        source[leading] = 0
+
+        # Missing bars are flat at the previous close; slots before the first bar at its open
+        flat = np.where(leading, values["open"][0], values["close"][source])
+        columns = {"timestamp": np.datetime64(0, "us") + (lo + np.arange(count)) * np.timedelta64(step, "us")}
+        for name, column in values.items():
+            if name in ("open", "high", "low", "close"):
+                column = np.where(present, column[source], flat)
+            else:
+                column = np.where(present, column[source], 0)
+            columns[name] = column.astype(layout[name], copy=False)
+        return columns
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "provider": self.name,
+            "base_url": self.base_url,
+            "pool_size": self.pool_size,
+            "per_host_limit": self.per_host_limit,
+            "calls": self.calls,
+            "retried": self.retried,
+            "failures": self.failures,
+            "series": self.series,
+            "breaker": self.breaker.stats()
+        }
+
+def _parse_retry_after(headers: Any) -> Optional[float]:
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+def create_provider(
+    settings: Any,
+    generators: Dict[str, Callable[[str, timedelta, int, int], Dict[str, np.ndarray]]],
+    run: Callable[..., Awaitable[Any]]
+) -> MarketDataProvider:
+    """Provider selected by MARKET_DATA_SOURCE"""
+    source = settings.MARKET_DATA_SOURCE
+    if source == "mock":
+        return MockProvider(settings, generators, run)
+    if source == "api":
+        return HTTPProvider(
+            settings.UPSTREAM_BASE_URL,
+            api_key=settings.UPSTREAM_API_KEY,
+            pool_size=settings.UPSTREAM_POOL_SIZE,
+            per_host_limit=settings.UPSTREAM_PER_HOST_LIMIT,
+            batch_size=settings.UPSTREAM_BATCH_SIZE,
+            timeout_seconds=settings.UPSTREAM_TIMEOUT_SECONDS,
+            retries=settings.UPSTREAM_RETRIES,
+            backoff_seconds=settings.UPSTREAM_BACKOFF_SECONDS,
+            breaker=CircuitBreaker(settings.UPSTREAM_BREAKER_THRESHOLD, settings.UPSTREAM_BREAKER_RESET_SECONDS)
+        )
+    raise ValueError(f"MARKET_DATA_SOURCE {source!r} has no provider; use 'mock' or 'api'")
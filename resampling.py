@@ -0,0 +1,48 @@
+# resampling.py
+from datetime import timedelta
+from typing import Dict
+
+import numpy as np
+
+# How each column is reduced within a bucket; any other column is summed
+OHLC_AGGREGATIONS = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last"
+}
+
+def resample_ohlcv(columns: Dict[str, np.ndarray], target_delta: timedelta) -> Dict[str, np.ndarray]:
+    """
+    Aggregate consecutive bars into coarser bars of length target_delta
+    
+    Buckets lie on the epoch-anchored grid of the target timeframe and are
+    reduced with first/max/min/last for open/high/low/close and a sum for volume
+    and any other column. The input must be sorted by timestamp; a bucket is
+    emitted only if at least one source bar falls into it.
+    """
+    step = target_delta // timedelta(microseconds=1)
+    timestamps = columns["timestamp"].astype("datetime64[us]").astype(np.int64)
+    if len(timestamps) == 0:
+        return {name: values[:0].copy() for name, values in columns.items()}
+    
+    buckets = timestamps // step
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:], len(buckets)) - 1
+    
+    resampled = {"timestamp": (buckets[starts] * step).astype("datetime64[us]")}
+    for name, values in columns.items():
+        if name == "timestamp":
+            continue
+        aggregation = OHLC_AGGREGATIONS.get(name, "sum")
+        if aggregation == "first":
+            resampled[name] = values[starts]
+        elif aggregation == "last":
+            resampled[name] = values[ends]
+        elif aggregation == "max":
+            resampled[name] = np.maximum.reduceat(values, starts)
+        elif aggregation == "min":
+            resampled[name] = np.minimum.reduceat(values, starts)
+        else:
+            resampled[name] = np.add.reduceat(values, starts)
+    return resampled
@@ -1,62 +1,221 @@
 # routes.py
-from fastapi import APIRouter, HTTPException, Depends, Query, Path, BackgroundTasks
-from fastapi.responses import JSONResponse
-from typing import List, Optional, Dict, Any
+from fastapi import (
+    APIRouter, HTTPException, Depends, Query, Path, BackgroundTasks, Request,
+    WebSocket, WebSocketDisconnect
+)
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import List, Optional, Dict, Any, Tuple
 import uuid
+import json
 import logging
 from datetime import datetime, timedelta
 import asyncio
 
+import numpy as np
+
 from models import (
     StockData, CryptoData, AlternativeDataBatch, 
     MarketSentiment, DataQuery, APIResponse,
-    DataSourceType, TimeFrame
+    DataSourceType, TimeFrame, ResponseFormat, JobStatus, PortfolioQuery
 )
 from data_processor import (
-    fetch_market_data, fetch_crypto_data, 
-    fetch_sentiment_data, process_alternative_data,
-    get_streaming_data
+    fetch_market_json, fetch_crypto_json,
+    fetch_market_series, fetch_crypto_series, iter_series,
+    fetch_sentiment_data, fetch_sentiment_summary,
+    extract_alternative_columns, compute_alternative_insights,
+    stock_metadata, crypto_metadata, get_timedelta_from_timeframe,
+    data_cache, segment_cache, redis_cache, inflight_requests, series_store,
+    get_market_provider, fetch_quotes, intraday_store, QueryTooLarge
+)
+from providers import UpstreamError, UpstreamUnavailable
+from serializers import (
+    series_to_columnar, series_to_npz, series_to_arrow,
+    iter_ndjson_rows, columnar_ndjson_line, nan_to_none, render_api_response, encode_json, arrays_to_npz,
+    timestamp_strings,
+    NPZ_MEDIA_TYPE, ARROW_MEDIA_TYPE, NDJSON_MEDIA_TYPE, JSON_MEDIA_TYPE
 )
+from broadcaster import stream_hub
+from ticks import tick_pipeline
+from jobs import job_manager, JobQueueFull
+from aggregators import GROUP_FIELDS
+from ingestion import (
+    iter_ndjson_records, iter_msgpack_records, ingest_alternative_stream,
+    MSGPACK_MEDIA_TYPE
+)
+from indicators import fetch_indicators, INDICATOR_OUTPUTS
+from analytics import fetch_correlation, fetch_portfolio_analytics
 from config import get_settings, Settings
+from metrics import registry, timed_stage, flatten_stats
 
 logger = logging.getLogger("bavest-api")
 router = APIRouter()
 
+def _component_stats():
+    """Statistics the admin endpoints report, as samples for /metrics"""
+    components = {
+        "query_cache": data_cache.stats,
+        "segments": segment_cache.stats,
+        "redis": redis_cache.stats,
+        "store": series_store.stats,
+        "intraday": intraday_store.stats,
+        "singleflight": inflight_requests.stats,
+        "upstream": lambda: get_market_provider().stats(),
+        "jobs": job_manager.stats,
+        "streams": stream_hub.stats,
+        "ticks": tick_pipeline.stats
+    }
+    for component, stats in components.items():
+        for stat, value in flatten_stats(stats()):
+            yield (component, stat), value
+
+registry.callback_gauge(
+    "bavest_component_stat",
+    "Counters and occupancy reported by caches, the job engine and streams",
+    _component_stats,
+    ("component", "stat")
+)
+
+def _series_response(
+    series_by_symbol: Dict[str, Dict[str, Any]],
+    metadata_fn,
+    response_format: ResponseFormat,
+    request_id: str,
+    message: str,
+    timestamp_suffix: str = ""
+):
+    """
+    Build a columnar or binary response straight from column arrays,
+    skipping per-row model construction
+    
+    timestamp_suffix marks columnar timestamps as UTC ("Z") for aware requests.
+    """
+    metadata = [metadata_fn(symbol) for symbol in series_by_symbol]
+    headers = {"X-Request-ID": request_id}
+    
+    with timed_stage("serialize"):
+        if response_format == ResponseFormat.NPZ:
+            return Response(content=series_to_npz(series_by_symbol), media_type=NPZ_MEDIA_TYPE, headers=headers)
+        if response_format == ResponseFormat.ARROW:
+            try:
+                content = series_to_arrow(series_by_symbol, metadata)
+            except RuntimeError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            return Response(content=content, media_type=ARROW_MEDIA_TYPE, headers=headers)
+        
+        return APIResponse(
+            success=True,
+            message=message,
+            data=[
+                series_to_columnar(series, fields, timestamp_suffix)
+                for series, fields in zip(series_by_symbol.values(), metadata)
+            ],
+            request_id=request_id
+        )
+
+def _upstream_failure(request_id: str, e: UpstreamError) -> HTTPException:
+    """503 with Retry-After while the upstream circuit is open, 502 for other upstream failures"""
+    logger.warning(f"Request {request_id}: {str(e)}")
+    if isinstance(e, UpstreamUnavailable):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(max(int(e.retry_after), 1))})
+    return HTTPException(status_code=502, detail=str(e))
+
+def _json_response(data: bytes, message: str, request_id: str) -> Response:
+    """
+    Send pre-encoded JSON rows in the APIResponse envelope
+    
+    The body is the one `response_model=APIResponse` would produce, without
+    validating and re-encoding every row; the response model still documents it.
+    """
+    with timed_stage("serialize"):
+        content = render_api_response(data, message, request_id)
+    return Response(content=content, media_type=JSON_MEDIA_TYPE)
+
+async def _stream_series(
+    fetch_series,
+    metadata_fn,
+    response_format: ResponseFormat,
+    request_id: str,
+    fetch_args: Dict[str, Any]
+):
+    """
+    Produce NDJSON chunks symbol by symbol; the response pulls the next chunk
+    only after the previous one was sent, so slow clients throttle generation
+    """
+    aliases = {"adjusted_close": "close"} if metadata_fn is stock_metadata else None
+    timestamp_suffix = "Z" if fetch_args["start_date"].tzinfo is not None else ""
+    try:
+        async for symbol, series in iter_series(fetch_series, **fetch_args):
+            if response_format == ResponseFormat.COLUMNAR:
+                yield columnar_ndjson_line(series, metadata_fn(symbol), timestamp_suffix)
+            else:
+                for chunk in iter_ndjson_rows(series, metadata_fn(symbol), aliases, timestamp_suffix):
+                    yield chunk
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band as a final record
+        logger.error(f"Request {request_id}: Error streaming market data: {str(e)}")
+        error = {"error": f"Error processing request: {str(e)}", "request_id": request_id}
+        yield (json.dumps(error, separators=(",", ":")) + "\n").encode()
+
 @router.post("/market/data", response_model=APIResponse, tags=["Market Data"])
-async def get_market_data(query: DataQuery, settings: Settings = Depends(get_settings)):
+async def get_market_data(
+    query: DataQuery,
+    request: Request,
+    format: ResponseFormat = Query(ResponseFormat.JSON, description="Response encoding"),
+    stream: bool = Query(False, description="Stream newline-delimited JSON as data is produced"),
+    settings: Settings = Depends(get_settings)
+):
     """
     Fetch market data based on provided query parameters
+    
+    With stream=true or `Accept: application/x-ndjson` the response is streamed as
+    NDJSON: one record per bar, or one columnar object per symbol with format=columnar.
     """
     request_id = str(uuid.uuid4())
     logger.info(f"Request {request_id}: Market data request for {query.symbols}")
     
     try:
         if query.data_source == DataSourceType.MARKET:
-            data = await fetch_market_data(
-                symbols=query.symbols,
-                start_date=query.start_date,
-                end_date=query.end_date or datetime.utcnow(),
-                timeframe=query.timeframe,
-                limit=query.limit
-            )
+            fetch_json, fetch_series, metadata_fn = fetch_market_json, fetch_market_series, stock_metadata
         elif query.data_source == DataSourceType.BLOCKCHAIN:
-            data = await fetch_crypto_data(
-                symbols=query.symbols,
-                start_date=query.start_date,
-                end_date=query.end_date or datetime.utcnow(),
-                timeframe=query.timeframe,
-                limit=query.limit
-            )
+            fetch_json, fetch_series, metadata_fn = fetch_crypto_json, fetch_crypto_series, crypto_metadata
         else:
             raise HTTPException(status_code=400, detail=f"Data source {query.data_source} not supported for this endpoint")
-            
-        return APIResponse(
-            success=True,
-            message=f"Successfully fetched {len(data)} data points",
-            data=data,
-            request_id=request_id
+        
+        fetch_args = dict(
+            symbols=query.symbols,
+            start_date=query.start_date,
+            end_date=query.end_date or datetime.utcnow(),
+            timeframe=query.timeframe,
+            limit=query.limit
         )
         
+        if stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+            if format not in (ResponseFormat.JSON, ResponseFormat.COLUMNAR):
+                raise HTTPException(status_code=400, detail=f"Format {format.value} cannot be streamed")
+            return StreamingResponse(
+                _stream_series(fetch_series, metadata_fn, format, request_id, fetch_args),
+                media_type=NDJSON_MEDIA_TYPE,
+                headers={"X-Request-ID": request_id}
+            )
+        
+        if format != ResponseFormat.JSON:
+            series_by_symbol = await fetch_series(**fetch_args)
+            count = sum(len(series["timestamp"]) for series in series_by_symbol.values())
+            return _series_response(
+                series_by_symbol, metadata_fn, format, request_id,
+                f"Successfully fetched {count} data points",
+                "Z" if query.start_date.tzinfo is not None else ""
+            )
+        
+        count, data = await fetch_json(**fetch_args)
+        return _json_response(data, f"Successfully fetched {count} data points", request_id)
+        
+    except HTTPException:
+        raise
+    except UpstreamError as e:
+        raise _upstream_failure(request_id, e)
+    except QueryTooLarge as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Request {request_id}: Error fetching market data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
@@ -65,7 +224,8 @@ async def get_market_data(query: DataQuery, settings: Settings = Depends(get_set
 async def get_stock_data(
     symbol: str = Path(..., description="Stock ticker symbol"),
     days: int = Query(30, description="Number of days of historical data"),
-    timeframe: TimeFrame = Query(TimeFrame.ONE_DAY, description="Data timeframe")
+    timeframe: TimeFrame = Query(TimeFrame.ONE_DAY, description="Data timeframe"),
+    format: ResponseFormat = Query(ResponseFormat.JSON, description="Response encoding")
 ):
     """
     Get historical stock data for a specific symbol
@@ -75,19 +235,31 @@ async def get_stock_data(
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        data = await fetch_market_data(
+        if format != ResponseFormat.JSON:
+            series_by_symbol = await fetch_market_series(
+                symbols=[symbol.upper()],
+                start_date=start_date,
+                end_date=end_date,
+                timeframe=timeframe
+            )
+            return _series_response(
+                series_by_symbol, stock_metadata, format, request_id,
+                f"Successfully fetched stock data for {symbol}"
+            )
+        
+        _, data = await fetch_market_json(
             symbols=[symbol.upper()],
             start_date=start_date,
             end_date=end_date,
             timeframe=timeframe
         )
-        
-        return APIResponse(
-            success=True,
-            message=f"Successfully fetched stock data for {symbol}",
-            data=data,
-            request_id=request_id
-        )
+        return _json_response(data, f"Successfully fetched stock data for {symbol}", request_id)
+    except HTTPException:
+        raise
+    except UpstreamError as e:
+        raise _upstream_failure(request_id, e)
+    except QueryTooLarge as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Request {request_id}: Error fetching stock data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching stock data: {str(e)}")
@@ -96,7 +268,8 @@ async def get_stock_data(
 async def get_crypto_data(
     symbol: str = Path(..., description="Cryptocurrency symbol (e.g., BTCUSDT)"),
     days: int = Query(30, description="Number of days of historical data"),
-    timeframe: TimeFrame = Query(TimeFrame.ONE_HOUR, description="Data timeframe")
+    timeframe: TimeFrame = Query(TimeFrame.ONE_HOUR, description="Data timeframe"),
+    format: ResponseFormat = Query(ResponseFormat.JSON, description="Response encoding")
 ):
     """
     Get historical cryptocurrency data for a specific symbol
@@ -106,28 +279,286 @@ async def get_crypto_data(
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
-        data = await fetch_crypto_data(
+        if format != ResponseFormat.JSON:
+            series_by_symbol = await fetch_crypto_series(
+                symbols=[symbol.upper()],
+                start_date=start_date,
+                end_date=end_date,
+                timeframe=timeframe
+            )
+            return _series_response(
+                series_by_symbol, crypto_metadata, format, request_id,
+                f"Successfully fetched crypto data for {symbol}"
+            )
+        
+        _, data = await fetch_crypto_json(
             symbols=[symbol.upper()],
             start_date=start_date,
             end_date=end_date,
             timeframe=timeframe
         )
+        return _json_response(data, f"Successfully fetched crypto data for {symbol}", request_id)
+    except HTTPException:
+        raise
+    except UpstreamError as e:
+        raise _upstream_failure(request_id, e)
+    except QueryTooLarge as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Request {request_id}: Error fetching crypto data: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching crypto data: {str(e)}")
+
+@router.get("/quotes", response_model=APIResponse, tags=["Market Data"])
+async def get_quotes(
+    symbols: str = Query(..., description="Comma-separated symbols"),
+    data_source: DataSourceType = Query(DataSourceType.MARKET, description="market or blockchain"),
+    settings: Settings = Depends(get_settings)
+):
+    """
+    Snapshot of the latest price and forming 1m bar of many symbols
+    
+    Quotes are read from the intraday store; symbols it has no fresh quote for
+    are fetched in one batch.
+    """
+    request_id = str(uuid.uuid4())
+    requested = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols.split(",") if symbol.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if len(requested) > settings.QUOTES_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.QUOTES_MAX_SYMBOLS} symbols per request, got {len(requested)}"
+        )
+    if data_source == DataSourceType.MARKET:
+        kind = "market"
+    elif data_source == DataSourceType.BLOCKCHAIN:
+        kind = "crypto"
+    else:
+        raise HTTPException(status_code=400, detail=f"Data source {data_source} not supported for this endpoint")
+    
+    try:
+        quotes = await fetch_quotes(kind, requested)
+        return _json_response(encode_json(quotes), f"Quotes for {len(quotes)} symbols", request_id)
+    except UpstreamError as e:
+        raise _upstream_failure(request_id, e)
+    except Exception as e:
+        logger.error(f"Request {request_id}: Error fetching quotes: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching quotes: {str(e)}")
+
+@router.get("/indicators/{symbol}", response_model=APIResponse, tags=["Market Data"])
+async def get_indicators(
+    symbol: str = Path(..., description="Stock ticker symbol"),
+    days: int = Query(30, description="Number of days of historical data"),
+    timeframe: TimeFrame = Query(TimeFrame.ONE_DAY, description="Data timeframe"),
+    indicators: Optional[List[str]] = Query(None, description=f"Indicators to compute: {', '.join(INDICATOR_OUTPUTS)}"),
+    window: int = Query(20, ge=1, description="Window for SMA, EMA and Bollinger Bands"),
+    num_std: float = Query(2.0, gt=0, description="Bollinger Band width in standard deviations"),
+    rsi_period: int = Query(14, ge=1, description="RSI smoothing period")
+):
+    """
+    Compute technical indicators for a symbol server-side
+    
+    Returns parallel arrays: timestamp plus one array per indicator output.
+    Values are computed after a warm-up before the requested window and VWAP
+    restarts every session (a UTC day for intraday bars, a year otherwise).
+    Values are null only where the history is too short for an indicator.
+    """
+    request_id = str(uuid.uuid4())
+    try:
+        end_date = datetime.utcnow()
+        start_date = end_date - timedelta(days=days)
+        
+        try:
+            result = await fetch_indicators(
+                symbol=symbol.upper(),
+                start_date=start_date,
+                end_date=end_date,
+                timeframe=timeframe,
+                indicators=indicators,
+                window=window,
+                num_std=num_std,
+                rsi_period=rsi_period
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        data = {"symbol": symbol.upper(), "timeframe": timeframe.value}
+        data["timestamp"] = timestamp_strings(result.pop("timestamp"))
+        data.update({name: nan_to_none(values) for name, values in result.items()})
         
         return APIResponse(
             success=True,
-            message=f"Successfully fetched crypto data for {symbol}",
+            message=f"Successfully computed indicators for {symbol}",
             data=data,
             request_id=request_id
         )
+    except HTTPException:
+        raise
+    except UpstreamError as e:
+        raise _upstream_failure(request_id, e)
     except Exception as e:
-        logger.error(f"Request {request_id}: Error fetching crypto data: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error fetching crypto data: {str(e)}")
+        logger.error(f"Request {request_id}: Error computing indicators: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error computing indicators: {str(e)}")
+
+@router.get("/analytics/correlation", response_model=APIResponse, tags=["Analytics"])
+async def get_correlation(
+    symbols: str = Query(..., description="Comma-separated symbols"),
+    window: int = Query(60, ge=2, description="Returns per correlation window"),
+    timeframe: TimeFrame = Query(TimeFrame.ONE_DAY, description="Bar timeframe of the returns"),
+    rolling: bool = Query(False, description="Return rolling matrices instead of one for the latest window"),
+    periods: int = Query(20, ge=1, description="Number of rolling windows"),
+    step: int = Query(1, ge=1, description="Bars between the ends of consecutive rolling windows"),
+    covariance: bool = Query(True, description="Include the covariance matrices"),
+    data_source: DataSourceType = Query(DataSourceType.MARKET, description="market or blockchain"),
+    format: ResponseFormat = Query(ResponseFormat.JSON, description="Response encoding: json or npz"),
+    settings: Settings = Depends(get_settings)
+):
+    """
+    Correlation and covariance matrices of log returns across symbols
+    
+    Returns are aligned on the timestamps all symbols share. Matrices are
+    indexed like `symbols`; with rolling=true each entry of the matrix lists
+    belongs to the window ending at the same position of `timestamps`.
+    Encoding hundreds of symbols as JSON takes far longer than computing
+    them, so large matrices are best requested as npz arrays.
+    """
+    request_id = str(uuid.uuid4())
+    if format == ResponseFormat.ARROW:
+        raise HTTPException(status_code=400, detail="Arrow output is not supported for matrices; use json or npz")
+    requested = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols.split(",") if symbol.strip()))
+    if len(requested) > settings.ANALYTICS_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.ANALYTICS_MAX_SYMBOLS} symbols per request, got {len(requested)}"
+        )
+    if data_source == DataSourceType.MARKET:
+        kind = "market"
+    elif data_source == DataSourceType.BLOCKCHAIN:
+        kind = "crypto"
+    else:
+        raise HTTPException(status_code=400, detail=f"Data source {data_source} not supported for this endpoint")
+    
+    try:
+        try:
+            result = await fetch_correlation(
+                requested, window, timeframe,
+                kind=kind,
+                rolling=rolling,
+                periods=periods,
+                step=step,
+                max_values=settings.ANALYTICS_MAX_MATRIX_VALUES
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        matrices = ["correlation", "covariance"] if covariance else ["correlation"]
+        if format == ResponseFormat.NPZ:
+            with timed_stage("serialize"):
+                arrays = {
+                    "symbols": np.array(result["symbols"]),
+                    "timestamps": result["timestamps"]
+                }
+                arrays.update({name: result[name] if rolling else result[name][0] for name in matrices})
+                content = arrays_to_npz(arrays)
+            return Response(content=content, media_type=NPZ_MEDIA_TYPE, headers={"X-Request-ID": request_id})
+        
+        with timed_stage("serialize"):
+            data = {
+                "symbols": result["symbols"],
+                "timeframe": timeframe.value,
+                "window": window,
+                "timestamps": timestamp_strings(result["timestamps"])
+            }
+            for name in matrices:
+                data[name] = nan_to_none(result[name] if rolling else result[name][0])
+            content = encode_json(data)
+        return _json_response(
+            content, f"Correlation of {len(result['symbols'])} symbols over {window} returns", request_id
+        )
+    except HTTPException:
+        raise
+    except UpstreamError as e:
+        raise _upstream_failure(request_id, e)
+    except Exception as e:
+        logger.error(f"Request {request_id}: Error computing correlation: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error computing correlation: {str(e)}")
+
+@router.post("/analytics/portfolio", response_model=APIResponse, tags=["Analytics"])
+async def get_portfolio_analytics(
+    query: PortfolioQuery,
+    settings: Settings = Depends(get_settings)
+):
+    """
+    Performance and risk of a weighted portfolio
+    
+    Weights are scaled to sum to 1 and the portfolio is rebalanced to them
+    every bar. Reports total and annualized return, volatility, Sharpe ratio,
+    maximum drawdown, and parametric, historical and Monte Carlo VaR/CVaR over
+    `horizon` bars. A Monte Carlo run is repeated exactly by passing the
+    `seed` it reports.
+    """
+    request_id = str(uuid.uuid4())
+    holdings: Dict[str, float] = {}
+    for holding in query.holdings:
+        symbol = holding.symbol.strip().upper()
+        if symbol in holdings:
+            raise HTTPException(status_code=400, detail=f"{symbol} is listed more than once")
+        holdings[symbol] = holding.weight
+    if len(holdings) > settings.ANALYTICS_MAX_SYMBOLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.ANALYTICS_MAX_SYMBOLS} holdings per request, got {len(holdings)}"
+        )
+    if query.simulations > settings.PORTFOLIO_MAX_SIMULATIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.PORTFOLIO_MAX_SIMULATIONS} simulations per request, got {query.simulations}"
+        )
+    if query.data_source == DataSourceType.MARKET:
+        kind = "market"
+    elif query.data_source == DataSourceType.BLOCKCHAIN:
+        kind = "crypto"
+    else:
+        raise HTTPException(status_code=400, detail=f"Data source {query.data_source} not supported for this endpoint")
+    
+    try:
+        try:
+            result = await fetch_portfolio_analytics(
+                holdings,
+                lookback=query.lookback,
+                timeframe=query.timeframe,
+                kind=kind,
+                confidence=query.confidence,
+                horizon=query.horizon,
+                risk_free_rate=query.risk_free_rate,
+                simulations=query.simulations,
+                seed=query.seed,
+                chunk_values=settings.PORTFOLIO_SIMULATION_CHUNK_VALUES,
+                parallel=settings.PORTFOLIO_SIMULATION_PARALLEL
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        with timed_stage("serialize"):
+            content = encode_json(result)
+        return _json_response(
+            content, f"Analytics of {len(holdings)} holdings over {result['observations']} returns", request_id
+        )
+    except HTTPException:
+        raise
+    except UpstreamError as e:
+        raise _upstream_failure(request_id, e)
+    except Exception as e:
+        logger.error(f"Request {request_id}: Error computing portfolio analytics: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error computing portfolio analytics: {str(e)}")
 
 @router.get("/sentiment/{symbol}", response_model=APIResponse, tags=["Alternative Data"])
 async def get_sentiment_data(
     symbol: str = Path(..., description="Asset symbol"),
     days: int = Query(7, description="Number of days of sentiment data"),
-    sources: Optional[List[str]] = Query(None, description="Specific sources to include")
+    sources: Optional[List[str]] = Query(None, description="Specific sources to include"),
+    aggregate: bool = Query(False, description="Return a per-day volume-weighted summary instead of raw rows"),
+    momentum_window: int = Query(7, ge=1, description="Days over which the aggregated momentum is computed")
 ):
     """
     Get sentiment data for a specific asset symbol
@@ -137,6 +568,29 @@ async def get_sentiment_data(
         end_date = datetime.utcnow()
         start_date = end_date - timedelta(days=days)
         
+        if aggregate:
+            summary = await fetch_sentiment_summary(
+                symbol=symbol.upper(),
+                start_date=start_date,
+                end_date=end_date,
+                sources=sources,
+                momentum_window=momentum_window
+            )
+            return APIResponse(
+                success=True,
+                message=f"Successfully aggregated sentiment data for {symbol}",
+                data={
+                    "symbol": symbol.upper(),
+                    "momentum_window": momentum_window,
+                    "timestamp": timestamp_strings(summary["timestamp"]),
+                    "weighted_score": nan_to_none(summary["weighted_score"]),
+                    "volume": summary["volume"].tolist(),
+                    "momentum": nan_to_none(summary["momentum"]),
+                    "sources": summary["sources"]
+                },
+                request_id=request_id
+            )
+        
         data = await fetch_sentiment_data(
             symbol=symbol.upper(),
             start_date=start_date,
@@ -154,45 +608,293 @@ async def get_sentiment_data(
         logger.error(f"Request {request_id}: Error fetching sentiment data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching sentiment data: {str(e)}")
 
-@router.post("/alternative/process", response_model=APIResponse, tags=["Alternative Data"])
+@router.post("/alternative/process", response_model=APIResponse, status_code=202, tags=["Alternative Data"])
 async def process_data(
     data: AlternativeDataBatch,
-    background_tasks: BackgroundTasks
+    group_by: Optional[List[str]] = Query(None, description="Split statistics by data_type and/or source"),
+    bucket: Optional[TimeFrame] = Query(None, description="Split statistics into time buckets of this size")
 ):
     """
-    Process a batch of alternative data and return insights
+    Submit a batch of alternative data for processing
+    
+    The insights are computed by the job engine; poll
+    /alternative/jobs/{request_id} for the status and result.
     """
     request_id = str(uuid.uuid4())
+    unknown = [field for field in group_by or [] if field not in GROUP_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot group by: {', '.join(unknown)}")
     try:
-        # Process data asynchronously in background
-        background_tasks.add_task(
-            process_alternative_data,
-            data=data,
-            request_id=request_id
+        job = job_manager.submit(
+            request_id,
+            compute_alternative_insights,
+            extract_alternative_columns(data),
+            tuple(group_by or ()),
+            get_timedelta_from_timeframe(bucket).total_seconds() if bucket else None,
+            kind="alternative_insights",
+            metadata={
+                "source": data.source,
+                "data_type": data.data_type,
+                "points_received": len(data.data_points)
+            }
         )
         
         return APIResponse(
             success=True,
-            message=f"Data processing started for {data.data_type} from {data.source}",
+            message=f"Data processing queued for {data.data_type} from {data.source}",
             request_id=request_id,
-            data={"status": "processing", "points_received": len(data.data_points)}
+            data={
+                "job_id": job.id,
+                "status": job.status.value,
+                "points_received": len(data.data_points)
+            }
         )
+    except JobQueueFull as e:
+        logger.warning(f"Request {request_id}: {str(e)}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         logger.error(f"Request {request_id}: Error processing alternative data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing data: {str(e)}")
 
-@router.websocket("/stream/{symbol}")
-async def websocket_endpoint(websocket, symbol: str):
+@router.post("/alternative/ingest", response_model=APIResponse, tags=["Alternative Data"])
+async def ingest_data(
+    request: Request,
+    group_by: Optional[List[str]] = Query(None, description="Split statistics by data_type and/or source"),
+    bucket: Optional[TimeFrame] = Query(None, description="Split statistics into time buckets of this size")
+):
     """
-    Stream real-time data for a specific symbol
+    Stream a large upload of alternative data points and return their insights
+    
+    The body is NDJSON (`application/x-ndjson`) or concatenated msgpack maps
+    (`application/msgpack`), one data point per record. Records are parsed and
+    validated in chunks as the body arrives; invalid lines are reported with
+    their line number instead of rejecting the whole upload.
     """
-    await websocket.accept()
+    request_id = str(uuid.uuid4())
+    unknown = [field for field in group_by or [] if field not in GROUP_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot group by: {', '.join(unknown)}")
+    
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in (NDJSON_MEDIA_TYPE, "application/jsonl", "application/json-seq"):
+        records = iter_ndjson_records(request.stream())
+    elif content_type in (MSGPACK_MEDIA_TYPE, "application/x-msgpack"):
+        records = iter_msgpack_records(request.stream())
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported content type '{content_type}', use {NDJSON_MEDIA_TYPE} or {MSGPACK_MEDIA_TYPE}"
+        )
+    
+    try:
+        result = await ingest_alternative_stream(
+            records,
+            group_by=tuple(group_by or ()),
+            bucket_seconds=get_timedelta_from_timeframe(bucket).total_seconds() if bucket else None
+        )
+        
+        return APIResponse(
+            success=result["rejected"] == 0,
+            message=f"Ingested {result['accepted']} of {result['received']} records",
+            data=result,
+            request_id=request_id
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except Exception as e:
+        logger.error(f"Request {request_id}: Error ingesting alternative data: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error ingesting data: {str(e)}")
+
+@router.get("/alternative/jobs/{job_id}", response_model=APIResponse, tags=["Alternative Data"])
+async def get_job(job_id: str = Path(..., description="Job id returned by /alternative/process")):
+    """
+    Get the status of a processing job, and its result once completed
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return APIResponse(
+        success=job.status != JobStatus.FAILED,
+        message=f"Job {job_id} is {job.status.value}",
+        data=job.to_dict(),
+        request_id=str(uuid.uuid4())
+    )
+
+@router.post("/alternative/jobs/{job_id}/cancel", response_model=APIResponse, tags=["Alternative Data"])
+async def cancel_job(job_id: str = Path(..., description="Job id returned by /alternative/process")):
+    """
+    Cancel a queued or running processing job
+    """
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return APIResponse(
+        success=job.status == JobStatus.CANCELLED,
+        message=f"Job {job_id} is {job.status.value}",
+        data=job.to_dict(),
+        request_id=str(uuid.uuid4())
+    )
+
+@router.get("/admin/cache", response_model=APIResponse, tags=["Admin"])
+async def get_cache_stats():
+    """
+    Inspect occupancy and hit/miss/eviction counters of the data cache
+    """
+    request_id = str(uuid.uuid4())
+    return APIResponse(
+        success=True,
+        message="Cache statistics",
+        data={
+            **data_cache.stats(),
+            "segments": segment_cache.stats(),
+            "redis": redis_cache.stats(),
+            "store": series_store.stats(),
+            "intraday": intraday_store.stats(),
+            "singleflight": inflight_requests.stats()
+        },
+        request_id=request_id
+    )
+
+@router.delete("/admin/cache", response_model=APIResponse, tags=["Admin"])
+async def flush_cache():
+    """
+    Drop every entry from the in-process data cache and the intraday store
+    """
+    request_id = str(uuid.uuid4())
+    removed = data_cache.clear()
+    intraday_store.clear()
+    logger.info(f"Request {request_id}: Flushed {removed} cache entries")
+    return APIResponse(
+        success=True,
+        message=f"Flushed {removed} cache entries",
+        data={"removed": removed},
+        request_id=request_id
+    )
+
+@router.get("/admin/streams", response_model=APIResponse, tags=["Admin"])
+async def get_stream_stats():
+    """
+    Inspect active stream producers, subscriptions and dropped ticks
+    """
+    request_id = str(uuid.uuid4())
+    return APIResponse(
+        success=True,
+        message="Stream statistics",
+        data=stream_hub.stats(),
+        request_id=request_id
+    )
+
+@router.get("/admin/ticks", response_model=APIResponse, tags=["Admin"])
+async def get_tick_stats():
+    """
+    Inspect tick ingestion: ingest rate, rejected ticks, queue depth and lag
+    """
+    request_id = str(uuid.uuid4())
+    return APIResponse(
+        success=True,
+        message="Tick ingestion statistics",
+        data=tick_pipeline.stats(),
+        request_id=request_id
+    )
+
+@router.get("/admin/jobs", response_model=APIResponse, tags=["Admin"])
+async def get_job_stats():
+    """
+    Inspect queue depth, latency and throughput of the job engine
+    """
+    request_id = str(uuid.uuid4())
+    return APIResponse(
+        success=True,
+        message="Job statistics",
+        data=job_manager.stats(),
+        request_id=request_id
+    )
+
+@router.get("/admin/upstream", response_model=APIResponse, tags=["Admin"])
+async def get_upstream_stats():
+    """
+    Inspect the market data provider: calls, retries, failures and circuit state
+    """
+    request_id = str(uuid.uuid4())
+    return APIResponse(
+        success=True,
+        message="Upstream statistics",
+        data=get_market_provider().stats(),
+        request_id=request_id
+    )
+
+def _control_message(text: str) -> Tuple[str, List[str]]:
+    """Action and upper-cased symbols of a stream control message; raises ValueError if it is invalid"""
+    try:
+        message = json.loads(text)
+    except ValueError:
+        raise ValueError("Control messages must be JSON objects")
+    action = message.get("action") if isinstance(message, dict) else None
+    if action not in ("subscribe", "unsubscribe"):
+        raise ValueError("Expected action 'subscribe' or 'unsubscribe'")
+    symbols = message.get("symbols") or []
+    if not isinstance(symbols, list) or not all(isinstance(symbol, str) for symbol in symbols):
+        raise ValueError("Expected symbols to be a list of strings")
+    return action, [symbol.strip().upper() for symbol in symbols if symbol.strip()]
+
+async def _serve_stream(websocket: WebSocket, symbols: List[str]):
+    """
+    Pump ticks from the stream hub to a client while handling its control messages
+    
+    Control messages are JSON objects such as
+    {"action": "subscribe", "symbols": ["AAPL", "MSFT"]} or
+    {"action": "unsubscribe", "symbols": ["AAPL"]}; each is acknowledged, and
+    an invalid one is answered with an error frame.
+    """
+    subscription = stream_hub.create_subscription()
+    stream_hub.subscribe(subscription, symbols)
+    
+    async def send_ticks():
+        while True:
+            await websocket.send_text(await subscription.get())
     
+    sender = asyncio.ensure_future(send_ticks())
     try:
-        async for data_point in get_streaming_data(symbol):
-            if data_point:
-                await websocket.send_json(data_point)
-            await asyncio.sleep(1)
+        while True:
+            try:
+                action, requested = _control_message(await websocket.receive_text())
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+            if action == "subscribe":
+                changed = stream_hub.subscribe(subscription, requested)
+            else:
+                changed = stream_hub.unsubscribe(subscription, requested)
+            await websocket.send_json({
+                "type": f"{action}d",
+                "symbols": changed,
+                "subscribed": sorted(subscription.symbols)
+            })
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
-        logger.error(f"Streaming error for {symbol}: {str(e)}")
-        await websocket.close(code=1000)
\ No newline at end of file
+        logger.error(f"Streaming error for {sorted(subscription.symbols)}: {str(e)}")
+        await websocket.close(code=1011)
+    finally:
+        sender.cancel()
+        stream_hub.unsubscribe(subscription)
+
+@router.websocket("/stream")
+async def websocket_multi_endpoint(websocket: WebSocket, symbols: Optional[str] = None):
+    """
+    Stream real-time data for any number of symbols on one connection
+    
+    Initial symbols may be given as a comma-separated `symbols` query parameter;
+    subscriptions can then be changed with control messages.
+    """
+    await websocket.accept()
+    initial = [symbol.strip().upper() for symbol in (symbols or "").split(",") if symbol.strip()]
+    await _serve_stream(websocket, initial)
+
+@router.websocket("/stream/{symbol}")
+async def websocket_endpoint(websocket: WebSocket, symbol: str):
+    """
+    Stream real-time data for a specific symbol
+    """
+    await websocket.accept()
+    await _serve_stream(websocket, [symbol])
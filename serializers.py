@@ -0,0 +1,222 @@
+# serializers.py
+import io
+import json
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pydantic_core
+
+try:
+    import pyarrow as pa
+except ImportError:  # Arrow output is optional
+    pa = None
+
+NPZ_MEDIA_TYPE = "application/x-npz"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+JSON_MEDIA_TYPE = "application/json"
+
+# Row layout of StockData and CryptoData in model field order after the
+# metadata and timestamp: (output field, source column, dtype of the field)
+STOCK_ROW_FIELDS: Tuple[Tuple[str, str, type], ...] = (
+    ("open", "open", np.float64),
+    ("high", "high", np.float64),
+    ("low", "low", np.float64),
+    ("close", "close", np.float64),
+    ("volume", "volume", np.int64),
+    ("adjusted_close", "close", np.float64),
+)
+CRYPTO_ROW_FIELDS: Tuple[Tuple[str, str, type], ...] = (
+    ("open", "open", np.float64),
+    ("high", "high", np.float64),
+    ("low", "low", np.float64),
+    ("close", "close", np.float64),
+    ("volume", "volume", np.float64),
+    ("trades", "trades", np.int64),
+)
+
+def _dump(value: Any) -> str:
+    # Same settings as FastAPI's JSONResponse
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+def encode_json(value: Any) -> bytes:
+    """Encode a JSON-ready value as data for render_api_response"""
+    return _dump(value).encode()
+
+def series_to_columnar(
+    series: Dict[str, np.ndarray],
+    metadata: Dict[str, Any],
+    timestamp_suffix: str = ""
+) -> Dict[str, Any]:
+    """
+    Convert one symbol's column arrays into a JSON-ready object of parallel lists
+    
+    Descriptive fields (symbol, exchange, ...) appear once instead of once per bar.
+    Timestamps are formatted like the row layouts; timestamp_suffix marks UTC ("Z")
+    for aware requests.
+    """
+    columnar = dict(metadata)
+    columnar["timestamp"] = [text + timestamp_suffix for text in timestamp_strings(series["timestamp"])]
+    for name, values in series.items():
+        if name != "timestamp":
+            columnar[name] = values.tolist()
+    return columnar
+
+def nan_to_none(values: np.ndarray) -> List[Any]:
+    """Float array as a list with NaN replaced by None (null in JSON)"""
+    return np.where(np.isnan(values), None, values).tolist()
+
+def series_to_npz(series_by_symbol: Dict[str, Dict[str, np.ndarray]]) -> bytes:
+    """
+    Encode column arrays as an uncompressed NumPy .npz archive
+    
+    Arrays are stored as `<symbol>/<column>`; timestamps keep their datetime64[us] dtype.
+    """
+    return arrays_to_npz({
+        f"{symbol}/{name}": values
+        for symbol, series in series_by_symbol.items()
+        for name, values in series.items()
+    })
+
+def arrays_to_npz(arrays: Dict[str, np.ndarray]) -> bytes:
+    """Encode named arrays as an uncompressed NumPy .npz archive"""
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+def series_to_arrow(
+    series_by_symbol: Dict[str, Dict[str, np.ndarray]],
+    metadata: List[Dict[str, Any]]
+) -> bytes:
+    """
+    Encode column arrays as an Arrow IPC stream with one record batch per symbol
+    
+    Descriptive fields are repeated as string columns so all batches share one schema.
+    """
+    if pa is None:
+        raise RuntimeError("Arrow output requires the 'pyarrow' package")
+    
+    batches = []
+    for (symbol, series), fields in zip(series_by_symbol.items(), metadata):
+        length = len(series["timestamp"])
+        columns = {name: pa.array([value] * length, pa.string()) for name, value in fields.items()}
+        columns.update({name: pa.array(values) for name, values in series.items()})
+        batches.append(pa.RecordBatch.from_pydict(columns))
+    
+    buffer = io.BytesIO()
+    if batches:
+        with pa.ipc.new_stream(buffer, batches[0].schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    return buffer.getvalue()
+
+def iter_ndjson_rows(
+    series: Dict[str, np.ndarray],
+    metadata: Dict[str, Any],
+    aliases: Optional[Dict[str, str]] = None,
+    timestamp_suffix: str = "",
+    chunk_rows: int = 1000
+) -> Iterator[bytes]:
+    """
+    Encode one symbol's bars as newline-delimited JSON records, chunk_rows at a time
+    
+    Records carry the same fields as the row models: metadata, timestamp, every
+    column, plus `aliases` (output field -> source column, e.g. adjusted_close).
+    timestamp_suffix marks UTC ("Z") when the request used aware datetimes.
+    """
+    names = [name for name in series if name != "timestamp"]
+    aliases = aliases or {}
+    for start in range(0, len(series["timestamp"]), chunk_rows):
+        window = slice(start, start + chunk_rows)
+        timestamps = series["timestamp"][window].astype(datetime).tolist()
+        columns = {name: series[name][window].tolist() for name in names}
+        lines = []
+        for i, timestamp in enumerate(timestamps):
+            record = dict(metadata)
+            record["timestamp"] = timestamp.isoformat() + timestamp_suffix
+            for name in names:
+                record[name] = columns[name][i]
+            for alias, source in aliases.items():
+                record[alias] = columns[source][i]
+            lines.append(json.dumps(record, separators=(",", ":")))
+        yield ("\n".join(lines) + "\n").encode()
+
+def columnar_ndjson_line(
+    series: Dict[str, np.ndarray],
+    metadata: Dict[str, Any],
+    timestamp_suffix: str = ""
+) -> bytes:
+    """Encode one symbol's columnar object as a single NDJSON line"""
+    columnar = series_to_columnar(series, metadata, timestamp_suffix)
+    return (json.dumps(columnar, separators=(",", ":")) + "\n").encode()
+
+def timestamp_strings(timestamps: np.ndarray) -> List[str]:
+    """ISO strings as pydantic renders naive datetimes: no fraction for whole seconds"""
+    if (timestamps.astype(np.int64) % 1_000_000 == 0).all():
+        return np.datetime_as_string(timestamps, unit="s").tolist()
+    return [
+        text[:-7] if text.endswith(".000000") else text
+        for text in np.datetime_as_string(timestamps, unit="us").tolist()
+    ]
+
+def render_json_rows(
+    series: Dict[str, np.ndarray],
+    metadata: Dict[str, Any],
+    fields: Sequence[Tuple[str, str, type]],
+    timestamp_suffix: str = ""
+) -> str:
+    """
+    Encode one symbol's bars as comma-separated JSON row objects
+    
+    The output is byte-identical to serializing the equivalent StockData or
+    CryptoData models (per `fields`) through FastAPI's JSON response, but values
+    are formatted column by column and each row is a single %-format of one
+    template instead of model validation plus JSON-mode re-encoding. timestamp_suffix marks UTC ("Z") for aware requests.
+    """
+    if not len(series["timestamp"]):
+        return ""
+    
+    # Everything but the values is the same on every row
+    head = _dump(metadata)[:-1] + ("," if metadata else "")
+    template = (
+        head.replace("%", "%%")
+        + '"timestamp":"%s' + timestamp_suffix.replace("%", "%%") + '"'
+        + "".join(f',"{name}":%s' for name, _, _ in fields)
+        + "}"
+    )
+    
+    # repr is the shortest round-tripping form json.dumps uses; each source
+    # column is formatted once even when several fields share it
+    formatted: Dict[Tuple[str, type], List[str]] = {}
+    for _, column, dtype in fields:
+        if (column, dtype) not in formatted:
+            values = np.asarray(series[column], dtype=dtype)
+            if dtype == np.float64 and not np.isfinite(values).all():
+                raise ValueError("Out of range float values are not JSON compliant")
+            formatted[column, dtype] = list(map(repr, values.tolist()))
+    columns = [formatted[column, dtype] for _, column, dtype in fields]
+    
+    return ",".join([template % row for row in zip(timestamp_strings(series["timestamp"]), *columns)])
+
+def render_api_response(
+    data: bytes,
+    message: str,
+    request_id: str,
+    success: bool = True,
+    timestamp: Optional[datetime] = None
+) -> bytes:
+    """
+    Wrap pre-encoded JSON `data` in the APIResponse envelope
+    
+    Matches the bytes FastAPI produces for an APIResponse with the same fields.
+    """
+    timestamp = timestamp or datetime.utcnow()
+    return b"".join((
+        b'{"success":', b"true" if success else b"false",
+        b',"message":', _dump(message).encode(),
+        b',"data":', data,
+        b',"timestamp":', pydantic_core.to_json(timestamp),
+        b',"request_id":', _dump(request_id).encode(),
+        b"}"
+    ))
@@ -0,0 +1,468 @@
+# series_store.py
+import argparse
+import json
+import logging
+import os
+import struct
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Cross-process locking is only available on POSIX
+    fcntl = None
+
+logger = logging.getLogger("bavest-api")
+
+STORE_MAGIC = b"BVTS"
+STORE_VERSION = 1
+
+# Fixed header page: magic, version, capacity, committed length, layout size,
+# then the JSON column layout. Column regions start page-aligned after it.
+_HEADER = struct.Struct("<4sIQQI")
+_HEADER_BYTES = 4096
+_LENGTH_OFFSET = 16
+
+# Rows preallocated for a new file
+_INITIAL_CAPACITY = 4096
+
+class StoreError(Exception):
+    """Raised when a series file is missing, corrupt or written inconsistently"""
+
+def _fsync_directory(path: Path) -> None:
+    if os.name != "posix":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class _FileLock:
+    """Exclusive lock on a sidecar file, held across threads and processes"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd: Optional[int] = None
+
+    def __enter__(self) -> "_FileLock":
+        self._thread_lock.acquire()
+        if fcntl is not None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+class SeriesFile:
+    """
+    Append-only columnar file holding one (symbol, timeframe) series
+
+    Every column is a fixed-width (8-byte) region of `capacity` rows, so rows
+    are appended in place and each column is read through numpy.memmap as a
+    zero-copy view. Only the first `length` rows, as recorded in the header,
+    are visible.
+
+    Append protocol: rows are written past the committed length and flushed,
+    then the 8-byte length in the header is updated and flushed. A crash before
+    the second flush leaves the new rows invisible and they are overwritten by
+    the next append. Creating a file and growing it past capacity write a
+    complete copy to a temporary file under the lock and atomically rename it
+    into place, so a file is never seen half-written. A file that cannot be
+    read raises StoreError.
+
+    The mapping holds a file descriptor; close() releases it once no view
+    returned by read() is alive any more, and the file is mapped again on its
+    next use.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = _FileLock(_lock_path(self.path))
+        self._mmap = None
+        self._map()
+
+    @classmethod
+    def create(cls, path: Path, columns: Dict[str, np.dtype], capacity: int = _INITIAL_CAPACITY) -> "SeriesFile":
+        """
+        Create an empty file with the given column layout; timestamp must come first
+
+        A file that another writer created in the meantime is opened instead of
+        being replaced.
+        """
+        path = Path(path)
+        layout = [(name, np.dtype(dtype).str) for name, dtype in columns.items()]
+        if not layout or layout[0][0] != "timestamp":
+            raise StoreError("The first column of a series file must be 'timestamp'")
+        if any(np.dtype(dtype).itemsize != 8 for _, dtype in layout):
+            raise StoreError("Series file columns must be 8 bytes wide")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _FileLock(_lock_path(path)):
+            if not path.exists():
+                temporary = path.with_name(path.name + ".tmp")
+                _write_file(temporary, layout, capacity, {name: np.empty(0, dtype) for name, dtype in layout})
+                os.replace(temporary, path)
+                _fsync_directory(path.parent)
+        return cls(path)
+
+    @property
+    def length(self) -> int:
+        """Committed rows, re-read from disk so appends by other processes are seen"""
+        with open(self.path, "rb") as file:
+            file.seek(_LENGTH_OFFSET)
+            data = file.read(8)
+        if len(data) != 8:
+            raise StoreError(f"{self.path} is truncated inside its header")
+        return struct.unpack("<Q", data)[0]
+
+    @property
+    def column_names(self) -> List[str]:
+        return [name for name, _ in self._layout]
+
+    def read(
+        self,
+        start: Optional[np.datetime64] = None,
+        end: Optional[np.datetime64] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Rows with start <= timestamp <= end as read-only memmap views
+
+        The bounds are found by binary search on the timestamp column.
+        """
+        self._refresh()
+        length = min(self.length, self._capacity)
+        timestamps = self._columns["timestamp"][:length]
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        hi = length if end is None else int(np.searchsorted(timestamps, end, side="right"))
+        return {name: values[lo:max(lo, hi)] for name, values in self._columns.items()}
+
+    def bounds(self) -> Optional[Tuple[np.datetime64, np.datetime64]]:
+        """First and last committed timestamp, or None when the file is empty"""
+        self._refresh()
+        length = min(self.length, self._capacity)
+        if length == 0:
+            return None
+        timestamps = self._columns["timestamp"]
+        return timestamps[0], timestamps[length - 1]
+
+    def append(self, columns: Dict[str, np.ndarray]) -> int:
+        """
+        Append rows that follow the last committed timestamp; returns rows written
+
+        Rows at or before the last committed timestamp are skipped, so replaying
+        an append after a crash is harmless.
+        """
+        with self._lock:
+            self._refresh()
+            length = self.length
+            timestamps = np.asarray(columns["timestamp"], dtype=self._dtypes["timestamp"])
+            if length:
+                skip = int(np.searchsorted(timestamps, self._columns["timestamp"][length - 1], side="right"))
+            else:
+                skip = 0
+            count = len(timestamps) - skip
+            if count <= 0:
+                return 0
+            if np.any(np.diff(timestamps[skip:]) <= np.timedelta64(0)):
+                raise StoreError("Appended timestamps must be strictly increasing")
+
+            if length + count > self._capacity:
+                self._grow(length + count)
+            writable = np.memmap(self.path, dtype=np.uint8, mode="r+")
+            try:
+                for name, values in self._column_views(writable).items():
+                    values[length:length + count] = np.asarray(columns[name])[skip:]
+                writable.flush()
+            finally:
+                del writable
+            self._commit_length(length + count)
+            return count
+
+    def truncate(self, length: int) -> None:
+        """Drop committed rows beyond length"""
+        with self._lock:
+            if length < self.length:
+                self._commit_length(length)
+
+    def compact(self, capacity: Optional[int] = None) -> None:
+        """Rewrite the file with its committed rows and the given (default: minimal) capacity"""
+        with self._lock:
+            self._refresh()
+            length = min(self.length, self._capacity)
+            capacity = max(capacity or length, length, 1)
+            self._rewrite(capacity, length)
+
+    def _commit_length(self, length: int) -> None:
+        fd = os.open(self.path, os.O_RDWR)
+        try:
+            os.pwrite(fd, struct.pack("<Q", length), _LENGTH_OFFSET)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _grow(self, required: int) -> None:
+        self._rewrite(max(2 * self._capacity, required), self.length)
+
+    def _rewrite(self, capacity: int, length: int) -> None:
+        columns = {name: values[:length] for name, values in self._columns.items()}
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        _write_file(temporary, self._layout, capacity, columns)
+        os.replace(temporary, self.path)
+        _fsync_directory(self.path.parent)
+        self._map()
+
+    def close(self) -> None:
+        """Release the mapping and its file descriptor"""
+        self._inode = None
+        self._columns = {}
+        mapped, self._mmap = self._mmap, None
+        if mapped is not None:
+            try:
+                mapped.close()
+            except BufferError:
+                # Views handed out by read() still use it; it is released with the last of them
+                pass
+
+    def _refresh(self) -> None:
+        """Remap when the file was closed, or another writer replaced (or truncated) it since it was mapped"""
+        stat = os.stat(self.path)
+        if stat.st_ino != self._inode or stat.st_size < self._size:
+            self._map()
+
+    def _map(self) -> None:
+        self.close()
+        if not self.path.exists():
+            raise StoreError(f"Series file {self.path} does not exist")
+        with open(self.path, "rb") as file:
+            inode, size = os.fstat(file.fileno()).st_ino, os.fstat(file.fileno()).st_size
+            header = file.read(_HEADER_BYTES)
+        try:
+            magic, version, capacity, _, layout_size = _HEADER.unpack_from(header)
+            if magic != STORE_MAGIC or version != STORE_VERSION:
+                raise StoreError(f"{self.path} is not a version {STORE_VERSION} series file")
+            layout = [tuple(column) for column in json.loads(header[_HEADER.size:_HEADER.size + layout_size])]
+            dtypes = {name: np.dtype(dtype) for name, dtype in layout}
+        except (struct.error, ValueError, TypeError) as e:
+            raise StoreError(f"{self.path} has an unreadable header: {str(e)}") from e
+        expected_size = _HEADER_BYTES + len(layout) * capacity * 8
+        if size < expected_size:
+            raise StoreError(f"{self.path} is truncated: {size} bytes for {capacity} rows")
+        self._inode = inode
+        self._size = expected_size
+        self._layout = layout
+        self._capacity = capacity
+        self._dtypes = dtypes
+        # One read-only mapping of the whole file; columns are views into it
+        mapped = np.memmap(self.path, dtype=np.uint8, mode="r")
+        self._mmap = mapped._mmap
+        self._columns = self._column_views(mapped)
+
+    def _column_views(self, mapped: np.memmap) -> Dict[str, np.ndarray]:
+        return {
+            name: mapped[offset:offset + self._capacity * 8].view(dtype)
+            for (name, dtype), offset in zip(self._dtypes.items(), _column_offsets(self._layout, self._capacity))
+        }
+
+def _lock_path(path: Path) -> Path:
+    return path.with_name(path.name + ".lock")
+
+def _column_offsets(layout: List[Tuple[str, str]], capacity: int) -> List[int]:
+    return [_HEADER_BYTES + index * capacity * 8 for index in range(len(layout))]
+
+def _write_file(path: Path, layout: List[Tuple[str, str]], capacity: int, columns: Dict[str, np.ndarray]) -> None:
+    """Write a complete file (header, then each column region) and flush it to disk"""
+    encoded_layout = json.dumps([list(column) for column in layout]).encode()
+    if _HEADER.size + len(encoded_layout) > _HEADER_BYTES:
+        raise StoreError("Series file layout does not fit in the header")
+    length = len(columns["timestamp"])
+    with open(path, "wb") as file:
+        header = _HEADER.pack(STORE_MAGIC, STORE_VERSION, capacity, length, len(encoded_layout)) + encoded_layout
+        file.write(header.ljust(_HEADER_BYTES, b"\0"))
+        for name, dtype in layout:
+            values = np.ascontiguousarray(columns[name], dtype=dtype)
+            file.write(values.tobytes())
+            file.write(b"\0" * ((capacity - length) * 8))
+        file.flush()
+        os.fsync(file.fileno())
+
+class SeriesStore:
+    """
+    Directory of series files laid out as <root>/<kind>/<timeframe>/<symbol>.bin
+
+    At most max_open_files files stay mapped; the least recently used one is
+    closed when another is opened, so the store never holds more than that
+    many file descriptors beyond those pinned by views still in use.
+    """
+
+    def __init__(self, root: str, enabled: bool = True, max_open_files: int = 256):
+        self.root = Path(root)
+        self.enabled = enabled
+        self.max_open_files = max(max_open_files, 1)
+        self._files: "OrderedDict[Tuple[str, str, str], SeriesFile]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rows_read = 0
+        self.rows_appended = 0
+        self.closed_files = 0
+
+    def path(self, kind: str, symbol: str, timeframe: str) -> Path:
+        safe_symbol = "".join(c if c.isalnum() or c in "-_." else "_" for c in symbol)
+        return self.root / kind / timeframe / f"{safe_symbol}.bin"
+
+    def open(self, kind: str, symbol: str, timeframe: str) -> Optional[SeriesFile]:
+        """The series file, or None if nothing was stored for this series yet"""
+        key = (kind, symbol, timeframe)
+        with self._lock:
+            series_file = self._files.get(key)
+            if series_file is None:
+                path = self.path(kind, symbol, timeframe)
+                if not path.exists():
+                    return None
+                series_file = self._add(key, SeriesFile(path))
+            self._files.move_to_end(key)
+            return series_file
+
+    def close(self) -> None:
+        """Close every open file"""
+        with self._lock:
+            while self._files:
+                self._files.popitem(last=False)[1].close()
+
+    def _add(self, key: Tuple[str, str, str], series_file: SeriesFile) -> SeriesFile:
+        self._files[key] = series_file
+        while len(self._files) > self.max_open_files:
+            self._files.popitem(last=False)[1].close()
+            self.closed_files += 1
+        return series_file
+
+    def bounds(self, kind: str, symbol: str, timeframe: str) -> Optional[Tuple[np.datetime64, np.datetime64]]:
+        if not self.enabled:
+            return None
+        series_file = self.open(kind, symbol, timeframe)
+        return series_file.bounds() if series_file is not None else None
+
+    def read(
+        self,
+        kind: str,
+        symbol: str,
+        timeframe: str,
+        start: np.datetime64,
+        end: np.datetime64
+    ) -> Optional[Dict[str, np.ndarray]]:
+        """Stored rows with start <= timestamp <= end, or None if the series is not stored"""
+        if not self.enabled:
+            return None
+        series_file = self.open(kind, symbol, timeframe)
+        if series_file is None:
+            return None
+        columns = series_file.read(start, end)
+        self.rows_read += len(columns["timestamp"])
+        return columns
+
+    def append(self, kind: str, symbol: str, timeframe: str, columns: Dict[str, np.ndarray]) -> int:
+        """Append rows after the stored ones, creating the file on first use"""
+        if not self.enabled or len(columns["timestamp"]) == 0:
+            return 0
+        series_file = self.open(kind, symbol, timeframe)
+        if series_file is None:
+            with self._lock:
+                key = (kind, symbol, timeframe)
+                series_file = self._files.get(key)
+                if series_file is None:
+                    series_file = self._add(key, SeriesFile.create(
+                        self.path(kind, symbol, timeframe),
+                        {name: values.dtype for name, values in columns.items()}
+                    ))
+        written = series_file.append(columns)
+        self.rows_appended += written
+        return written
+
+    def iter_files(self) -> Iterator[Path]:
+        return iter(sorted(self.root.glob("*/*/*.bin")))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "root": str(self.root),
+            "open_files": len(self._files),
+            "max_open_files": self.max_open_files,
+            "closed_files": self.closed_files,
+            "rows_read": self.rows_read,
+            "rows_appended": self.rows_appended
+        }
+
+def repair_file(path: Path) -> Dict[str, Any]:
+    """
+    Check a series file and truncate it to its longest valid prefix
+
+    Removes an interrupted rewrite (.tmp), clamps a length beyond capacity and
+    drops rows whose timestamps stop increasing. A file that cannot be read at
+    all is moved aside to <name>.corrupt, so the series is fetched and stored
+    again from scratch.
+    """
+    report: Dict[str, Any] = {"path": str(path)}
+    # The writers' lock: a live append or rewrite is never repaired underneath
+    with _FileLock(_lock_path(path)):
+        temporary = path.with_name(path.name + ".tmp")
+        if temporary.exists():
+            temporary.unlink()
+            report["removed_temporary"] = True
+        try:
+            series_file = SeriesFile(path)
+        except (StoreError, OSError) as e:
+            report["error"] = str(e)
+            moved = path.with_name(path.name + ".corrupt")
+            os.replace(path, moved)
+            report["moved_to"] = str(moved)
+            return report
+
+        length = series_file.length
+        valid = min(length, series_file._capacity)
+        decreasing = np.flatnonzero(np.diff(series_file._columns["timestamp"][:valid]) <= np.timedelta64(0))
+        if len(decreasing):
+            valid = int(decreasing[0]) + 1
+        if valid < length:
+            series_file._commit_length(valid)
+        series_file.close()
+    report.update({"rows": valid, "dropped_rows": length - valid})
+    return report
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Maintenance commands for the series store
+
+    python series_store.py repair   # validate files and drop torn or invalid rows
+    python series_store.py compact  # shrink files to their committed rows
+    """
+    from config import get_settings
+
+    parser = argparse.ArgumentParser(description="Maintain the on-disk series store")
+    parser.add_argument("command", choices=["repair", "compact"])
+    parser.add_argument("--root", default=get_settings().STORE_DIR, help="Store directory")
+    args = parser.parse_args(argv)
+
+    store = SeriesStore(args.root)
+    for path in store.iter_files():
+        if args.command == "repair":
+            print(json.dumps(repair_file(path)))
+        else:
+            report = repair_file(path)
+            if "error" not in report:
+                before = path.stat().st_size
+                series_file = SeriesFile(path)
+                series_file.compact()
+                series_file.close()
+                report.update({"bytes_before": before, "bytes_after": path.stat().st_size})
+            print(json.dumps(report))
+
+if __name__ == "__main__":
+    main()
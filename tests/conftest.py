@@ -0,0 +1,25 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Settings are read once when the app modules are imported, so the test
+# environment has to be in place before any of them loads
+os.environ["STORE_DIR"] = tempfile.mkdtemp(prefix="series-store-")
+os.environ["SIMULATED_FETCH_LATENCY_SECONDS"] = "0"
+os.environ["REDIS_ENABLED"] = "false"
+os.environ["TICK_SOURCE"] = "none"
+os.environ["GENERATION_EXECUTOR"] = "inline"
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pytest
+
+from data_processor import data_cache, intraday_store
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Start every test without cached queries, segments or intraday bars"""
+    data_cache.clear()
+    intraday_store.clear()
+    yield
@@ -0,0 +1,70 @@
+# tests/test_aggregators.py
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from aggregators import EXACT_QUANTILE_VALUES, QuantileSketch, RunningStats, StreamingAggregator, merge_aggregators
+
+_PERCENTILES = (1, 5, 25, 75, 95, 99)
+
+def _assert_matches_numpy(summary, values, rtol):
+    assert summary["count"] == len(values)
+    np.testing.assert_allclose(summary["mean"], values.mean(), rtol=1e-12)
+    np.testing.assert_allclose(summary["std_dev"], values.std(), rtol=1e-9)
+    assert (summary["min"], summary["max"]) == (values.min(), values.max())
+    np.testing.assert_allclose(summary["median"], np.median(values), rtol=rtol)
+    for p in _PERCENTILES:
+        np.testing.assert_allclose(summary["percentiles"][f"p{p:g}"], np.percentile(values, p), rtol=rtol)
+
+@pytest.mark.parametrize("values", [np.arange(10.0), np.arange(50.0), np.random.default_rng(0).normal(5, 3, 1000)])
+def test_small_streams_have_exact_quantiles(values):
+    stats = RunningStats()
+    for chunk in np.array_split(values, 3):
+        stats.update(chunk)
+    _assert_matches_numpy(stats.summary(), values, rtol=1e-12)
+
+def test_large_streams_stay_within_the_sketch_accuracy():
+    values = np.random.default_rng(1).lognormal(3, 1, 20_000)
+    stats = RunningStats(relative_accuracy=0.01)
+    for chunk in np.array_split(values, 7):
+        stats.update(chunk)
+    _assert_matches_numpy(stats.summary(), values, rtol=0.02)
+
+def test_sketch_interpolates_between_ranks():
+    sketch = QuantileSketch(relative_accuracy=0.001)
+    sketch.update(np.array([10.0, 20.0]))
+    np.testing.assert_allclose(sketch.quantile(0.5), 15.0, rtol=0.002)
+    np.testing.assert_allclose(sketch.quantile(0.25), 12.5, rtol=0.002)
+
+@pytest.mark.parametrize("size", [EXACT_QUANTILE_VALUES // 2, EXACT_QUANTILE_VALUES * 4])
+def test_merged_aggregators_match_one_pass(size):
+    rng = np.random.default_rng(2)
+    value = rng.normal(100, 20, size)
+    data_type = rng.choice(["price", "volume"], size)
+    source = rng.choice(["a", "b", "c"], size)
+    timestamp = np.datetime64("2024-01-01", "us") + rng.integers(0, 3 * 3600, size) * np.timedelta64(1, "s")
+    options = {"group_by": ("data_type", "source"), "bucket": timedelta(hours=1)}
+
+    whole = StreamingAggregator(**options)
+    whole.update(value, data_type, source, timestamp)
+
+    parts = []
+    for indices in np.array_split(np.arange(size), 4):
+        part = StreamingAggregator(**options)
+        part.update(value[indices], data_type[indices], source[indices], timestamp[indices])
+        parts.append(part)
+    merged = merge_aggregators(parts)
+
+    expected, actual = whole.results(), merged.results()
+    assert len(actual) == len(expected) == 18
+    for merged_group, whole_group in zip(actual, expected):
+        for name in ("data_type", "source", "bucket", "count", "min", "max", "median", "percentiles"):
+            assert merged_group[name] == whole_group[name], name
+        np.testing.assert_allclose(merged_group["mean"], whole_group["mean"], rtol=1e-12)
+        np.testing.assert_allclose(merged_group["std_dev"], whole_group["std_dev"], rtol=1e-9)
+    _assert_matches_numpy(merged.total().summary(), value, rtol=0.02)
+
+def test_aggregators_with_different_configurations_do_not_merge():
+    with pytest.raises(ValueError):
+        StreamingAggregator(group_by=("source",)).merge(StreamingAggregator())
@@ -0,0 +1,91 @@
+# tests/test_analytics.py
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+import data_processor
+from analytics import (
+    align_returns, correlation_from_covariance, covariance_matrices, fetch_portfolio_analytics,
+    sampling_factor, simulate_portfolio_returns, simulate_portfolio_returns_parallel, value_at_risk
+)
+
+_WEIGHTS = np.array([0.4, 0.3, 0.2, 0.1])
+
+def _simulation_inputs():
+    returns = np.random.default_rng(7).normal(0.0005, 0.01, (60, 4))
+    mean, factor = sampling_factor(returns)
+    return mean, factor, _WEIGHTS
+
+def _series(timestamps, close):
+    return {"timestamp": np.array(timestamps, dtype="datetime64[us]"), "close": np.asarray(close, dtype=np.float64)}
+
+def test_rolling_correlation_matches_numpy():
+    returns = np.random.default_rng(3).normal(0, 0.01, (40, 4))
+    # A scaled copy, an inverted copy and a column without variance
+    returns = np.column_stack([returns, 3 * returns[:, 0], -returns[:, 1], np.zeros(40)])
+    correlation = correlation_from_covariance(covariance_matrices(returns, 10, step=3))
+    assert correlation.shape == (11, 7, 7)
+    for k, matrix in enumerate(correlation):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            expected = np.corrcoef(returns[3 * k:3 * k + 10], rowvar=False)
+        np.testing.assert_allclose(matrix, expected, rtol=1e-12, atol=1e-15)
+        # Exactly 1 on the diagonal and within [-1, 1] despite rounding
+        np.testing.assert_array_equal(np.diagonal(matrix)[:6], 1.0)
+        assert np.isnan(matrix[6]).all() and np.isnan(matrix[:, 6]).all()
+        assert (np.abs(matrix[:6, :6]) <= 1.0).all()
+        np.testing.assert_allclose([matrix[0, 4], matrix[1, 5]], [1.0, -1.0], rtol=1e-12)
+
+def test_correlation_of_misaligned_bars_uses_the_shared_timestamps():
+    rng = np.random.default_rng(5)
+    days = np.datetime64("2024-01-01", "us") + np.arange(30) * np.timedelta64(1, "D")
+    closes = {symbol: 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 30))) for symbol in ("A", "B", "C")}
+    # B misses some bars, C starts later and ends earlier
+    keep_b = np.ones(30, dtype=bool)
+    keep_b[[4, 5, 17]] = False
+    series = {
+        "A": _series(days, closes["A"]),
+        "B": _series(days[keep_b], closes["B"][keep_b]),
+        "C": _series(days[3:27], closes["C"][3:27])
+    }
+    aligned = align_returns(series, ["A", "B", "C"])
+
+    shared = np.flatnonzero(keep_b[3:27]) + 3
+    np.testing.assert_array_equal(aligned.timestamps, days[shared][1:])
+    expected_returns = np.column_stack([np.diff(np.log(closes[symbol][shared])) for symbol in ("A", "B", "C")])
+    np.testing.assert_allclose(aligned.returns, expected_returns, rtol=1e-12)
+
+    window = len(aligned.returns)
+    correlation = correlation_from_covariance(covariance_matrices(aligned.returns, window))[0]
+    np.testing.assert_allclose(correlation, np.corrcoef(expected_returns, rowvar=False), rtol=1e-12)
+    np.testing.assert_array_equal(np.diagonal(correlation), 1.0)
+
+def test_monte_carlo_var_is_pinned_for_a_seed():
+    simulated = simulate_portfolio_returns(*_simulation_inputs(), 10_000, 42, 1000)
+    # Recorded values; a change here alters every simulation served for a given seed
+    np.testing.assert_allclose(value_at_risk(simulated, 0.95), (0.008503066109044364, 0.010278193458318291), rtol=1e-12)
+    np.testing.assert_allclose(value_at_risk(simulated, 0.99), (0.011453722814375213, 0.013073720164454678), rtol=1e-12)
+    np.testing.assert_array_equal(simulate_portfolio_returns(*_simulation_inputs(), 10_000, 42, 1000), simulated)
+    assert value_at_risk(simulate_portfolio_returns(*_simulation_inputs(), 10_000, 43, 1000), 0.95)[0] != value_at_risk(simulated, 0.95)[0]
+
+def test_parallel_simulation_matches_the_serial_one(monkeypatch):
+    pool = ThreadPoolExecutor(max_workers=3)
+    monkeypatch.setattr(data_processor, "_generation_executor", pool)
+    try:
+        for paths, chunk_paths in ((10_000, 1000), (10_001, 999), (5, 1000)):
+            serial = simulate_portfolio_returns(*_simulation_inputs(), paths, 42, chunk_paths)
+            parallel = asyncio.run(simulate_portfolio_returns_parallel(*_simulation_inputs(), paths, 42, chunk_paths))
+            np.testing.assert_array_equal(parallel, serial)
+
+        holdings = {"AAPL": 0.5, "MSFT": 0.3, "GOOGL": 0.2}
+        results = [
+            asyncio.run(fetch_portfolio_analytics(
+                holdings, lookback=60, simulations=20_000, seed=5, chunk_values=10_000,
+                parallel=parallel, end_date=datetime(2024, 6, 28)
+            ))["value_at_risk"]["monte_carlo"]
+            for parallel in (False, True)
+        ]
+        assert results[0] == results[1]
+    finally:
+        pool.shutdown()
@@ -0,0 +1,263 @@
+# tests/test_cache.py
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import data_processor
+from cache import RedisCache, SegmentCache, SingleFlight, TTLCache, decode_columns, encode_columns, estimate_size
+from data_processor import fetch_market_series
+from models import TimeFrame
+from series_store import SeriesFile, SeriesStore
+
+class _MemoryRedis:
+    """In-memory stand-in for the parts of the asyncio redis client RedisCache uses"""
+
+    def __init__(self):
+        self.values = {}
+        self.expiry = {}
+        self.now = 0.0
+        self.round_trips = 0
+
+    async def mget(self, keys):
+        self.round_trips += 1
+        return [self.values.get(key) if self.expiry.get(key, 0) > self.now else None for key in keys]
+
+    def pipeline(self, transaction=True):
+        return _MemoryPipeline(self)
+
+class _MemoryPipeline:
+    def __init__(self, server):
+        self.server = server
+        self.commands = []
+
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value, ex))
+
+    async def execute(self):
+        self.server.round_trips += 1
+        for key, value, ex in self.commands:
+            self.server.values[key] = bytes(value)
+            self.server.expiry[key] = self.server.now + ex
+        return [True] * len(self.commands)
+
+class _UnreachableRedis:
+    def __init__(self):
+        self.calls = 0
+
+    async def mget(self, keys):
+        self.calls += 1
+        raise ConnectionError("connection refused")
+
+    def pipeline(self, transaction=True):
+        self.calls += 1
+        raise ConnectionError("connection refused")
+
+def _columns():
+    return {
+        "timestamp": np.datetime64("2024-01-01", "us") + np.arange(3) * np.timedelta64(1, "m"),
+        "close": np.array([1.5, 2.5, 3.5]),
+        "volume": np.array([10, 20, 30], dtype=np.int64)
+    }
+
+def _assert_columns_equal(actual, expected):
+    assert list(actual) == list(expected)
+    for name in expected:
+        assert actual[name].dtype == expected[name].dtype
+        np.testing.assert_array_equal(actual[name], expected[name])
+
+def test_least_recently_used_entries_are_evicted_first():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+def test_entries_expire_after_their_ttl():
+    cache = TTLCache(ttl_seconds=3600)
+    cache.set("kept", 1)
+    cache.set("expired", 2, ttl=0)
+    assert cache.get("expired") is None
+    assert cache.get("kept") == 1
+    assert cache.stats()["expirations"] == 1
+
+def test_byte_budget_evicts_and_rejects_oversized_values():
+    array = np.zeros(1000)
+    cache = TTLCache(max_entries=0, max_bytes=3 * estimate_size(array))
+    for key in "abcd":
+        cache.set(key, np.zeros(1000))
+    assert "a" not in cache and all(key in cache for key in "bcd")
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+    cache.set("large", np.zeros(5000))
+    assert "large" not in cache
+    assert all(key in cache for key in "bcd")
+
+def test_views_are_charged_the_array_they_keep_alive(tmp_path):
+    block = np.zeros(100_000)
+    assert estimate_size(block[:10]) >= block.nbytes
+    # Columns of one block are charged it once
+    columns = {"close": block[:10], "open": block[10:20]}
+    assert estimate_size(columns) < 2 * block.nbytes
+
+    path = tmp_path / "AAPL.bin"
+    series_file = SeriesFile.create(path, {"timestamp": np.dtype("datetime64[us]"), "close": np.dtype(np.float64)})
+    series_file.append({
+        "timestamp": np.datetime64("2024-01-01", "us") + np.arange(10_000) * np.timedelta64(1, "m"),
+        "close": np.arange(10_000.0)
+    })
+    view = series_file.read(np.datetime64("2024-01-01", "us"), np.datetime64("2024-01-01T00:01", "us"))
+    assert len(view["close"]) == 2
+    assert estimate_size(view) >= path.stat().st_size
+
+def test_segments_cut_from_a_block_are_charged_the_block():
+    store = TTLCache(max_entries=0)
+    segments = SegmentCache(store)
+    block = {"close": np.arange(100_000.0)}
+    segments.insert("AAPL", 0, {"close": block["close"][:10]})
+    assert store.stats()["bytes"] >= block["close"].nbytes
+
+    # So are the zero-copy slices lookups hand out
+    (_, _, columns), = segments.lookup("AAPL", 2, 5)
+    assert estimate_size(columns) >= block["close"].nbytes
+
+    # Merging adjacent segments copies them, which releases the block
+    segments.insert("AAPL", 5, {"close": np.zeros(2)}, replace=True)
+    assert store.stats()["bytes"] < block["close"].nbytes
+
+class _Loader:
+    """Load that counts its calls and waits until released"""
+
+    def __init__(self, result="value", error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+def test_concurrent_callers_share_one_load():
+    flight = SingleFlight()
+    loader = _Loader()
+
+    async def run():
+        waiters = [asyncio.ensure_future(flight.run("key", loader)) for _ in range(5)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(run()) == ["value"] * 5
+    assert loader.calls == 1
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4, "failures": 0}
+
+def test_a_failed_load_reaches_every_waiter_and_is_not_kept():
+    flight = SingleFlight()
+    loader = _Loader(error=ValueError("upstream down"))
+
+    async def run():
+        waiters = [asyncio.ensure_future(flight.run("key", loader)) for _ in range(3)]
+        await asyncio.sleep(0)
+        loader.release.set()
+        errors = await asyncio.gather(*waiters, return_exceptions=True)
+        # The next call loads again
+        loader.error = None
+        return errors, await flight.run("key", loader)
+
+    errors, retried = asyncio.run(run())
+    assert [str(error) for error in errors] == ["upstream down"] * 3
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert retried == "value" and loader.calls == 2
+    assert flight.stats()["failures"] == 1
+
+def test_cancelling_one_waiter_leaves_the_load_and_the_others():
+    flight = SingleFlight()
+    loader = _Loader()
+
+    async def run():
+        cancelled, kept = (asyncio.ensure_future(flight.run("key", loader)) for _ in range(2))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert flight.stats()["in_flight"] == 1
+        loader.release.set()
+        return await kept
+
+    assert asyncio.run(run()) == "value"
+    assert loader.calls == 1
+
+def test_columns_survive_encoding():
+    _assert_columns_equal(decode_columns(encode_columns(_columns())), _columns())
+
+def test_values_round_trip_in_one_request_per_batch():
+    server = _MemoryRedis()
+    cache = RedisCache(server, namespace="test")
+
+    async def run():
+        await cache.set_many({"a": _columns(), "b": _columns()})
+        return await cache.get_many(["a", "b", "c"])
+
+    found = asyncio.run(run())
+    assert server.round_trips == 2
+    assert set(server.values) == {"test:a", "test:b"}
+    assert set(found) == {"a", "b"}
+    _assert_columns_equal(found["a"], _columns())
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+def test_values_expire_after_their_ttl():
+    server = _MemoryRedis()
+    cache = RedisCache(server, ttl_seconds=60)
+
+    async def run():
+        await cache.set_many({"a": _columns()})
+        await cache.set_many({"b": _columns()}, ttl=5)
+        server.now = 10
+        return await cache.get_many(["a", "b"])
+
+    assert set(asyncio.run(run())) == {"a"}
+
+def test_unreachable_server_leaves_callers_on_their_local_cache():
+    server = _UnreachableRedis()
+    cache = RedisCache(server, retry_interval=3600)
+
+    async def run():
+        assert await cache.get_many(["a"]) == {}
+        await cache.set_many({"a": _columns()})
+        return await cache.get_many(["a"])
+
+    assert asyncio.run(run()) == {}
+    # The first failure disables the cache until the retry interval has passed
+    assert server.calls == 1
+    assert not cache.available
+    assert cache.stats()["errors"] == 1
+
+def test_workers_share_bars_through_the_cache(monkeypatch):
+    server = _MemoryRedis()
+    monkeypatch.setattr(data_processor, "redis_cache", RedisCache(server))
+    monkeypatch.setattr(data_processor, "series_store", SeriesStore("", enabled=False))
+    end = datetime(2024, 1, 31)
+    query = (["AAPL", "MSFT"], end - timedelta(days=29), end, TimeFrame.ONE_DAY, None)
+
+    first = asyncio.run(fetch_market_series(*query))
+    assert server.values
+
+    # A second worker starts with an empty local cache and reads every block from L2
+    data_processor.data_cache.clear()
+    provider = data_processor.get_market_provider()
+
+    async def unexpected(*args, **kwargs):
+        raise AssertionError("bars should come from the shared cache")
+
+    monkeypatch.setattr(provider, "fetch_bars", unexpected)
+    second = asyncio.run(fetch_market_series(*query))
+    for symbol in first:
+        _assert_columns_equal(second[symbol], first[symbol])
@@ -0,0 +1,51 @@
+# tests/test_generation.py
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from data_processor import _generate_price_series
+
+# Series of fixed symbols (whose seeds are derived from the symbol) pinned to the
+# values the generator produced when they were recorded. A change here alters
+# every series served for these symbols and has to be deliberate.
+_AAPL_DAILY = {
+    "open": [169.49196578275013, 173.42106758232998, 175.1243412506867, 176.5068303765898, 174.4715354834867],
+    "high": [169.8202660672128, 173.42793657532047, 175.99569729571724, 176.84373541404608, 174.89392848939107],
+    "low": [168.37863289894696, 172.19982198126172, 173.9978123159098, 175.11818824814577, 172.8268773650937],
+    "close": [169.70742922783526, 172.96429814490733, 175.4797073342172, 176.09602358708767, 174.33555904261198],
+    "volume": [286035060, 296115221, 361567113, 441435622, 171458519]
+}
+
+_BTC_HOURLY = {
+    "open": [22586.190431786184, 22671.039041654676, 22661.791137010314],
+    "high": [22671.039041654676, 22671.039041654676, 22671.039041654676],
+    "low": [22538.971217096765, 22661.466558736818, 22498.35829128255],
+    "close": [22671.039041654676, 22661.791137010314, 22505.003310081152],
+    "volume": [1335390625, 764229191, 994896769]
+}
+
+def _assert_pinned(series, pinned):
+    for name, values in pinned.items():
+        if series[name].dtype.kind == "f":
+            np.testing.assert_allclose(series[name], values, rtol=1e-12, err_msg=name)
+        else:
+            np.testing.assert_array_equal(series[name], values, err_msg=name)
+
+def test_stock_daily_series_is_pinned():
+    series = _generate_price_series(
+        "AAPL", 150.0, datetime(2024, 1, 1), datetime(2024, 1, 5), timedelta(days=1), None
+    )
+    np.testing.assert_array_equal(
+        series["timestamp"], np.arange("2024-01-01", "2024-01-06", dtype="datetime64[D]").astype("datetime64[us]")
+    )
+    _assert_pinned(series, _AAPL_DAILY)
+
+def test_crypto_hourly_series_is_pinned():
+    series = _generate_price_series(
+        "BTC-USD", 30000.0, datetime(2024, 1, 1), datetime(2024, 1, 1, 2), timedelta(hours=1), None,
+        volatility_factor=1.5
+    )
+    np.testing.assert_array_equal(
+        series["timestamp"], np.datetime64("2024-01-01T00:00", "us") + np.arange(3) * np.timedelta64(1, "h")
+    )
+    _assert_pinned(series, _BTC_HOURLY)
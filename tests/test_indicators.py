@@ -0,0 +1,77 @@
+# tests/test_indicators.py
+import asyncio
+from datetime import datetime
+
+import numpy as np
+
+import data_processor
+import indicators
+from data_processor import fetch_market_series
+from indicators import INDICATOR_OUTPUTS, fetch_indicators
+from models import TimeFrame
+
+_OUTPUTS = [name for names in INDICATOR_OUTPUTS.values() for name in names]
+
+def _fetch(start, end, timeframe=TimeFrame.ONE_HOUR):
+    return asyncio.run(fetch_indicators("AAPL", start, end, timeframe))
+
+def _assert_same_bars(actual, expected):
+    # Compare the bars both results cover
+    shared, actual_at, expected_at = np.intersect1d(actual["timestamp"], expected["timestamp"], return_indices=True)
+    assert len(shared) > 0
+    for name in _OUTPUTS:
+        np.testing.assert_array_equal(actual[name][actual_at], expected[name][expected_at], err_msg=name)
+
+def test_values_do_not_depend_on_the_cached_history():
+    fresh = _fetch(datetime(2024, 1, 5), datetime(2024, 3, 31))
+    assert not np.isnan(fresh["rsi"]).any()
+    data_processor.data_cache.clear()
+
+    # Extending a state across chain boundaries gives the same values as computing them at once
+    _fetch(datetime(2024, 1, 1), datetime(2024, 1, 10))
+    extended = _fetch(datetime(2024, 1, 5), datetime(2024, 3, 31))
+    _assert_same_bars(extended, fresh)
+    np.testing.assert_array_equal(extended["timestamp"], fresh["timestamp"])
+
+    # So does a request that starts in a later chain, or one that starts earlier
+    data_processor.data_cache.clear()
+    _assert_same_bars(_fetch(datetime(2024, 3, 1), datetime(2024, 3, 31)), fresh)
+    _assert_same_bars(_fetch(datetime(2023, 12, 1), datetime(2024, 2, 1)), fresh)
+
+def test_vwap_restarts_every_session():
+    start, end = datetime(2024, 1, 5), datetime(2024, 1, 12)
+    result = _fetch(start, end)
+    bars = asyncio.run(fetch_market_series(["AAPL"], start, end, TimeFrame.ONE_HOUR, None))["AAPL"]
+    np.testing.assert_array_equal(result["timestamp"], bars["timestamp"])
+
+    typical = (bars["high"] + bars["low"] + bars["close"]) / 3
+    days = bars["timestamp"].astype("datetime64[D]")
+    for day in np.unique(days):
+        session = days == day
+        expected = np.cumsum(typical[session] * bars["volume"][session]) / np.cumsum(bars["volume"][session])
+        np.testing.assert_allclose(result["vwap"][session], expected, rtol=1e-12)
+
+def test_concurrent_requests_extend_the_state_once(monkeypatch):
+    async def slow_fetch(*args, **kwargs):
+        # Every request reaches the fetch before any of them has stored its state
+        await asyncio.sleep(0.01)
+        return await fetch_market_series(*args, **kwargs)
+
+    monkeypatch.setattr(indicators, "fetch_market_series", slow_fetch)
+    # The requests all extend this cached state
+    _fetch(datetime(2024, 1, 5), datetime(2024, 1, 10))
+
+    async def run():
+        return await asyncio.gather(
+            fetch_indicators("AAPL", datetime(2024, 1, 5), datetime(2024, 2, 10), TimeFrame.ONE_HOUR),
+            fetch_indicators("AAPL", datetime(2024, 1, 5), datetime(2024, 3, 31), TimeFrame.ONE_HOUR),
+            fetch_indicators("AAPL", datetime(2024, 1, 5), datetime(2024, 2, 20), TimeFrame.ONE_HOUR)
+        )
+
+    results = asyncio.run(run())
+    data_processor.data_cache.clear()
+    fresh = _fetch(datetime(2024, 1, 5), datetime(2024, 3, 31))
+    for result in results:
+        assert (np.diff(result["timestamp"]) > np.timedelta64(0)).all()
+        _assert_same_bars(result, fresh)
+    np.testing.assert_array_equal(results[1]["timestamp"], fresh["timestamp"])
@@ -0,0 +1,85 @@
+# tests/test_ingestion.py
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from ingestion import ingest_alternative_stream, iter_msgpack_records, iter_ndjson_records
+
+def _record(value, source="twitter", timestamp="2024-01-01T00:00:00Z"):
+    return {"data_type": "sentiment", "source": source, "timestamp": timestamp, "value": value}
+
+async def _chunks(data: bytes, size: int):
+    for offset in range(0, len(data), size):
+        yield data[offset:offset + size]
+
+def _collect(records):
+    async def collect():
+        return [item async for item in records]
+
+    return asyncio.run(collect())
+
+def _ingest(records, **options):
+    return asyncio.run(ingest_alternative_stream(records, **options))
+
+_LINES = [
+    json.dumps(_record(0.5)),
+    "",
+    "{broken",
+    json.dumps(_record(0.1, source="reddit")),
+    json.dumps([1, 2]),
+    json.dumps({"data_type": "sentiment", "source": "twitter", "value": 1.0}),
+    json.dumps(_record(0.3, timestamp="yesterday")),
+    json.dumps(_record(-0.2))
+]
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_lines_are_parsed_wherever_chunks_split_them(chunk_size):
+    data = "\n".join(_LINES).encode()
+    records = _collect(iter_ndjson_records(_chunks(data, chunk_size)))
+    assert [line for line, _ in records] == [1, 3, 4, 5, 6, 7, 8]
+    assert records[0][1] == _record(0.5)
+    assert isinstance(records[1][1], ValueError)
+    # The last line needs no newline
+    assert records[-1] == (8, _record(-0.2))
+
+def test_invalid_lines_are_reported_with_their_line_numbers():
+    data = "\n".join(_LINES).encode()
+    result = _ingest(iter_ndjson_records(_chunks(data, 16)), chunk_rows=3)
+    assert (result["received"], result["accepted"], result["rejected"]) == (7, 3, 4)
+    assert [(error["line"], error["error"].split(":")[0]) for error in result["errors"]] == [
+        (3, "Invalid JSON"),
+        (5, "Record must be an object"),
+        (6, "Missing field 'timestamp'"),
+        (7, "Field 'timestamp' must be an ISO 8601 datetime")
+    ]
+    assert not result["errors_truncated"]
+
+def test_reported_errors_are_capped_but_all_counted():
+    lines = [json.dumps(_record(float(i))) if i % 2 else "{broken" for i in range(100)]
+    data = "\n".join(lines).encode()
+    result = _ingest(iter_ndjson_records(_chunks(data, 64)), chunk_rows=7, max_errors=5)
+    assert result["rejected"] == 50 and result["accepted"] == 50
+    assert [error["line"] for error in result["errors"]] == [1, 3, 5, 7, 9]
+    assert result["errors_truncated"]
+
+def test_statistics_do_not_depend_on_the_chunk_size():
+    values = np.random.default_rng(0).normal(0, 1, 200)
+    data = "\n".join(json.dumps(_record(value)) for value in values.tolist()).encode()
+    results = [
+        _ingest(iter_ndjson_records(_chunks(data, 1000)), chunk_rows=chunk_rows)["insights"]
+        for chunk_rows in (1, 37, 10_000)
+    ]
+    for insights in results:
+        for name in ("count", "median", "min", "max", "percentiles"):
+            assert insights[name] == results[0][name], name
+        np.testing.assert_allclose(insights["mean"], values.mean(), rtol=1e-12)
+        np.testing.assert_allclose(insights["std_dev"], values.std(), rtol=1e-12)
+
+def test_msgpack_records_are_numbered_and_corrupt_data_ends_the_stream():
+    msgpack = pytest.importorskip("msgpack")
+    data = b"".join(msgpack.packb(_record(value)) for value in (0.1, 0.2)) + b"\xc1"
+    records = _collect(iter_msgpack_records(_chunks(data, 5)))
+    assert records[:2] == [(1, _record(0.1)), (2, _record(0.2))]
+    assert records[2][0] == 3 and isinstance(records[2][1], ValueError)
@@ -0,0 +1,107 @@
+# tests/test_intraday.py
+import numpy as np
+import pytest
+
+from intraday import BarRing, IntradayStore
+
+_LAYOUT = {"close": np.float64, "volume": np.int64}
+
+def _bars(lo, hi):
+    """Bars of indices [lo, hi): bar i closes at i and trades 10 * i"""
+    index = np.arange(lo, hi)
+    return {
+        "timestamp": np.datetime64("2024-01-01T00:00", "us") + index * np.timedelta64(1, "m"),
+        "close": index.astype(np.float64),
+        "volume": index * 10
+    }
+
+def _assert_bars(views, lo, hi):
+    assert views is not None
+    expected = _bars(lo, hi)
+    for name, values in expected.items():
+        np.testing.assert_array_equal(views[name], values, err_msg=name)
+
+def test_appends_wrap_around_and_keep_the_newest_bars():
+    ring = BarRing(8, _LAYOUT)
+    for lo in range(0, 20, 3):
+        ring.write(lo, _bars(lo, lo + 3), complete_hi=lo + 3)
+    assert (ring.lo, ring.hi) == (13, 21)
+    _assert_bars(ring.window(13, 21), 13, 21)
+    # Evicted bars and bars not written yet are not held
+    assert ring.window(12, 16) is None
+    assert ring.window(18, 22) is None
+
+@pytest.mark.parametrize("lo, hi", [(14, 18), (15, 17), (10, 18)])
+def test_windows_spanning_the_wrap_point_are_zero_copy_views(lo, hi):
+    ring = BarRing(8, _LAYOUT)
+    ring.write(0, _bars(0, 10), complete_hi=10)
+    ring.write(10, _bars(10, 18), complete_hi=18)
+    # Slots 6, 7, 0, 1 hold bars 14 to 17
+    views = ring.window(lo, hi)
+    _assert_bars(views, lo, hi)
+    for name, view in views.items():
+        assert view.base is ring._columns[name]
+        assert not view.flags.writeable
+
+def test_writes_overlapping_the_ring_replace_its_bars():
+    ring = BarRing(8, _LAYOUT)
+    ring.write(0, _bars(0, 12), complete_hi=12)
+    replacement = _bars(9, 14)
+    replacement["close"] = replacement["close"] + 0.5
+    ring.write(9, replacement, complete_hi=14)
+    views = ring.window(6, 14)
+    np.testing.assert_array_equal(views["close"], [6, 7, 8, 9.5, 10.5, 11.5, 12.5, 13.5])
+
+    # A write past the end restarts the ring; one older than the ring is ignored
+    ring.write(30, _bars(30, 32), complete_hi=32)
+    assert (ring.lo, ring.hi) == (30, 32)
+    ring.write(0, _bars(0, 4), complete_hi=4)
+    assert (ring.lo, ring.hi) == (30, 32)
+
+def test_forming_bars_expire():
+    ring = BarRing(8, _LAYOUT)
+    ring.write(0, _bars(0, 6), complete_hi=5, expires=0.0)
+    # The complete bars stay readable, the expired forming bar does not
+    _assert_bars(ring.window(0, 5), 0, 5)
+    assert ring.window(0, 6) is None
+    assert ring.quote("AAPL") is None
+
+def test_quotes_follow_the_forming_bar_and_the_live_feed():
+    store = IntradayStore(capacity_bars=8)
+    store.write("stock", "AAPL", 10, _bars(10, 20), complete_hi=19, ttl=60)
+    quote = store.quote("stock", "AAPL")
+    assert quote["source"] == "bars" and quote["price"] == 19.0
+    assert quote["bar"] == {"timestamp": "2024-01-01T00:19:00", "close": 19.0, "volume": 190}
+
+    live = _bars(19, 20)
+    live["close"] = np.array([19.75])
+    store.update_live("stock", "AAPL", 19, live, price=19.8, time_us=1_704_068_350_000_000)
+    quote = store.quote("stock", "AAPL")
+    assert quote["source"] == "ticks" and quote["price"] == 19.8
+    assert quote["timestamp"] == "2024-01-01T00:19:10"
+    assert quote["bar"]["close"] == 19.75
+
+    # Generated bars no longer overwrite the live forming bar
+    store.write("stock", "AAPL", 15, _bars(15, 20), complete_hi=19, ttl=60)
+    assert store.quote("stock", "AAPL")["bar"]["close"] == 19.75
+    np.testing.assert_array_equal(store.window("stock", "AAPL", 17, 20)["close"], [17, 18, 19.75])
+
+    # The next live bar completes the previous one as the feed left it
+    store.update_live("stock", "AAPL", 20, _bars(20, 21), price=20.0, time_us=1_704_068_400_000_000)
+    assert store.quote("stock", "AAPL")["bar"]["close"] == 20.0
+    np.testing.assert_array_equal(store.window("stock", "AAPL", 18, 21)["close"], [18, 19.75, 20])
+
+def test_store_keeps_the_newest_bars_and_evicts_least_recently_used_series():
+    store = IntradayStore(capacity_bars=4, max_series=2)
+    store.write("stock", "AAPL", 0, _bars(0, 10), complete_hi=10)
+    _assert_bars(store.window("stock", "AAPL", 6, 10), 6, 10)
+    assert store.window("stock", "AAPL", 5, 10) is None
+
+    store.write("stock", "MSFT", 0, _bars(0, 4), complete_hi=4)
+    store.window("stock", "AAPL", 6, 10)
+    store.write("crypto", "BTC", 0, _bars(0, 4), complete_hi=4)
+    assert store.window("stock", "MSFT", 0, 4) is None
+    assert store.window("stock", "AAPL", 6, 10) is not None
+
+    stats = store.stats()
+    assert (stats["series"], stats["evictions"], stats["hits"], stats["misses"]) == (2, 1, 3, 2)
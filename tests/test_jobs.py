@@ -0,0 +1,102 @@
+# tests/test_jobs.py
+import asyncio
+import threading
+
+import pytest
+
+from jobs import JobManager, JobQueueFull
+from models import JobStatus
+
+def _blocked(release: threading.Event, value):
+    release.wait(5)
+    return value
+
+def _fail():
+    raise ValueError("bad input")
+
+async def _finished(manager, job_id):
+    while not manager.get(job_id).done:
+        await asyncio.sleep(0.005)
+    return manager.get(job_id)
+
+def test_jobs_run_to_their_result():
+    async def scenario():
+        manager = JobManager(workers=2, executor="thread")
+        try:
+            manager.submit("sum", sum, [1, 2, 3], kind="sum", metadata={"values": 3})
+            manager.submit("fail", _fail)
+            done = await _finished(manager, "sum")
+            failed = await _finished(manager, "fail")
+            return done.to_dict(), failed.to_dict(), manager.stats()
+        finally:
+            await manager.close()
+
+    done, failed, stats = asyncio.run(scenario())
+    assert done["status"] == JobStatus.COMPLETED.value and done["result"] == 6
+    assert done["kind"] == "sum" and done["metadata"] == {"values": 3}
+    assert done["wait_seconds"] is not None and done["run_seconds"] is not None
+    assert failed["status"] == JobStatus.FAILED.value and failed["error"] == "bad input"
+    assert stats["completed"] == 1 and stats["failed"] == 1
+
+def test_full_queue_rejects_and_cancelled_jobs_free_their_slot():
+    release = threading.Event()
+
+    async def scenario():
+        manager = JobManager(workers=1, queue_size=2, executor="thread")
+        try:
+            manager.submit("running", _blocked, release, "running")
+            while manager.get("running").status != JobStatus.RUNNING:
+                await asyncio.sleep(0.005)
+            manager.submit("first", _blocked, release, "first")
+            manager.submit("second", _blocked, release, "second")
+            with pytest.raises(JobQueueFull):
+                manager.submit("rejected", _blocked, release, "rejected")
+            assert manager.get("rejected") is None
+
+            # The cancelled job's slot is free before any worker gets to it
+            assert manager.cancel("first").status == JobStatus.CANCELLED
+            assert manager.stats()["queue_depth"] == 1
+            manager.submit("third", _blocked, release, "third")
+            with pytest.raises(JobQueueFull):
+                manager.submit("rejected", _blocked, release, "rejected")
+
+            release.set()
+            results = {job_id: (await _finished(manager, job_id)).result for job_id in ("running", "second", "third")}
+            return results, manager.get("first"), manager.stats()
+        finally:
+            release.set()
+            await manager.close()
+
+    results, cancelled, stats = asyncio.run(scenario())
+    assert results == {"running": "running", "second": "second", "third": "third"}
+    assert cancelled.status == JobStatus.CANCELLED and cancelled.started_at is None and cancelled.result is None
+    assert stats["rejected"] == 2 and stats["cancelled"] == 1 and stats["completed"] == 3
+    assert stats["queue_depth"] == 0
+
+def test_cancelled_running_job_discards_its_result():
+    release = threading.Event()
+
+    async def scenario():
+        manager = JobManager(workers=1, executor="thread")
+        try:
+            manager.submit("running", _blocked, release, "value")
+            while manager.get("running").status != JobStatus.RUNNING:
+                await asyncio.sleep(0.005)
+            manager.cancel("running")
+            release.set()
+            # The worker goes on with the next job
+            manager.submit("next", sum, [1, 2])
+            await _finished(manager, "next")
+            return manager.get("running"), manager.get("next")
+        finally:
+            release.set()
+            await manager.close()
+
+    cancelled, following = asyncio.run(scenario())
+    assert cancelled.status == JobStatus.CANCELLED and cancelled.result is None
+    assert following.result == 3
+
+def test_unknown_jobs_are_not_found():
+    manager = JobManager(executor="inline")
+    assert manager.get("missing") is None
+    assert manager.cancel("missing") is None
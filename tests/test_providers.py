@@ -0,0 +1,222 @@
+# tests/test_providers.py
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from aiohttp import web
+from pydantic import ValidationError
+from aiohttp.test_utils import TestServer
+
+import data_processor
+from data_processor import fetch_market_series, flush_series_store
+from config import Settings
+from models import TimeFrame
+from providers import CircuitBreaker, HTTPProvider, MarketDataProvider, UpstreamError, UpstreamUnavailable
+from series_store import SeriesStore
+
+_MINUTE = timedelta(minutes=1)
+_LO = (datetime(2024, 1, 2) - datetime(1970, 1, 1)) // _MINUTE
+
+class _Upstream:
+    """
+    Stand-in for the bars upstream: answers POST /bars with one bar per minute
+    for every requested symbol, except symbols it has no bars for and the
+    minutes listed in missing. Statuses queued in failures are answered first.
+    """
+
+    def __init__(self, empty=(), missing=(), failures=(), delay=0.0):
+        self.empty = set(empty)
+        self.missing = set(missing)
+        self.failures = list(failures)
+        self.delay = delay
+        self.payloads = []
+
+    async def handle(self, request):
+        payload = await request.json()
+        self.payloads.append(payload)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.failures:
+            return web.Response(status=self.failures.pop(0), text="unavailable")
+        step = payload["interval_seconds"] * 1000
+        data = {}
+        for symbol in payload["symbols"]:
+            if symbol in self.empty:
+                data[symbol] = {"timestamp": [], "open": [], "high": [], "low": [], "close": [], "volume": []}
+                continue
+            timestamps = [t for t in range(payload["start"], payload["end"], step) if t // step not in self.missing]
+            closes = [float(t // step - _LO) for t in timestamps]
+            data[symbol] = {
+                "timestamp": timestamps,
+                "open": closes, "high": closes, "low": closes, "close": closes,
+                "volume": [100] * len(timestamps)
+            }
+        return web.json_response({"data": data})
+
+def _run(upstream, scenario, **options):
+    async def main():
+        app = web.Application()
+        app.router.add_post("/bars", upstream.handle)
+        async with TestServer(app) as server:
+            options.setdefault("backoff_seconds", 0.0)
+            provider = HTTPProvider(str(server.make_url("")), **options)
+            try:
+                return await scenario(provider)
+            finally:
+                await provider.close()
+
+    return asyncio.run(main())
+
+@pytest.mark.parametrize("source", ["aws", "gcp", ""])
+def test_sources_without_a_provider_are_rejected_at_startup(source):
+    with pytest.raises(ValidationError, match="has no provider"):
+        Settings(MARKET_DATA_SOURCE=source)
+
+def test_providers_must_fetch_bars():
+    class Incomplete(MarketDataProvider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_symbols_of_one_range_are_batched():
+    upstream = _Upstream()
+    symbols = [f"S{i}" for i in range(5)]
+
+    async def scenario(provider):
+        return await provider.fetch_bars("market", _MINUTE, [(symbol, _LO, _LO + 10) for symbol in symbols])
+
+    series = _run(upstream, scenario, batch_size=2)
+    assert sorted(len(payload["symbols"]) for payload in upstream.payloads) == [1, 2, 2]
+    assert len(series) == len(symbols)
+    for columns in series:
+        np.testing.assert_array_equal(columns["close"], np.arange(10.0))
+
+def test_gaps_become_flat_bars_and_empty_ranges_have_no_rows():
+    upstream = _Upstream(empty={"HALTED"}, missing={_LO + 3, _LO + 4})
+
+    async def scenario(provider):
+        return await provider.fetch_bars("market", _MINUTE, [("AAPL", _LO, _LO + 6), ("HALTED", _LO, _LO + 6)])
+
+    traded, halted = _run(upstream, scenario)
+    np.testing.assert_array_equal(traded["close"], [0.0, 1.0, 2.0, 2.0, 2.0, 5.0])
+    np.testing.assert_array_equal(traded["volume"], [100, 100, 100, 0, 0, 100])
+    assert len(halted["timestamp"]) == 0
+    assert halted["volume"].dtype == np.int64
+
+def test_transient_failures_are_retried():
+    upstream = _Upstream(failures=[503, 429])
+
+    async def scenario(provider):
+        series = await provider.fetch_bars("market", _MINUTE, [("AAPL", _LO, _LO + 3)])
+        return series, provider.stats()
+
+    (columns,), stats = _run(upstream, scenario, retries=2)
+    np.testing.assert_array_equal(columns["close"], [0.0, 1.0, 2.0])
+    assert stats["calls"] == 3 and stats["retried"] == 2
+    assert stats["breaker"]["state"] == "closed"
+
+def test_rejected_requests_are_not_retried():
+    upstream = _Upstream(failures=[400])
+
+    async def scenario(provider):
+        with pytest.raises(UpstreamError):
+            await provider.fetch_bars("market", _MINUTE, [("AAPL", _LO, _LO + 3)])
+        return provider.stats()
+
+    stats = _run(upstream, scenario, retries=2)
+    assert stats["calls"] == 1
+    assert stats["breaker"]["state"] == "closed"
+
+def test_breaker_opens_fails_fast_and_closes_after_a_trial():
+    upstream = _Upstream(failures=[500] * 4)
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.2)
+    request = [("AAPL", _LO, _LO + 3)]
+
+    async def scenario(provider):
+        for _ in range(2):
+            with pytest.raises(UpstreamError):
+                await provider.fetch_bars("market", _MINUTE, request)
+        assert breaker.state == "open"
+        calls = len(upstream.payloads)
+        with pytest.raises(UpstreamUnavailable):
+            await provider.fetch_bars("market", _MINUTE, request)
+        assert len(upstream.payloads) == calls
+
+        await asyncio.sleep(0.2)
+        upstream.failures.clear()
+        await provider.fetch_bars("market", _MINUTE, request)
+        return breaker.state
+
+    assert _run(upstream, scenario, retries=1, breaker=breaker) == "closed"
+
+def test_cancelled_trial_does_not_block_the_breaker():
+    upstream = _Upstream(delay=10.0)
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.0)
+    breaker.record_failure()
+    request = [("AAPL", _LO, _LO + 3)]
+
+    async def scenario(provider):
+        trial = asyncio.ensure_future(provider.fetch_bars("market", _MINUTE, request))
+        while not upstream.payloads:
+            await asyncio.sleep(0.01)
+        assert breaker.trial_running
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert not breaker.trial_running
+
+        upstream.delay = 0.0
+        (columns,) = await provider.fetch_bars("market", _MINUTE, request)
+        return columns, breaker.state
+
+    columns, state = _run(upstream, scenario, retries=0, breaker=breaker)
+    assert len(columns["timestamp"]) == 3
+    assert state == "closed"
+
+def test_blocks_without_bars_are_gaps_in_the_series(monkeypatch, tmp_path):
+    (block_lo, block_hi), = data_processor._series_blocks(_MINUTE, _LO, _LO + 1)
+    size = block_hi - block_lo
+    # The upstream has nothing for the second of three blocks
+    upstream = _Upstream(missing=set(range(block_hi, block_hi + size)))
+    monkeypatch.setattr(data_processor, "series_store", SeriesStore(str(tmp_path)))
+    # From inside the first block to inside the third
+    first, last = block_lo + 10, block_hi + size + 9
+    epoch = datetime(1970, 1, 1)
+    query = (["AAPL"], epoch + first * _MINUTE, epoch + last * _MINUTE, TimeFrame.ONE_MINUTE, None)
+
+    async def scenario(provider):
+        monkeypatch.setattr(data_processor, "_market_provider", provider)
+        series = await fetch_market_series(*query)
+        await flush_series_store()
+        # The stored series has a hole; reading it again gives the same bars
+        data_processor.data_cache.clear()
+        again = await fetch_market_series(*query)
+        for name, values in series["AAPL"].items():
+            np.testing.assert_array_equal(again["AAPL"][name], values)
+        return series["AAPL"]
+
+    columns = _run(upstream, scenario)
+    expected = np.concatenate((np.arange(first, block_hi), np.arange(block_hi + size, last + 1)))
+    np.testing.assert_array_equal((columns["timestamp"] - np.datetime64(0, "us")) // np.timedelta64(1, "m"), expected)
+    np.testing.assert_array_equal(columns["close"], expected - _LO)
+
+def test_forming_bar_comes_from_the_timeframe_of_the_completed_bars(monkeypatch, tmp_path):
+    upstream = _Upstream()
+    monkeypatch.setattr(data_processor, "series_store", SeriesStore(str(tmp_path)))
+    hour = timedelta(hours=1)
+    end = datetime.utcnow()
+
+    async def scenario(provider):
+        monkeypatch.setattr(data_processor, "_market_provider", provider)
+        series = await fetch_market_series(["AAPL"], end - 5 * hour, end, TimeFrame.ONE_HOUR, None)
+        await flush_series_store()
+        return series["AAPL"]
+
+    columns = _run(upstream, scenario)
+    # Every bar, the forming one included, is the upstream's own hourly bar
+    assert {payload["interval_seconds"] for payload in upstream.payloads} == {3600}
+    indices = (columns["timestamp"] - np.datetime64(0, "us")) // np.timedelta64(1, "h")
+    assert indices[-1] == (end - datetime(1970, 1, 1)) // hour
+    np.testing.assert_array_equal(columns["close"], indices - _LO)
@@ -0,0 +1,45 @@
+# tests/test_routes.py
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+
+# How the bar rows render timestamps: no fraction for whole seconds
+_TIMESTAMP = re.compile(r"^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d$")
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+def _data(response):
+    assert response.status_code == 200, response.text
+    return response.json()["data"]
+
+def _assert_timestamps(values):
+    assert values
+    for value in values:
+        assert _TIMESTAMP.match(value), value
+
+def test_array_responses_render_timestamps_like_bar_rows(client):
+    rows = _data(client.get("/api/v1/stocks/AAPL", params={"days": 30}))
+    _assert_timestamps([row["timestamp"] for row in rows])
+
+    indicators = _data(client.get("/api/v1/indicators/AAPL", params={"days": 30, "indicators": ["sma"]}))
+    _assert_timestamps(indicators["timestamp"])
+    assert set(indicators["timestamp"]) <= {row["timestamp"] for row in rows}
+
+    correlation = _data(client.get("/api/v1/analytics/correlation", params={"symbols": "AAPL,MSFT", "window": 10}))
+    _assert_timestamps(correlation["timestamps"])
+
+    sentiment = _data(client.get("/api/v1/sentiment/AAPL", params={"aggregate": True}))
+    _assert_timestamps(sentiment["timestamp"])
+
+    portfolio = _data(client.post("/api/v1/analytics/portfolio", json={
+        "holdings": [{"symbol": "AAPL", "weight": 0.5}, {"symbol": "MSFT", "weight": 0.5}],
+        "lookback": 20,
+        "simulations": 0
+    }))
+    drawdown = portfolio["max_drawdown"]
+    _assert_timestamps([portfolio["start"], portfolio["end"], drawdown["peak"], drawdown["trough"]])
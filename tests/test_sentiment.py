@@ -0,0 +1,46 @@
+# tests/test_sentiment.py
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import data_processor
+from data_processor import SENTIMENT_SOURCES, data_cache, fetch_sentiment_matrix
+
+_START, _END = datetime(2024, 1, 1), datetime(2024, 1, 31)
+
+@pytest.fixture(autouse=True)
+def no_latency(monkeypatch):
+    monkeypatch.setattr(data_processor._settings, "SIMULATED_SENTIMENT_LATENCY_SECONDS", 0)
+
+def _fetch(sources=None, symbol="AAPL"):
+    return asyncio.run(fetch_sentiment_matrix(symbol, _START, _END, sources))
+
+def _column(matrix, name, source):
+    return matrix[name][:, matrix["sources"].index(source)]
+
+def test_sentiment_is_deterministic_for_the_same_sources():
+    first = _fetch(["twitter", "news"])
+    data_cache.clear()
+    second = _fetch(["twitter", "news"])
+    assert first is not second
+    assert second["sources"] == ["twitter", "news"]
+    for name in ("score", "volume", "momentum"):
+        np.testing.assert_array_equal(second[name], first[name], err_msg=name)
+
+def test_each_source_keeps_its_values_when_the_sources_change():
+    everything = _fetch()
+    assert everything["sources"] == SENTIMENT_SOURCES
+    subset = _fetch(["news", "twitter"])
+    # A different source list is a different cache entry
+    assert subset["score"].shape == (31, 2)
+    for source in ("news", "twitter"):
+        for name in ("score", "volume"):
+            np.testing.assert_array_equal(_column(subset, name, source), _column(everything, name, source))
+
+    # Other sources, or the same sources of another symbol, draw other values
+    assert not np.array_equal(_column(everything, "score", "reddit"), _column(everything, "score", "twitter"))
+    other = _fetch(["news", "twitter"], symbol="MSFT")
+    assert not np.array_equal(other["score"], subset["score"])
+    assert not np.array_equal(other["volume"], subset["volume"])
@@ -0,0 +1,77 @@
+# tests/test_serializers.py
+import json
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from main import app
+from serializers import columnar_ndjson_line, iter_ndjson_rows
+
+_METADATA = {"symbol": "AAPL", "exchange": "NASDAQ"}
+
+def _series(rows):
+    timestamps = np.datetime64("2024-01-01", "us") + np.arange(rows) * np.timedelta64(1, "D")
+    close = 100.0 + np.arange(rows) * 0.25
+    return {"timestamp": timestamps, "close": close, "volume": np.arange(rows, dtype=np.int64) * 10}
+
+def _lines(chunks):
+    text = b"".join(chunks).decode()
+    assert text.endswith("\n")
+    return text[:-1].split("\n")
+
+def _assert_compact(lines):
+    for line in lines:
+        # No spaces after separators, as the JSON responses are rendered
+        assert ", " not in line and '": ' not in line, line
+
+def test_ndjson_rows_are_compact_records_in_chunks():
+    series = _series(5)
+    chunks = list(iter_ndjson_rows(series, _METADATA, {"adjusted_close": "close"}, "Z", chunk_rows=2))
+    assert len(chunks) == 3
+    assert all(chunk.endswith(b"\n") for chunk in chunks)
+
+    lines = _lines(chunks)
+    _assert_compact(lines)
+    records = [json.loads(line) for line in lines]
+    assert records[1] == {
+        "symbol": "AAPL", "exchange": "NASDAQ", "timestamp": "2024-01-02T00:00:00Z",
+        "close": 100.25, "volume": 10, "adjusted_close": 100.25
+    }
+    assert [record["close"] for record in records] == series["close"].tolist()
+
+def test_columnar_ndjson_line_is_one_compact_object():
+    series = _series(3)
+    lines = _lines([columnar_ndjson_line(series, _METADATA)])
+    assert len(lines) == 1
+    _assert_compact(lines)
+    assert json.loads(lines[0]) == {
+        **_METADATA,
+        "timestamp": ["2024-01-01T00:00:00", "2024-01-02T00:00:00", "2024-01-03T00:00:00"],
+        "close": [100.0, 100.25, 100.5],
+        "volume": [0, 10, 20]
+    }
+
+def test_streamed_market_data_matches_the_json_response():
+    client = TestClient(app)
+    query = {
+        "symbols": ["AAPL", "MSFT"],
+        "data_source": "market",
+        "start_date": "2024-01-01T00:00:00",
+        "end_date": "2024-02-01T00:00:00",
+        "timeframe": "1d"
+    }
+    expected = client.post("/api/v1/market/data", json=query).json()["data"]
+
+    response = client.post("/api/v1/market/data", params={"stream": True}, json=query)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = _lines([response.content])
+    _assert_compact(lines)
+    assert [json.loads(line) for line in lines] == expected
+
+    columnar = client.post("/api/v1/market/data", params={"stream": True, "format": "columnar"}, json=query)
+    lines = _lines([columnar.content])
+    _assert_compact(lines)
+    objects = [json.loads(line) for line in lines]
+    assert [item["symbol"] for item in objects] == ["AAPL", "MSFT"]
+    assert sum(len(item["timestamp"]) for item in objects) == len(expected)
@@ -0,0 +1,148 @@
+# tests/test_series.py
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+import data_processor
+from data_processor import (
+    QueryTooLarge, fetch_market_series, fetch_crypto_series,
+    get_timedelta_from_timeframe, normalize_time_range, _generate_stock_bars, _generate_crypto_bars
+)
+from models import TimeFrame
+from resampling import resample_ohlcv
+
+_NOW = datetime(2024, 3, 14, 15, 37, 20)
+
+class _FrozenDatetime(datetime):
+    @classmethod
+    def utcnow(cls):
+        return _NOW
+
+@pytest.fixture
+def frozen_now(monkeypatch):
+    monkeypatch.setattr(data_processor, "datetime", _FrozenDatetime)
+    return _NOW
+
+def _assert_bars_equal(actual, expected):
+    assert actual.keys() == expected.keys()
+    for name in expected:
+        np.testing.assert_array_equal(actual[name], expected[name], err_msg=name)
+
+@pytest.mark.parametrize("generate", [_generate_stock_bars, _generate_crypto_bars])
+@pytest.mark.parametrize("timeframe", ["1m", "5m", "15m", "30m", "1h", "4h"])
+def test_intraday_bars_aggregate_to_daily_bars(generate, timeframe):
+    day = timedelta(days=1)
+    ratio = day // get_timedelta_from_timeframe(TimeFrame(timeframe))
+    lo = data_processor._bar_index(datetime(2024, 2, 27), day)
+    daily = generate("AAPL", day, lo, lo + 10)
+    fine = generate("AAPL", day // ratio, lo * ratio, (lo + 10) * ratio)
+    _assert_bars_equal(resample_ohlcv(fine, day), daily)
+
+@pytest.mark.parametrize("timeframe", ["1w", "1M"])
+def test_calendar_bars_aggregate_daily_bars(timeframe):
+    time_delta = get_timedelta_from_timeframe(TimeFrame(timeframe))
+    ratio = time_delta // timedelta(days=1)
+    lo = data_processor._bar_index(datetime(2023, 6, 1), time_delta)
+    daily = _generate_stock_bars("MSFT", timedelta(days=1), lo * ratio, (lo + 4) * ratio)
+    _assert_bars_equal(resample_ohlcv(daily, time_delta), _generate_stock_bars("MSFT", time_delta, lo, lo + 4))
+
+def test_bars_do_not_depend_on_the_requested_range():
+    minute = timedelta(minutes=1)
+    lo = data_processor._bar_index(datetime(2019, 12, 30, 22), minute)
+    wide = _generate_stock_bars("TSLA", minute, lo, lo + 5000)
+    narrow = _generate_stock_bars("TSLA", minute, lo + 1234, lo + 1300)
+    _assert_bars_equal(narrow, {name: values[1234:1300] for name, values in wide.items()})
+
+def test_daily_bars_agree_across_query_sizes(frozen_now):
+    async def fetch(days):
+        return (await fetch_market_series(
+            ["AAPL"], frozen_now - timedelta(days=days), frozen_now, TimeFrame.ONE_DAY, limit=None
+        ))["AAPL"]
+    short, long = asyncio.run(fetch(300)), asyncio.run(fetch(1200))
+    assert len(short["timestamp"]) == 300
+    _assert_bars_equal(short, {name: values[-300:] for name, values in long.items()})
+
+@pytest.mark.parametrize("timeframe", ["1h", "1d", "1w", "1M"])
+def test_forming_bar_aggregates_the_minutes_traded_so_far(frozen_now, timeframe):
+    time_delta = get_timedelta_from_timeframe(TimeFrame(timeframe))
+    start = frozen_now - 3 * time_delta
+
+    async def fetch():
+        coarse = await fetch_crypto_series(["BTCUSDT"], start, frozen_now, TimeFrame(timeframe), limit=None)
+        minutes = await fetch_crypto_series(["BTCUSDT"], start, frozen_now, TimeFrame.ONE_MINUTE, limit=None)
+        return coarse["BTCUSDT"], minutes["BTCUSDT"]
+
+    coarse, minutes = asyncio.run(fetch())
+    assert minutes["timestamp"][-1] == np.datetime64("2024-03-14T15:37")
+    resampled = resample_ohlcv(minutes, time_delta)
+    _assert_bars_equal(coarse, {name: values[-len(coarse["timestamp"]):] for name, values in resampled.items()})
+
+def test_query_over_the_bar_budget_is_rejected(monkeypatch, frozen_now):
+    monkeypatch.setattr(data_processor._settings, "RESAMPLE_MAX_BASE_BARS", 10_000)
+    symbols = ["AAPL", "MSFT", "GOOGL"]
+    start = frozen_now - timedelta(days=3)
+    with pytest.raises(QueryTooLarge):
+        asyncio.run(fetch_market_series(symbols, start, frozen_now, TimeFrame.ONE_MINUTE, limit=None))
+    # The same range fits at a coarser timeframe
+    series = asyncio.run(fetch_market_series(symbols, start, frozen_now, TimeFrame.ONE_HOUR, limit=None))
+    assert [len(series[symbol]["timestamp"]) for symbol in symbols] == [72, 72, 72]
+
+@pytest.mark.parametrize("start, end, expected", [
+    # Off-boundary starts round up and ends round down
+    (datetime(2024, 3, 14, 10, 15), datetime(2024, 3, 14, 12, 45), (datetime(2024, 3, 14, 11), datetime(2024, 3, 14, 12))),
+    # Boundaries stay where they are
+    (datetime(2024, 3, 14, 10), datetime(2024, 3, 14, 12), (datetime(2024, 3, 14, 10), datetime(2024, 3, 14, 12))),
+    # A range inside one bar ends before it starts, so it holds no bar
+    (datetime(2024, 3, 14, 10, 5), datetime(2024, 3, 14, 10, 55), (datetime(2024, 3, 14, 11), datetime(2024, 3, 14, 10)))
+])
+def test_time_ranges_align_to_the_bars_they_contain(start, end, expected):
+    assert normalize_time_range(start, end, TimeFrame.ONE_HOUR, now=datetime(2025, 1, 1)) == (*expected, None)
+
+def test_weekly_and_monthly_bars_lie_on_the_epoch_grid():
+    now = datetime(2025, 1, 1)
+    # 1970-01-01 was a Thursday, so weekly bars open on Thursdays
+    start, end, _ = normalize_time_range(datetime(2024, 1, 2), datetime(2024, 1, 17), TimeFrame.ONE_WEEK, now=now)
+    assert (start, end) == (datetime(2024, 1, 4), datetime(2024, 1, 11))
+    assert start.weekday() == end.weekday() == 3
+
+    # Monthly bars are 30-day periods, not calendar months
+    start, end, _ = normalize_time_range(datetime(2024, 1, 1), datetime(2024, 3, 1), TimeFrame.ONE_MONTH, now=now)
+    assert (start, end) == (datetime(2024, 1, 18), datetime(2024, 2, 17))
+    assert (start - datetime(1970, 1, 1)).days % 30 == 0 and (end - start).days == 30
+
+def test_aware_ranges_align_in_utc():
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    naive = normalize_time_range(
+        datetime(2024, 3, 14, 10, 15), datetime(2024, 3, 14, 12, 45), TimeFrame.ONE_HOUR, now=now.replace(tzinfo=None)
+    )
+    aware = normalize_time_range(
+        datetime(2024, 3, 14, 10, 15, tzinfo=timezone.utc), datetime(2024, 3, 14, 12, 45, tzinfo=timezone.utc),
+        TimeFrame.ONE_HOUR, now=now
+    )
+    assert aware[:2] == tuple(value.replace(tzinfo=timezone.utc) for value in naive[:2])
+    assert all(value.tzinfo is not None for value in aware[:2])
+
+    # Other offsets are converted: 12:15+02:00 is 10:15 UTC
+    plus_two = timezone(timedelta(hours=2))
+    start, end, _ = normalize_time_range(
+        datetime(2024, 3, 14, 12, 15, tzinfo=plus_two), datetime(2024, 3, 14, 14, 45, tzinfo=plus_two),
+        TimeFrame.ONE_HOUR, now=now
+    )
+    assert (start, end) == aware[:2] and start.tzinfo == timezone.utc
+
+def test_ranges_reaching_the_forming_bar_expire_with_it():
+    now = datetime(2024, 3, 14, 15, 37, 20)
+    start, end, ttl = normalize_time_range(datetime(2024, 3, 14), datetime(2024, 3, 14, 16), TimeFrame.ONE_HOUR, now=now)
+    assert (start, end) == (datetime(2024, 3, 14), datetime(2024, 3, 14, 16))
+    assert ttl == 22 * 60 + 40
+    # Aware inputs compare against an aware now
+    _, _, ttl = normalize_time_range(
+        datetime(2024, 3, 14, tzinfo=timezone.utc), datetime(2024, 3, 14, 15, 40, tzinfo=timezone.utc),
+        TimeFrame.ONE_HOUR, now=now.replace(tzinfo=timezone.utc)
+    )
+    assert ttl == 22 * 60 + 40
+    # Long forming bars are capped at the default TTL
+    _, _, ttl = normalize_time_range(datetime(2024, 3, 1), now, TimeFrame.ONE_DAY, now=now)
+    assert ttl == data_processor._settings.CACHE_EXPIRATION_SECONDS
@@ -0,0 +1,114 @@
+# tests/test_series_store.py
+import asyncio
+import os
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import data_processor
+from data_processor import fetch_market_series, flush_series_store, _generate_stock_bars
+from models import TimeFrame
+from series_store import SeriesFile, SeriesStore, StoreError, _FileLock, repair_file
+
+def _bars(lo: int, hi: int):
+    return _generate_stock_bars("AAPL", timedelta(days=1), lo, hi)
+
+def test_appended_rows_survive_reopening(tmp_path):
+    store = SeriesStore(str(tmp_path))
+    assert store.append("market", "AAPL", "1d", _bars(19000, 19010)) == 10
+    assert store.append("market", "AAPL", "1d", _bars(19005, 19020)) == 10
+    columns = SeriesStore(str(tmp_path)).read("market", "AAPL", "1d", np.datetime64("1970-01-01"), np.datetime64("2100-01-01"))
+    for name, values in _bars(19000, 19020).items():
+        np.testing.assert_array_equal(columns[name], values)
+
+def test_create_keeps_a_file_created_concurrently(tmp_path):
+    path = tmp_path / "AAPL.bin"
+    bars = _bars(19000, 19010)
+    layout = {name: values.dtype for name, values in bars.items()}
+    SeriesFile.create(path, layout).append(bars)
+    assert SeriesFile.create(path, layout).length == 10
+    assert not path.with_name("AAPL.bin.tmp").exists()
+
+@pytest.mark.parametrize("size", [0, 10, 100, 4096, 5000])
+def test_torn_files_raise_store_error(tmp_path, size):
+    path = tmp_path / "AAPL.bin"
+    series_file = SeriesFile.create(path, {name: values.dtype for name, values in _bars(0, 1).items()})
+    series_file.append(_bars(0, 1))
+    path.write_bytes(path.read_bytes()[:size])
+    with pytest.raises(StoreError):
+        SeriesFile(path)
+    # A mapping made before the file was torn is not read past its end either
+    with pytest.raises(StoreError):
+        series_file.read()
+
+def _open_descriptors():
+    return len(os.listdir("/proc/self/fd"))
+
+def test_open_files_are_bounded(tmp_path):
+    store = SeriesStore(str(tmp_path), max_open_files=8)
+    before = _open_descriptors()
+    symbols = [f"S{i}" for i in range(40)]
+    for symbol in symbols:
+        store.append("market", symbol, "1d", _bars(19000, 19010))
+    for symbol in symbols:
+        columns = store.read("market", symbol, "1d", np.datetime64("1970-01-01"), np.datetime64("2100-01-01"))
+        assert len(columns["timestamp"]) == 10
+    del columns
+    assert store.stats()["open_files"] == 8
+    assert _open_descriptors() - before <= 8
+
+    # Evicted files are mapped again when they are read
+    columns = store.read("market", "S0", "1d", np.datetime64("1970-01-01"), np.datetime64("2100-01-01"))
+    np.testing.assert_array_equal(columns["close"], _bars(19000, 19010)["close"])
+    del columns
+    store.close()
+    assert _open_descriptors() == before
+
+def test_repair_waits_for_writers(tmp_path):
+    path = tmp_path / "AAPL.bin"
+    SeriesFile.create(path, {name: values.dtype for name, values in _bars(0, 1).items()}).append(_bars(19000, 19010))
+    temporary = path.with_name("AAPL.bin.tmp")
+    temporary.write_bytes(b"being written")
+    reports = []
+    with _FileLock(path.with_name("AAPL.bin.lock")):
+        repair = threading.Thread(target=lambda: reports.append(repair_file(path)))
+        repair.start()
+        repair.join(0.2)
+        # A writer holds the lock; its temporary file is left alone
+        assert repair.is_alive() and temporary.exists()
+    repair.join()
+    assert reports == [{"path": str(path), "removed_temporary": True, "rows": 10, "dropped_rows": 0}]
+
+def test_repair_moves_unreadable_files_aside(tmp_path):
+    path = tmp_path / "AAPL.bin"
+    path.write_bytes(b"BVTS\x01")
+    report = repair_file(path)
+    assert "error" in report
+    assert not path.exists()
+    assert path.with_name("AAPL.bin.corrupt").exists()
+
+def test_unreadable_store_file_falls_back_to_the_provider(monkeypatch, tmp_path):
+    store = SeriesStore(str(tmp_path))
+    monkeypatch.setattr(data_processor, "series_store", store)
+    end = datetime(2024, 1, 31)
+    query = (["AAPL"], end - timedelta(days=29), end, TimeFrame.ONE_DAY, None)
+
+    async def fetch():
+        series = await fetch_market_series(*query)
+        await flush_series_store()
+        return series["AAPL"]
+
+    expected = asyncio.run(fetch())
+    assert store.path("market", "AAPL", "1d").exists()
+
+    path = store.path("market", "AAPL", "1d")
+    path.write_bytes(path.read_bytes()[:20])
+    data_processor.data_cache.clear()
+    for reopened in (store, SeriesStore(str(tmp_path))):
+        monkeypatch.setattr(data_processor, "series_store", reopened)
+        series = asyncio.run(fetch())
+        data_processor.data_cache.clear()
+        for name, values in expected.items():
+            np.testing.assert_array_equal(series[name], values)
@@ -0,0 +1,79 @@
+# tests/test_stream.py
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from broadcaster import CONFLATE, DROP_OLDEST, StreamHub, Subscription, stream_hub
+from main import app
+
+def _drain(subscription):
+    async def drain():
+        return [json.loads(await subscription.get()) for _ in range(subscription.pending)]
+
+    return asyncio.run(drain())
+
+def test_ticks_fan_out_to_the_subscribers_of_their_symbol():
+    hub = StreamHub()
+    hub.attach_feed()
+    first, second = hub.create_subscription(), hub.create_subscription()
+    hub.subscribe(first, ["AAPL", "MSFT"])
+    hub.subscribe(second, ["AAPL"])
+    for symbol in ("AAPL", "MSFT", "TSLA"):
+        hub.publish(symbol, {"symbol": symbol, "price": 1.0})
+
+    assert [tick["symbol"] for tick in _drain(first)] == ["AAPL", "MSFT"]
+    assert [tick["symbol"] for tick in _drain(second)] == ["AAPL"]
+    assert hub.stats()["ticks_published"] == 2
+
+def test_slow_consumers_drop_the_oldest_ticks_or_conflate():
+    dropping = Subscription(max_queue=2, policy=DROP_OLDEST)
+    conflating = Subscription(max_queue=2, policy=CONFLATE)
+    for price in range(3):
+        for symbol in ("AAPL", "MSFT"):
+            message = json.dumps({"symbol": symbol, "price": price})
+            dropping.publish(symbol, message)
+            conflating.publish(symbol, message)
+
+    assert [(tick["symbol"], tick["price"]) for tick in _drain(dropping)] == [("AAPL", 2), ("MSFT", 2)]
+    assert dropping.dropped == 4
+    # Only the latest tick of each symbol is kept
+    assert [(tick["symbol"], tick["price"]) for tick in _drain(conflating)] == [("AAPL", 2), ("MSFT", 2)]
+    assert conflating.dropped == 4
+
+def test_producers_stop_with_their_last_subscriber():
+    async def scenario():
+        hub = StreamHub(tick_interval=0.01)
+        first, second = hub.create_subscription(), hub.create_subscription()
+        hub.subscribe(first, ["AAPL"])
+        hub.subscribe(second, ["AAPL"])
+        producer = hub._producers["AAPL"]
+        tick = json.loads(await second.get())
+
+        hub.unsubscribe(first)
+        assert not producer.done()
+        hub.unsubscribe(second, ["AAPL"])
+        await asyncio.gather(producer, return_exceptions=True)
+        return tick, producer, hub.stats()
+
+    tick, producer, stats = asyncio.run(scenario())
+    assert tick["symbol"] == "AAPL"
+    assert producer.cancelled()
+    assert stats["symbols"] == 0 and stats["subscriptions"] == 0
+
+def test_invalid_control_messages_are_answered_with_errors(monkeypatch):
+    # No simulated producers: the only frames are the replies to control messages
+    monkeypatch.setattr(stream_hub, "external_feed", True)
+    with TestClient(app).websocket_connect("/api/v1/stream?symbols=aapl") as websocket:
+        websocket.send_text("{not json")
+        assert websocket.receive_json()["type"] == "error"
+        websocket.send_json({"action": "subscribe", "symbols": "MSFT"})
+        assert websocket.receive_json() == {"type": "error", "detail": "Expected symbols to be a list of strings"}
+        websocket.send_json({"action": "watch", "symbols": ["MSFT"]})
+        assert websocket.receive_json()["type"] == "error"
+
+        # The connection stays usable
+        websocket.send_json({"action": "subscribe", "symbols": ["msft", "AAPL"]})
+        assert websocket.receive_json() == {"type": "subscribed", "symbols": ["MSFT"], "subscribed": ["AAPL", "MSFT"]}
+        websocket.send_json({"action": "unsubscribe", "symbols": ["AAPL"]})
+        assert websocket.receive_json() == {"type": "unsubscribed", "symbols": ["AAPL"], "subscribed": ["MSFT"]}
@@ -0,0 +1,86 @@
+# tests/test_ticks.py
+import asyncio
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from ticks import BAR_MICROSECONDS, FileReplaySource, TickPipeline, TickSource
+
+# Epoch milliseconds of the first bar's start and its bar index
+_START_MS = int((datetime(2024, 1, 2) - datetime(1970, 1, 1)).total_seconds() * 1000)
+_BAR = _START_MS * 1000 // BAR_MICROSECONDS
+
+def _write(path, lines):
+    path.write_text("".join(f"{_START_MS + offset},{symbol},{price},{size}\n" for offset, symbol, price, size in lines))
+    return str(path)
+
+def _run(pipeline, path, flush=False):
+    # A small chunk size splits lines across reads; the whole file still forms one batch
+    asyncio.run(pipeline.run(FileReplaySource(path, chunk_bytes=16), flush=flush))
+
+def _pipeline(bars):
+    async def bar_sink(symbol, lo, columns):
+        for offset in range(len(columns["timestamp"])):
+            row = {name: values[offset].item() for name, values in columns.items() if name != "timestamp"}
+            bars.setdefault(symbol, {})[lo + offset - _BAR] = row
+            assert columns["timestamp"][offset] == np.datetime64((lo + offset) * BAR_MICROSECONDS, "us")
+
+    return TickPipeline(bar_sink=bar_sink, batch_max_ticks=10_000, batch_interval=5.0)
+
+def _bar(open_, high, low, close, volume, trades):
+    return {"open": open_, "high": high, "low": low, "close": close, "volume": volume, "trades": trades}
+
+def test_ticks_roll_up_into_bars(tmp_path):
+    bars = {}
+    pipeline = _pipeline(bars)
+    # Out of order within the first bar; the close is the latest tick by time
+    _run(pipeline, _write(tmp_path / "first.csv", [
+        (30_000, "AAA", 12.0, 2),
+        (0, "AAA", 10.0, 1),
+        (10_000, "AAA", 9.0, 1),
+        (61_000, "AAA", 11.0, 3),
+        (5_000, "BBB", 100.0, 10)
+    ]))
+    assert bars == {"AAA": {0: _bar(10.0, 12.0, 9.0, 12.0, 4.0, 3)}}
+
+    path = tmp_path / "second.csv"
+    _write(path, [
+        (20_000, "AAA", 50.0, 1),  # Late: the first bar of AAA is complete
+        (185_000, "AAA", 13.0, 1),
+        (65_000, "BBB", 101.0, 5)
+    ])
+    with open(path, "a") as file:
+        file.write("not,a,tick,line\n")
+    _run(pipeline, str(path), flush=True)
+
+    assert bars == {
+        "AAA": {
+            0: _bar(10.0, 12.0, 9.0, 12.0, 4.0, 3),
+            1: _bar(11.0, 11.0, 11.0, 11.0, 3.0, 1),
+            # No ticks in this minute: a flat bar at the previous close
+            2: _bar(11.0, 11.0, 11.0, 11.0, 0.0, 0),
+            # Completed by the flush at the end of the replay
+            3: _bar(13.0, 13.0, 13.0, 13.0, 1.0, 1)
+        },
+        "BBB": {0: _bar(100.0, 100.0, 100.0, 100.0, 10.0, 1), 1: _bar(101.0, 101.0, 101.0, 101.0, 5.0, 1)}
+    }
+    stats = pipeline.stats()
+    assert stats["ticks"] == 7
+    assert stats["late"] == 1
+    assert stats["rejected"] == 2
+    assert pipeline.rollup.forming_bar("AAA") is None
+
+def test_last_line_without_a_newline_is_read(tmp_path):
+    bars = {}
+    path = tmp_path / "ticks.csv"
+    path.write_text(f"{_START_MS},AAA,10.0,1\n{_START_MS + 1000},AAA,11.0,2")
+    _run(_pipeline(bars), str(path), flush=True)
+    assert bars == {"AAA": {0: _bar(10.0, 11.0, 10.0, 11.0, 3.0, 2)}}
+
+def test_sources_must_yield_chunks():
+    class Incomplete(TickSource):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
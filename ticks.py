@@ -0,0 +1,775 @@
+# ticks.py
+import abc
+import argparse
+import asyncio
+import io
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from broadcaster import stream_hub
+from config import get_settings
+from data_processor import add_live_bars, update_live_quote
+from metrics import registry, timed_stage
+
+logger = logging.getLogger("bavest-api")
+
+# Ticks roll up into bars of this many microseconds (1m)
+BAR_MICROSECONDS = 60_000_000
+
+# Ticks counted by the ingest rate
+_RATE_WINDOW_SECONDS = 10.0
+
+TICKS_INGESTED = registry.counter("bavest_ticks_ingested_total", "Ticks rolled into bars")
+TICKS_REJECTED = registry.counter(
+    "bavest_ticks_rejected_total", "Ticks discarded by reason (malformed or late)", ("reason",)
+)
+TICK_QUEUE_SECONDS = registry.histogram(
+    "bavest_tick_queue_seconds", "Time raw tick chunks wait in the ingest queue before processing"
+)
+TICK_EVENT_LAG = registry.gauge(
+    "bavest_tick_event_lag_seconds", "Wall-clock delay behind the newest tick of the last batch"
+)
+
+class TickBatch(NamedTuple):
+    """Parsed ticks as columns: symbol, epoch microseconds, price and size"""
+    symbols: np.ndarray
+    timestamps: np.ndarray
+    prices: np.ndarray
+    sizes: np.ndarray
+
+def _timestamps_to_us(values: pd.Series) -> np.ndarray:
+    """Epoch milliseconds or ISO strings as epoch microseconds; unparsable values become NaN"""
+    numeric = pd.to_numeric(values, errors="coerce")
+    if numeric.notna().all() or pd.api.types.is_numeric_dtype(values):
+        return (numeric.to_numpy(dtype=np.float64) * 1000).round()
+    parsed = pd.to_datetime(values, errors="coerce", utc=True, format="ISO8601")
+    micros = parsed.dt.tz_localize(None).to_numpy(dtype="datetime64[us]").astype(np.int64).astype(np.float64)
+    micros[parsed.isna().to_numpy()] = np.nan
+    return np.where(numeric.notna(), numeric.to_numpy(dtype=np.float64) * 1000, micros)
+
+def parse_ticks(data: bytes) -> Tuple[TickBatch, int]:
+    """
+    Parse a block of complete tick lines into columns
+
+    Lines are CSV `timestamp,symbol,price,size` with epoch-millisecond (or ISO)
+    timestamps, or NDJSON objects with the same keys. CSV goes through the
+    pandas C parser, which keeps a core at well over 100k ticks/s. Returns the
+    batch and the number of malformed lines that were dropped.
+    """
+    lines = data.count(b"\n") + (0 if data.endswith(b"\n") else 1)
+    if data.lstrip()[:1] == b"{":
+        records = []
+        for line in data.splitlines():
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                    records.append((record["timestamp"], record["symbol"], record["price"], record["size"]))
+                except (ValueError, KeyError, TypeError):
+                    pass
+        frame = pd.DataFrame.from_records(records, columns=["timestamp", "symbol", "price", "size"])
+    else:
+        frame = pd.read_csv(
+            io.BytesIO(data),
+            header=None,
+            names=["timestamp", "symbol", "price", "size"],
+            dtype={"symbol": object},
+            on_bad_lines="skip",
+            engine="c"
+        )
+        lines -= data.count(b"\n\n")  # Blank lines are not ticks
+
+    timestamps = _timestamps_to_us(frame["timestamp"])
+    prices = pd.to_numeric(frame["price"], errors="coerce").to_numpy(dtype=np.float64)
+    sizes = pd.to_numeric(frame["size"], errors="coerce").to_numpy(dtype=np.float64)
+    symbols = frame["symbol"].to_numpy(dtype=object)
+    valid = np.isfinite(timestamps) & np.isfinite(prices) & np.isfinite(sizes) & pd.notna(symbols)
+    if not valid.all():
+        timestamps, prices, sizes, symbols = timestamps[valid], prices[valid], sizes[valid], symbols[valid]
+    batch = TickBatch(symbols.astype(str).astype(object), timestamps.astype(np.int64), prices, sizes)
+    return batch, max(lines - len(prices), 0)
+
+class TickSource(abc.ABC):
+    """
+    Stream of raw tick data
+
+    chunks() yields bytes holding whole lines (see parse_ticks). A source is
+    slowed down by the pipeline's bounded queue: it is not read again until the
+    previous chunk was queued.
+    """
+
+    name = "base"
+
+    @abc.abstractmethod
+    def chunks(self) -> AsyncIterator[bytes]:
+        """Raw chunks of whole tick lines"""
+
+    async def close(self) -> None:
+        """Release connections and files"""
+
+class FileReplaySource(TickSource):
+    """
+    Replay a tick file
+
+    speed 0 reads as fast as the pipeline accepts; speed 1 paces ticks by their
+    timestamps in real time, 10 ten times faster. Pacing needs epoch-millisecond
+    CSV timestamps.
+    """
+
+    name = "file"
+
+    def __init__(self, path: str, speed: float = 0.0, chunk_bytes: int = 256 * 1024):
+        self.path = Path(path)
+        self.speed = speed
+        self.chunk_bytes = chunk_bytes
+        # Monotonic time and tick time of the first paced tick
+        self._origin: Optional[Tuple[float, float]] = None
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        with open(self.path, "rb") as file:
+            remainder = b""
+            while True:
+                data = await asyncio.to_thread(file.read, self.chunk_bytes)
+                if not data:
+                    break
+                data = remainder + data
+                cut = data.rfind(b"\n") + 1
+                data, remainder = data[:cut], data[cut:]
+                if data:
+                    if self.speed > 0:
+                        async for paced in self._pace(data):
+                            yield paced
+                    else:
+                        yield data
+            if remainder.strip():
+                yield remainder + b"\n"
+
+    async def _pace(self, data: bytes) -> AsyncIterator[bytes]:
+        """Release lines when their (scaled) time has come, in 100 ms steps"""
+        group: List[bytes] = []
+        group_due = None
+        for line in data.splitlines(keepends=True):
+            try:
+                tick_ms = float(line.split(b",", 1)[0])
+            except ValueError:
+                group.append(line)
+                continue
+            if self._origin is None:
+                self._origin = (time.monotonic(), tick_ms)
+            started, first_ms = self._origin
+            due = started + (tick_ms - first_ms) / 1000 / self.speed
+            if group_due is not None and due - group_due >= 0.1:
+                await asyncio.sleep(max(group_due - time.monotonic(), 0))
+                yield b"".join(group)
+                group = []
+                group_due = None
+            if group_due is None:
+                group_due = due
+            group.append(line)
+        if group:
+            await asyncio.sleep(max((group_due or 0) - time.monotonic(), 0))
+            yield b"".join(group)
+
+class SocketSource(TickSource):
+    """
+    Read newline-delimited ticks from a TCP socket, e.g. the replay server
+
+    Not reading while the queue is full lets TCP flow control push back on the sender.
+    """
+
+    name = "socket"
+
+    def __init__(self, host: str, port: int, chunk_bytes: int = 256 * 1024):
+        self.host = host
+        self.port = port
+        self.chunk_bytes = chunk_bytes
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        reader, self._writer = await asyncio.open_connection(self.host, self.port, limit=self.chunk_bytes)
+        remainder = b""
+        while True:
+            data = await reader.read(self.chunk_bytes)
+            if not data:
+                break
+            data = remainder + data
+            cut = data.rfind(b"\n") + 1
+            data, remainder = data[:cut], data[cut:]
+            if data:
+                yield data
+        if remainder.strip():
+            yield remainder + b"\n"
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+class KinesisSource(TickSource):
+    """
+    Poll every shard of a Kinesis stream from its latest record
+
+    Each record's data holds one or more tick lines. Requires boto3; calls run
+    in threads so the event loop is not blocked.
+    """
+
+    name = "kinesis"
+
+    def __init__(self, stream_name: str, region: str, poll_interval: float = 0.2):
+        self.stream_name = stream_name
+        self.region = region
+        self.poll_interval = poll_interval
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("The kinesis tick source requires the 'boto3' package")
+        client = boto3.client("kinesis", region_name=self.region)
+        shards = await asyncio.to_thread(client.list_shards, StreamName=self.stream_name)
+        iterators = []
+        for shard in shards["Shards"]:
+            response = await asyncio.to_thread(
+                client.get_shard_iterator,
+                StreamName=self.stream_name,
+                ShardId=shard["ShardId"],
+                ShardIteratorType="LATEST"
+            )
+            iterators.append(response["ShardIterator"])
+
+        while iterators:
+            received = False
+            for position, iterator in enumerate(iterators):
+                response = await asyncio.to_thread(client.get_records, ShardIterator=iterator, Limit=10_000)
+                iterators[position] = response.get("NextShardIterator")
+                lines = [record["Data"].rstrip(b"\n") + b"\n" for record in response["Records"]]
+                if lines:
+                    received = True
+                    yield b"".join(lines)
+            iterators = [iterator for iterator in iterators if iterator]
+            if not received:
+                # Kinesis allows five reads per shard and second
+                await asyncio.sleep(self.poll_interval)
+
+def create_tick_source(settings: Any) -> Optional[TickSource]:
+    """Source selected by TICK_SOURCE, or None when tick ingestion is off"""
+    source = settings.TICK_SOURCE
+    if source == "none":
+        return None
+    if source == "file":
+        if not settings.TICK_FILE_PATH:
+            raise ValueError("TICK_SOURCE=file requires TICK_FILE_PATH")
+        return FileReplaySource(settings.TICK_FILE_PATH, speed=settings.TICK_REPLAY_SPEED)
+    if source == "socket":
+        return SocketSource(settings.TICK_SOCKET_HOST, settings.TICK_SOCKET_PORT)
+    if source == "kinesis":
+        if not settings.AWS_KINESIS_STREAM_NAME:
+            raise ValueError("TICK_SOURCE=kinesis requires AWS_KINESIS_STREAM_NAME")
+        return KinesisSource(settings.AWS_KINESIS_STREAM_NAME, settings.AWS_REGION)
+    raise ValueError(f"TICK_SOURCE {source!r} is not supported; use none, file, socket or kinesis")
+
+class BarRollup:
+    """
+    Incremental 1m OHLCV bars per symbol
+
+    Each symbol has one forming bar. A batch is sorted by (symbol, bar, time) and
+    reduced per segment with NumPy; only the per-segment merge into the forming
+    bars runs in Python. When a tick opens a later bar the forming one is
+    completed. Ticks older than a symbol's forming bar are late and dropped.
+    Completed bars come out contiguous: minutes without ticks (up to
+    max_gap_bars) become flat bars at the previous close with no volume.
+    """
+
+    def __init__(self, max_gap_bars: int = 1440):
+        self.max_gap_bars = max_gap_bars
+        self.symbol_ids: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        capacity = 64
+        self._bar = np.full(capacity, -1, dtype=np.int64)
+        self._ohlcv = np.zeros((capacity, 5))
+        self._trades = np.zeros(capacity, dtype=np.int64)
+        self._last_time = np.zeros(capacity, dtype=np.int64)
+        # End of the completed bars handed out per symbol and their last close
+        self._completed_hi = np.full(capacity, -1, dtype=np.int64)
+        self._completed_close = np.zeros(capacity)
+        self.late = 0
+        self.bars_completed = 0
+
+    def _ids(self, symbols: np.ndarray) -> np.ndarray:
+        codes, uniques = pd.factorize(symbols)
+        lookup = np.empty(len(uniques), dtype=np.int64)
+        for position, symbol in enumerate(uniques):
+            symbol_id = self.symbol_ids.get(symbol)
+            if symbol_id is None:
+                symbol_id = self.symbol_ids[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+            lookup[position] = symbol_id
+        if len(self.symbols) > len(self._bar):
+            self._grow(len(self.symbols))
+        return lookup[codes]
+
+    def _grow(self, needed: int) -> None:
+        capacity = max(needed, 2 * len(self._bar))
+        extra = capacity - len(self._bar)
+        self._bar = np.concatenate((self._bar, np.full(extra, -1, dtype=np.int64)))
+        self._ohlcv = np.concatenate((self._ohlcv, np.zeros((extra, 5))))
+        self._trades = np.concatenate((self._trades, np.zeros(extra, dtype=np.int64)))
+        self._last_time = np.concatenate((self._last_time, np.zeros(extra, dtype=np.int64)))
+        self._completed_hi = np.concatenate((self._completed_hi, np.full(extra, -1, dtype=np.int64)))
+        self._completed_close = np.concatenate((self._completed_close, np.zeros(extra)))
+
+    def add(self, batch: TickBatch) -> Tuple[Dict[str, List[Tuple[int, Dict[str, np.ndarray]]]], Dict[str, Dict[str, Any]]]:
+        """
+        Roll a batch into the forming bars
+
+        Returns the completed bars as `symbol -> [(first bar index, columns)]`
+        and, per symbol in the batch, a summary of its ticks: last price and
+        time, volume and tick count.
+        """
+        if not len(batch.prices):
+            return {}, {}
+        ids = self._ids(batch.symbols)
+        bars = batch.timestamps // BAR_MICROSECONDS
+        order = np.lexsort((batch.timestamps, bars, ids))
+        ids, bars = ids[order], bars[order]
+        times, prices, sizes = batch.timestamps[order], batch.prices[order], batch.sizes[order]
+
+        starts = np.flatnonzero(np.concatenate(([True], (ids[1:] != ids[:-1]) | (bars[1:] != bars[:-1]))))
+        ends = np.append(starts[1:], len(ids))
+        segments = zip(
+            ids[starts].tolist(), bars[starts].tolist(),
+            prices[starts].tolist(), np.maximum.reduceat(prices, starts).tolist(),
+            np.minimum.reduceat(prices, starts).tolist(), prices[ends - 1].tolist(),
+            np.add.reduceat(sizes, starts).tolist(), (ends - starts).tolist(),
+            times[ends - 1].tolist()
+        )
+
+        completed: Dict[int, List[Tuple[int, float, float, float, float, float, int]]] = {}
+        summary: Dict[int, List[Any]] = {}
+        for symbol_id, bar, open_, high, low, close, volume, count, last_time in segments:
+            forming = self._bar[symbol_id]
+            if bar < forming:
+                self.late += count
+                continue
+            state = self._ohlcv[symbol_id]
+            if bar == forming:
+                state[1] = max(state[1], high)
+                state[2] = min(state[2], low)
+                state[3] = close
+                state[4] += volume
+                self._trades[symbol_id] += count
+            else:
+                if forming >= 0:
+                    completed.setdefault(symbol_id, []).append((int(forming), *state.tolist(), int(self._trades[symbol_id])))
+                self._bar[symbol_id] = bar
+                state[:] = (open_, high, low, close, volume)
+                self._trades[symbol_id] = count
+            self._last_time[symbol_id] = last_time
+            entry = summary.get(symbol_id)
+            if entry is None:
+                summary[symbol_id] = [close, last_time, volume, count]
+            else:
+                entry[0], entry[1] = close, last_time
+                entry[2] += volume
+                entry[3] += count
+
+        bars_by_symbol = {self.symbols[symbol_id]: self._contiguous(symbol_id, rows) for symbol_id, rows in completed.items()}
+        summaries = {
+            self.symbols[symbol_id]: {"price": price, "time": time_us, "volume": volume, "trades": count}
+            for symbol_id, (price, time_us, volume, count) in summary.items()
+        }
+        return bars_by_symbol, summaries
+
+    def forming_bar(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """The symbol's bar in progress, or None before its first tick"""
+        symbol_id = self.symbol_ids.get(symbol)
+        if symbol_id is None or self._bar[symbol_id] < 0:
+            return None
+        open_, high, low, close, volume = self._ohlcv[symbol_id].tolist()
+        return {
+            "index": int(self._bar[symbol_id]),
+            "open": open_, "high": high, "low": low, "close": close,
+            "volume": volume, "trades": int(self._trades[symbol_id])
+        }
+
+    def flush(self) -> Dict[str, List[Tuple[int, Dict[str, np.ndarray]]]]:
+        """Complete every forming bar, e.g. when a replay has ended"""
+        completed = {}
+        for symbol_id in np.flatnonzero(self._bar >= 0).tolist():
+            row = (int(self._bar[symbol_id]), *self._ohlcv[symbol_id].tolist(), int(self._trades[symbol_id]))
+            completed[self.symbols[symbol_id]] = self._contiguous(symbol_id, [row])
+            self._bar[symbol_id] = -1
+        return completed
+
+    def _contiguous(self, symbol_id: int, rows: List[Tuple]) -> List[Tuple[int, Dict[str, np.ndarray]]]:
+        """Completed bars as runs of consecutive bar indices, with flat bars in short gaps"""
+        runs = []
+        run_lo, run_rows = None, []
+        previous_hi = int(self._completed_hi[symbol_id])
+        previous_close = float(self._completed_close[symbol_id])
+        for row in rows:
+            bar = row[0]
+            gap = bar - previous_hi if previous_hi >= 0 else 0
+            if 0 < gap <= self.max_gap_bars:
+                run_rows.extend((index, previous_close, previous_close, previous_close, previous_close, 0.0, 0)
+                                for index in range(previous_hi, bar))
+                if run_lo is None:
+                    run_lo = previous_hi
+            elif gap != 0 and run_rows:
+                runs.append((run_lo, run_rows))
+                run_lo, run_rows = None, []
+            if run_lo is None:
+                run_lo = bar
+            run_rows.append(row)
+            previous_hi, previous_close = bar + 1, row[4]
+        if run_rows:
+            runs.append((run_lo, run_rows))
+        self._completed_hi[symbol_id] = previous_hi
+        self._completed_close[symbol_id] = previous_close
+        self.bars_completed += sum(len(run_rows) for _, run_rows in runs)
+        return [(lo, _bar_columns(run_rows)) for lo, run_rows in runs]
+
+def _bar_columns(rows: List[Tuple]) -> Dict[str, np.ndarray]:
+    index, open_, high, low, close, volume, trades = (np.asarray(column) for column in zip(*rows))
+    return {
+        "timestamp": np.datetime64(0, "us") + index.astype(np.int64) * np.timedelta64(BAR_MICROSECONDS, "us"),
+        "open": open_.astype(np.float64),
+        "high": high.astype(np.float64),
+        "low": low.astype(np.float64),
+        "close": close.astype(np.float64),
+        "volume": volume.astype(np.float64),
+        "trades": trades.astype(np.int64)
+    }
+
+class TickPipeline:
+    """
+    Ingest ticks from a source into 1m bars
+
+    The source feeds raw chunks into a bounded queue; while it is full the
+    source is not read, so a fast source is held back instead of buffering
+    without limit. The consumer gathers chunks into micro-batches of up to
+    batch_max_ticks ticks or batch_interval seconds, parses each batch in one
+    go and rolls it into bars. Completed bars are awaited by bar_sink(symbol,
+    first bar index, columns); after every batch tick_sink(symbol, message) receives the
+    latest tick and forming bar of each symbol wants_ticks(symbol) accepts, and
+    quote_sink(symbol, forming bar, last price, last tick time) gets every symbol
+    of the batch.
+    """
+
+    def __init__(
+        self,
+        bar_sink: Optional[Callable[[str, int, Dict[str, np.ndarray]], Awaitable[None]]] = None,
+        tick_sink: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        wants_ticks: Callable[[str], bool] = lambda symbol: True,
+        quote_sink: Optional[Callable[[str, Dict[str, Any], float, int], None]] = None,
+        queue_chunks: int = 256,
+        batch_max_ticks: int = 20_000,
+        batch_interval: float = 0.05,
+        max_gap_bars: int = 1440
+    ):
+        self.bar_sink = bar_sink
+        self.tick_sink = tick_sink
+        self.wants_ticks = wants_ticks
+        self.quote_sink = quote_sink
+        self.queue_chunks = max(queue_chunks, 1)
+        self.batch_max_ticks = batch_max_ticks
+        self.batch_interval = batch_interval
+        self.rollup = BarRollup(max_gap_bars)
+        self.source: Optional[TickSource] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._ingest_times: deque = deque()
+        self._queue_waits: deque = deque(maxlen=1000)
+        self.ticks = 0
+        self.rejected = 0
+        self.batches = 0
+        self.chunks = 0
+        self.failed_batches = 0
+        self.blocked_seconds = 0.0
+        self.event_lag: Optional[float] = None
+        self.running = False
+        self.error: Optional[str] = None
+
+    async def run(self, source: TickSource, flush: bool = False) -> None:
+        """
+        Ingest until the source ends (or the task is cancelled)
+
+        flush completes the forming bars at the end, for finite replays. A
+        failing source is logged and ends the run.
+        """
+        self.source = source
+        self._queue = asyncio.Queue(maxsize=self.queue_chunks)
+        self.running = True
+        self.error = None
+        consumer = asyncio.ensure_future(self._consume())
+        try:
+            async for chunk in source.chunks():
+                queued = time.monotonic()
+                await self._queue.put((chunk, queued))
+                self.blocked_seconds += time.monotonic() - queued
+                self.chunks += 1
+            await self._queue.put(None)
+            await consumer
+            if flush:
+                await self._emit_bars(self.rollup.flush())
+        except (OSError, RuntimeError, ValueError) as e:
+            self.error = str(e)
+            logger.error(f"Tick ingestion from the {source.name} source failed: {str(e)}")
+        finally:
+            self.running = False
+            consumer.cancel()
+            await source.close()
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        ended = False
+        while not ended:
+            item = await self._queue.get()
+            if item is None:
+                break
+            chunks = [item]
+            pending_ticks = item[0].count(b"\n")
+            deadline = loop.time() + self.batch_interval
+            # Gather what arrives within the batch interval, up to batch_max_ticks
+            while pending_ticks < self.batch_max_ticks:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is None:
+                    ended = True
+                    break
+                chunks.append(item)
+                pending_ticks += item[0].count(b"\n")
+            try:
+                await self._process(chunks)
+            except Exception as e:
+                # A bad batch is dropped; ingestion goes on with the next one
+                self.failed_batches += 1
+                logger.error(f"Could not process a tick batch: {str(e)}")
+
+    async def _process(self, chunks: List[Tuple[bytes, float]]) -> None:
+        now = time.monotonic()
+        for _, queued in chunks:
+            TICK_QUEUE_SECONDS.observe(now - queued)
+            self._queue_waits.append(now - queued)
+
+        with timed_stage("ticks"):
+            batch, malformed = parse_ticks(b"".join(chunk for chunk, _ in chunks))
+            late_before = self.rollup.late
+            completed, summaries = self.rollup.add(batch)
+            late = self.rollup.late - late_before
+        await self._emit_bars(completed)
+        self._emit_ticks(summaries)
+
+        ingested = len(batch.prices) - late
+        self.ticks += ingested
+        self.rejected += malformed + late
+        self.batches += 1
+        TICKS_INGESTED.inc(ingested)
+        if malformed:
+            TICKS_REJECTED.labels("malformed").inc(malformed)
+        if late:
+            TICKS_REJECTED.labels("late").inc(late)
+        self._ingest_times.append((now, ingested))
+        if len(batch.timestamps):
+            self.event_lag = time.time() - batch.timestamps.max() / 1e6
+            TICK_EVENT_LAG.set(self.event_lag)
+
+    async def _emit_bars(self, completed: Dict[str, List[Tuple[int, Dict[str, np.ndarray]]]]) -> None:
+        if self.bar_sink is None:
+            return
+        for symbol, runs in completed.items():
+            for lo, columns in runs:
+                await self.bar_sink(symbol, lo, columns)
+
+    def _emit_ticks(self, summaries: Dict[str, Dict[str, Any]]) -> None:
+        for symbol, summary in summaries.items():
+            bar = self.rollup.forming_bar(symbol)
+            if self.quote_sink is not None:
+                self.quote_sink(symbol, bar, summary["price"], summary["time"])
+            if self.tick_sink is None or not self.wants_ticks(symbol):
+                continue
+            bar_values = {name: value for name, value in bar.items() if name != "index"}
+            bar_time = datetime.utcfromtimestamp(bar["index"] * BAR_MICROSECONDS / 1e6)
+            self.tick_sink(symbol, {
+                "symbol": symbol,
+                "timestamp": datetime.utcfromtimestamp(summary["time"] / 1e6).isoformat(),
+                "price": summary["price"],
+                "volume": summary["volume"],
+                "trade_count": summary["trades"],
+                "bar": {"timestamp": bar_time.isoformat(), **bar_values}
+            })
+
+    def stats(self) -> Dict[str, Any]:
+        """Ingest counters, ingest rate, queue depth and lag"""
+        now = time.monotonic()
+        while self._ingest_times and self._ingest_times[0][0] < now - _RATE_WINDOW_SECONDS:
+            self._ingest_times.popleft()
+        waits = np.fromiter(self._queue_waits, dtype=float) if self._queue_waits else None
+        return {
+            "source": self.source.name if self.source is not None else None,
+            "running": self.running,
+            "error": self.error,
+            "ticks": self.ticks,
+            "rejected": self.rejected,
+            "late": self.rollup.late,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "chunks": self.chunks,
+            "symbols": len(self.rollup.symbols),
+            "bars_completed": self.rollup.bars_completed,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_capacity": self.queue_chunks,
+            "source_blocked_seconds": self.blocked_seconds,
+            "ticks_per_second": sum(count for _, count in self._ingest_times) / _RATE_WINDOW_SECONDS,
+            "queue_wait_seconds": {
+                "p50": float(np.percentile(waits, 50)) if waits is not None else None,
+                "p95": float(np.percentile(waits, 95)) if waits is not None else None
+            },
+            "event_lag_seconds": self.event_lag
+        }
+
+_settings = get_settings()
+
+def _store_bars(symbol: str, lo: int, columns: Dict[str, np.ndarray]) -> Awaitable[None]:
+    return add_live_bars(_settings.TICK_SERIES_KIND, symbol, lo, columns)
+
+def _store_quote(symbol: str, bar: Dict[str, Any], price: float, time_us: int) -> None:
+    update_live_quote(_settings.TICK_SERIES_KIND, symbol, bar, price, time_us)
+
+tick_pipeline = TickPipeline(
+    bar_sink=_store_bars,
+    tick_sink=stream_hub.publish,
+    wants_ticks=stream_hub.has_subscribers,
+    quote_sink=_store_quote,
+    queue_chunks=_settings.TICK_QUEUE_CHUNKS,
+    batch_max_ticks=_settings.TICK_BATCH_MAX_TICKS,
+    batch_interval=_settings.TICK_BATCH_INTERVAL_SECONDS,
+    max_gap_bars=_settings.TICK_MAX_GAP_BARS
+)
+
+def write_synthetic_ticks(
+    path: str,
+    ticks: int,
+    symbols: int,
+    ticks_per_second: float = 1000.0,
+    start: Optional[datetime] = None,
+    seed: int = 0
+) -> None:
+    """Write a CSV tick file of random walks, ticks_per_second apart in event time"""
+    rng = np.random.default_rng(seed)
+    names = np.array([f"SYM{i:04d}" for i in range(symbols)], dtype=object)
+    start_ms = int((start or datetime(2024, 6, 3, 13, 30, tzinfo=timezone.utc)).timestamp() * 1000)
+    levels = 50 + rng.random(symbols) * 150
+    with open(path, "w") as file:
+        for offset in range(0, ticks, 100_000):
+            count = min(100_000, ticks - offset)
+            chosen = rng.integers(0, symbols, count)
+            moves = np.exp(rng.normal(0, 0.0005, count))
+            prices = np.empty(count)
+            for symbol in np.unique(chosen):
+                positions = np.flatnonzero(chosen == symbol)
+                walk = levels[symbol] * np.cumprod(moves[positions])
+                prices[positions] = walk
+                levels[symbol] = walk[-1]
+            times = start_ms + ((offset + np.arange(count)) * 1000 / ticks_per_second).astype(np.int64)
+            frame = pd.DataFrame({
+                "timestamp": times,
+                "symbol": names[chosen],
+                "price": prices.round(4),
+                "size": rng.integers(1, 500, count)
+            })
+            frame.to_csv(file, header=False, index=False)
+
+async def serve_replay(path: str, host: str, port: int, ticks_per_second: float = 0.0, loop: bool = False) -> None:
+    """
+    Stand-in tick feed: stream a tick file to every client that connects
+
+    ticks_per_second 0 sends as fast as the client reads; drain() makes a slow
+    client slow the sender down instead of buffering.
+    """
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                with open(path, "rb") as file:
+                    started, sent = time.monotonic(), 0
+                    while True:
+                        lines = file.readlines(64 * 1024)
+                        if not lines:
+                            break
+                        writer.write(b"".join(lines))
+                        await writer.drain()
+                        sent += len(lines)
+                        if ticks_per_second > 0:
+                            await asyncio.sleep(max(started + sent / ticks_per_second - time.monotonic(), 0))
+                if not loop:
+                    break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info(f"Replaying {path} on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Tick tools
+
+    python ticks.py generate ticks.csv --ticks 1000000 --symbols 500
+    python ticks.py serve ticks.csv --port 9100 --rate 100000   # stand-in socket feed
+    python ticks.py ingest ticks.csv                            # ingest rate of the pipeline
+    """
+    parser = argparse.ArgumentParser(description="Generate, replay and ingest tick files")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    generate = subparsers.add_parser("generate", help="Write a synthetic CSV tick file")
+    generate.add_argument("path")
+    generate.add_argument("--ticks", type=int, default=1_000_000)
+    generate.add_argument("--symbols", type=int, default=500)
+    generate.add_argument("--tick-rate", type=float, default=1000.0, help="Ticks per second of event time")
+    serve = subparsers.add_parser("serve", help="Stream a tick file to TCP clients")
+    serve.add_argument("path")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=9100)
+    serve.add_argument("--rate", type=float, default=0.0, help="Ticks per second, 0 for unthrottled")
+    serve.add_argument("--loop", action="store_true", help="Start over at the end of the file")
+    ingest = subparsers.add_parser("ingest", help="Run the pipeline over a tick file and report its rate")
+    ingest.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        write_synthetic_ticks(args.path, args.ticks, args.symbols, args.tick_rate)
+    elif args.command == "serve":
+        logging.basicConfig(level=logging.INFO)
+        asyncio.run(serve_replay(args.path, args.host, args.port, args.rate, args.loop))
+    else:
+        pipeline = TickPipeline()
+        started = time.perf_counter()
+        asyncio.run(pipeline.run(FileReplaySource(args.path), flush=True))
+        elapsed = time.perf_counter() - started
+        stats = pipeline.stats()
+        print(json.dumps({
+            "ticks": stats["ticks"],
+            "rejected": stats["rejected"],
+            "bars_completed": stats["bars_completed"],
+            "seconds": elapsed,
+            "ticks_per_second": stats["ticks"] / elapsed if elapsed > 0 else None
+        }))
+
+if __name__ == "__main__":
+    main()